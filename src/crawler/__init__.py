@@ -1,2 +1,12 @@
 from .crawler import Crawler
+from .cache import ArchiveCache
+from .downloader import Downloader
+from .manifest import CrawlManifest
+from .pipeline import HourlyPipeline
+from .storage import CSVStore, ParquetStore
+from .rollup import RollupLedger
+from .ranking import ExactRanking, SpaceSavingRanking
+from .sketches import HyperLogLog, SketchStore
+from .timeseries import PrefixSumIndex
+from .event_bus import EventBus, Consumer, HourlyCountConsumer
 from .agglomerate import Agglomerate
@@ -1,13 +1,17 @@
 import os
 import sys
 import json
+import time
 import logging
 import pandas as pd
 from ipdb import set_trace
 from datetime import datetime
 from pathlib import Path, PosixPath
+from itertools import chain
 from collections import defaultdict
-from typing import Dict, Tuple, List, Union, NewType
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Tuple, List, Union, NewType, Iterator
 from tqdm import tqdm
 
 # Logging Config
@@ -20,17 +24,33 @@ root = Path(os.path.abspath(os.path.join(
 if root.joinpath('src') not in sys.path:
     sys.path.append(str(root.joinpath('src')))
 
+from utils import key2hour, pool_size
+from .storage import CSVStore, ParquetStore
+from .manifest import file_checksum
+from .counts import sum_frames
+from .rollup import RollupLedger, Signature
+from .ranking import ExactRanking, SpaceSavingRanking
+
 # Common types used here.
 URL = NewType('URL', str)
 DateRange = Tuple[int, int]
 Iterable = Union[set, list, tuple]
 PandasDataFrame = NewType('PandasDataFrame', pd.core.frame.DataFrame)
+PandasSeries = NewType('PandasSeries', pd.core.series.Series)
 PathType = NewType('Path', PosixPath)
 DateTime = NewType('DateTime', datetime)
 
+GRANULARITIES = ('daily', 'weekly', 'monthly')
+# Memory a worker of parallel_rollup is assumed to need (see pool_size).
+WORKER_MEMORY = 2 * 1024 ** 3
+# Columns an aggregate derives from its event counts (see Agglomerate._finalize).
+DERIVED_COLUMNS = ('TotalEvents', 'NumEvents')
+
 
 class Agglomerate:
-    def __init__(self, data_path=root.joinpath('data')):
+    def __init__(self, data_path=root.joinpath('data'),
+                 store: Union[CSVStore, ParquetStore] = None,
+                 ledger: RollupLedger = None):
         """
         Agglomerates hourly GH Archive data into daily, weekly, and monthly data.
 
@@ -38,11 +58,30 @@ class Agglomerate:
         ----------
         data_path: PathType (default: {root}/data/)
             Path to data.
+        store: CSVStore or ParquetStore (default: CSVStore({data_path}/hourly))
+            Where the crawler saved the hourly counts.
+        ledger: RollupLedger (default: RollupLedger({data_path}/rollups.sqlite))
+            The record of what each aggregate contains, used by refresh and correct_hour.
         match_string: str
             Date to match. The string is formatted as YYYY-MM.
+
+        Notes
+        -----
+        + Aggregates are saved to {data_path}/{daily,weekly,monthly}/{period}.csv.
+        + rollup recomputes the aggregates of every granularity from scratch, reading each hour once. refresh only adds the hours that are new to an aggregate.
         """
 
-        self.data_path = data_path
+        self.data_path = Path(data_path)
+        self.store = store if store is not None else CSVStore(
+            self.data_path.joinpath('hourly'))
+        self.date_match = None
+        self._ledger = ledger
+
+    @property
+    def ledger(self) -> RollupLedger:
+        if self._ledger is None:
+            self._ledger = RollupLedger(self.data_path.joinpath('rollups.sqlite'))
+        return self._ledger
 
     def set_match_string(self, match_string: str):
         self.date_match = match_string
@@ -73,120 +112,320 @@ class Agglomerate:
             return timestamp.strftime("%Y-%m-%d")
 
         if granularity.lower() == "weekly":
-            return timestamp.strftime("%Y-%W")
+            # ISO year and week, e.g., 2020-W11. Weeks start on Monday and belong to the year of their Thursday.
+            return timestamp.strftime("%G-W%V")
 
         if granularity.lower() == "monthly":
             return timestamp.strftime("%Y-%m")
 
-    def hourly2daily(self, also_save: bool = True) -> PandasDataFrame:
+    @staticmethod
+    def _finalize(coarser_df: PandasDataFrame) -> PandasDataFrame:
+        """
+        Adds the TotalEvents and NumEvents of every repository and ranks repositories by them. Event columns are sorted by name.
         """
-        Agglomerates hourly to daily.
+        coarser_df = coarser_df.fillna(0).astype('int64').sort_index(axis=1)
+        num_events = coarser_df.astype(bool).sum(axis=1)
+        total_events = coarser_df.sum(axis=1)
+
+        coarser_df["TotalEvents"] = total_events
+        coarser_df["NumEvents"] = num_events
+
+        return coarser_df.sort_values(by=['NumEvents', 'TotalEvents'], ascending=False)
+
+    def _rollup_path(self, granularity: str, period: str) -> PathType:
+        return self.data_path.joinpath(granularity, '{}.csv'.format(period))
+
+    def _read_rollup(self, granularity: str, period: str) -> Union[PandasDataFrame, None]:
+        """
+        Reads a saved aggregate without its derived columns, or None if it wasn't saved.
+        """
+        rollup_path = self._rollup_path(granularity, period)
+        if not rollup_path.exists():
+            return None
+        coarser_df = pd.read_csv(rollup_path, index_col=0)
+        return coarser_df.drop(columns=[column for column in DERIVED_COLUMNS
+                                        if column in coarser_df.columns])
+
+    def _save_rollup(self, granularity: str, period: str,
+                     coarser_df: PandasDataFrame) -> PandasDataFrame:
+        coarser_df = self._finalize(coarser_df)
+        rollup_path = self._rollup_path(granularity, period)
+        rollup_path.parent.mkdir(parents=True, exist_ok=True)
+        coarser_df.to_csv(rollup_path, index_label="Repositories")
+        return coarser_df
+
+    def _signature(self, hour: str, known: Signature = None) -> Signature:
+        """
+        The checksum, size, and mtime_ns of a saved hour. The checksum is only recomputed if the file changed since it was known.
+        """
+        stat = self.store.location(hour).stat()
+        if known is not None and tuple(known[1:]) == (stat.st_size, stat.st_mtime_ns):
+            return tuple(known)
+        return file_checksum(self.store.location(hour)), stat.st_size, stat.st_mtime_ns
+
+    def refresh(self, granularity: str = 'daily') -> Dict[str, PandasDataFrame]:
+        """
+        Brings the saved aggregates of a granularity up to date with the hourly data.
+
+        Hours that are new to an aggregate are added to it, so refreshing after a new hour only reads that hour. An aggregate is only recomputed if one of its hours changed or disappeared, since the old counts of that hour are gone (see correct_hour to avoid this).
 
         Parameters
         ----------
-        also_save: bool
-            A flag to save the agglomerated data.
+        granularity: str (default='daily')
+            'daily', 'weekly' or 'monthly'.
 
         Returns
         -------
-        PandasDataFrame
-            Daily events count.
+        Dict(str, PandasDataFrame):
+            The aggregates that changed.
         """
-        unmerged = defaultdict(list)
-        pddframe = defaultdict(lambda: None)
-
-        for hourly_data in tqdm(self.data_path.joinpath('hourly').glob('*.csv'), desc='[+] Agglomerator: Gathering hourly Data.'):
-            fname = hourly_data.stem
-            try:
-                datetime_obj = datetime.strptime(fname, "%Y-%m-%d-%H")
-            except ValueError:  # This catches and ignores invalid dates.
+        known = self.ledger.signatures()
+        current = defaultdict(dict)
+        for hour in self.store.keys():
+            period = self._datetime_to_key(key2hour(hour), granularity)
+            current[period][hour] = self._signature(hour, known.get(hour))
+
+        recorded = self.ledger.inputs(granularity)
+        updated = dict()
+        for period in sorted(set(current) | set(recorded)):
+            inputs, before = current.get(period, {}), recorded.get(period, {})
+            if inputs == before:
                 continue
-            key = self._datetime_to_key(datetime_obj, granularity='daily')
-            if self.date_match is not None and self.date_match not in key:
+            if not inputs:
+                self._rollup_path(granularity, period).unlink(missing_ok=True)
+                self.ledger.forget(granularity, period)
                 continue
-            else:
-                dframe = pd.read_csv(hourly_data, index_col=0)
-                unmerged[key].append(dframe)
 
-        for day, df_collection in tqdm(unmerged.items(), desc="[+] Agglomerator: Aggregating hourly Data."):
-            coarser_df = df_collection[0]
-            for i, next_df in enumerate(df_collection[1:]):
-                coarser_df = coarser_df.add(next_df, fill_value=0)
+            coarser_df = self._read_rollup(granularity, period) if before else None
+            stale = [hour for hour, signature in before.items()
+                     if hour not in inputs or inputs[hour][0] != signature[0]]
+            if stale or (before and coarser_df is None):
+                logging.info(" AGGLOMERATE: Recomputing {} {} ({} changed hours)".format(
+                    granularity, period, len(stale)))
+                coarser_df, new_hours = None, list(inputs)
+            else:
+                new_hours = [hour for hour in inputs if hour not in before]
 
-            num_events = coarser_df.astype(bool).sum(axis=1)
-            total_events = coarser_df.sum(axis=1)
+            if new_hours:
+                frames = (self.store.read(hour) for hour in sorted(new_hours, key=key2hour))
+                if coarser_df is not None:
+                    frames = chain([coarser_df], frames)
+                coarser_df = sum_frames(frames)
+                updated[period] = self._save_rollup(granularity, period, coarser_df)
+            self.ledger.record(granularity, period, inputs)
 
-            coarser_df["TotalEvents"] = total_events
-            coarser_df["NumEvents"] = num_events
+        return updated
 
-            coarser_df = coarser_df.sort_values(by=['NumEvents', 'TotalEvents'], ascending=False)
+    def correct_hour(self, key: str, data_df: PandasDataFrame) -> None:
+        """
+        Saves new counts for an hour and adds the difference to the saved aggregates that contain it.
 
-            if also_save:
-                coarser_df.to_csv(root.joinpath(
-                    'data/daily/{}.csv'.format(day)), index_label="Repositories")
-            pddframe[day] = coarser_df
+        Parameters
+        ----------
+        key: str
+            Hour formatted as YYYY-MM-DD-H.
+        data_df: PandasDataFrame
+            The corrected counts, indexed by repository.
+        """
+        hourly_path = self.store.location(key)
+        old_df, old_checksum = None, None
+        if hourly_path.exists():
+            old_df, old_checksum = self.store.read(key), file_checksum(hourly_path)
+        self.store.write(key, data_df)
+        signature = self._signature(key)
+
+        for granularity in GRANULARITIES:
+            period = self._datetime_to_key(key2hour(key), granularity)
+            inputs = self.ledger.inputs(granularity, periods=[period]).get(period)
+            coarser_df = self._read_rollup(granularity, period)
+            if inputs is None or coarser_df is None:
+                continue  # Not rolled up yet.
+            if key not in inputs:
+                delta_df = data_df
+            elif inputs[key][0] == old_checksum:
+                delta_df = data_df.sub(old_df, fill_value=0)
+            else:
+                continue  # The aggregate is already stale. refresh recomputes it.
 
-        return pddframe
+            coarser_df = sum_frames([coarser_df, delta_df])
+            coarser_df = coarser_df.loc[(coarser_df != 0).any(axis=1)]
+            self._save_rollup(granularity, period, coarser_df)
+            inputs[key] = signature
+            self.ledger.record(granularity, period, inputs)
 
-    def hourly2weekly(self, also_save: bool = True) -> PandasDataFrame:
+    def rollup(self, granularities: Iterable = GRANULARITIES,
+               also_save: bool = True) -> Dict[str, Dict[str, PandasDataFrame]]:
         """
-        Agglomerates hourly to daily.
+        Agglomerates hourly data to daily, weekly, and monthly data in one pass.
+
+        Every hourly file is read once. Hours are summed into days, and days into ISO weeks and months, so coarser levels never touch the hourly data again.
 
         Parameters
         ----------
+        granularities: Iterable[str] (default=('daily', 'weekly', 'monthly'))
+            The granularities to build.
         also_save: bool
-            A flag to save the agglomerated data.
+            A flag to save the agglomerated data (and record its hours, see refresh).
 
         Returns
         -------
-        PandasDataFrame
-            Weekly events count.
-        """
-        unmerged = defaultdict(list)
-        pddframe = defaultdict(lambda: None)
+        Dict(str, Dict(str, PandasDataFrame))
+            Events count of every period of every granularity.
 
-        for hourly_data in self.data_path.joinpath('hourly').glob('*.csv'):
-            fname = hourly_data.stem
-            try:
-                datetime_obj = datetime.strptime(fname, "%Y-%m-%d-%H")
-            except ValueError:  # This catches and ignores invalid dates.
-                continue
-            key = self._datetime_to_key(datetime_obj, granularity='weekly')
-            if self.date_match is not None and datetime.strptime(
-                    datetime_obj, "%Y-%m") != datetime.strptime(
-                    self.date_match, "%Y-%m"):
-                continue
-            else:
-                dframe = pd.read_csv(hourly_data, index_col=0)
-                unmerged[key].append(dframe)
+        Notes
+        -----
+        + With a match string, only the matching hours are read. E.g., weeks that straddle the matched month are partial.
+        """
+        granularities = self._check_granularities(granularities)
+        return self._rollup_hours(self.store.keys(self.date_match), granularities, also_save)
 
-        for week, df_collection in unmerged.items():
-            logging.info(
-                " AGGLOMERATE: Processing hourly-to-week for {}".format(week))
-            coarser_df = df_collection[0]
-            for i, next_df in enumerate(df_collection[1:]):
-                coarser_df = coarser_df.add(next_df, fill_value=0)
+    @staticmethod
+    def _check_granularities(granularities: Iterable) -> List[str]:
+        granularities = [granularity.lower() for granularity in granularities]
+        for granularity in granularities:
+            assert granularity in GRANULARITIES, "Chosen granularity not 'daily', 'weekly', or 'montly'. Please choose from among these."
+        return granularities
+
+    def _rollup_hours(self, fnames: Iterable, granularities: List[str],
+                      also_save: bool = True, timings: Dict = None,
+                      progress: bool = True) -> Dict[str, Dict[str, PandasDataFrame]]:
+        """
+        The body of rollup for some hours. If timings is provided, the seconds it took to build every period are saved in timings[granularity][period].
+        """
+        hours_by_day = defaultdict(list)
+        for fname in fnames:
+            hours_by_day[self._datetime_to_key(key2hour(fname), 'daily')].append(fname)
 
-            num_events = coarser_df.astype(bool).sum(axis=1)
-            total_events = coarser_df.sum(axis=1)
+        known = self.ledger.signatures() if also_save else {}
+        rollups = {granularity: defaultdict(lambda: None) for granularity in granularities}
 
-            coarser_df["TotalEvents"] = total_events
-            coarser_df["NumEvents"] = num_events
+        def _emit(granularity, period, coarser_df, hours, started):
+            if also_save:
+                rollups[granularity][period] = self._save_rollup(
+                    granularity, period, coarser_df)
+                self.ledger.record(granularity, period, {
+                    hour: self._signature(hour, known.get(hour)) for hour in hours})
+            else:
+                rollups[granularity][period] = self._finalize(coarser_df)
+            if timings is not None:
+                timings.setdefault(granularity, {})[period] = time.perf_counter() - started
+
+        # The days of a week or month are contiguous, so each one is emitted as soon as the next one starts.
+        coarser = [granularity for granularity in ('weekly', 'monthly')
+                   if granularity in granularities]
+        open_periods = {granularity: (None, [], [], None) for granularity in coarser}
+        for day in tqdm(sorted(hours_by_day), desc='[+] Agglomerator: Aggregating hourly Data.',
+                        disable=not progress):
+            started = time.perf_counter()
+            hours = sorted(hours_by_day[day], key=key2hour)
+            daily_df = sum_frames(self.store.read(fname) for fname in hours)
+            if 'daily' in granularities:
+                _emit('daily', day, daily_df, hours, started)
+
+            timestamp = datetime.strptime(day, "%Y-%m-%d")
+            for granularity in coarser:
+                period = self._datetime_to_key(timestamp, granularity)
+                open_period, daily_dfs, period_hours, opened = open_periods[granularity]
+                if period != open_period:
+                    if daily_dfs:
+                        _emit(granularity, open_period, sum_frames(daily_dfs), period_hours, opened)
+                    open_period, daily_dfs, period_hours, opened = period, [], [], started
+                    open_periods[granularity] = open_period, daily_dfs, period_hours, opened
+                daily_dfs.append(daily_df)
+                period_hours.extend(hours)
+
+        for granularity, (open_period, daily_dfs, period_hours, opened) in open_periods.items():
+            if daily_dfs:
+                _emit(granularity, open_period, sum_frames(daily_dfs), period_hours, opened)
+
+        return rollups
+
+    def _rollup_week(self, week: str, days: List[str]) -> float:
+        """
+        Builds a saved weekly aggregate from the saved daily aggregates of its days.
 
-            coarser_df.sort_values(
-                by=['NumEvents', 'TotalEvents'], ascending=False, inplace=True)
+        Returns
+        -------
+        float:
+            The seconds it took.
+        """
+        started = time.perf_counter()
+        daily_inputs = self.ledger.inputs('daily', periods=days)
+        self._save_rollup('weekly', week, sum_frames(
+            self._read_rollup('daily', day) for day in days))
+        inputs = dict()
+        for day in days:
+            inputs.update(daily_inputs[day])
+        self.ledger.record('weekly', week, inputs)
+        return time.perf_counter() - started
+
+    def parallel_rollup(self, granularities: Iterable = GRANULARITIES,
+                        num_workers: int = None,
+                        worker_memory: int = WORKER_MEMORY) -> Dict[str, Dict[str, float]]:
+        """
+        Builds and saves the aggregates of rollup with a pool of worker processes.
 
-            if also_save:
-                coarser_df.to_csv(root.joinpath(
-                    'data/weekly/{}.csv'.format(week)), index_label="Repositories")
+        Work is partitioned by month: a worker reads the hours of a month once and saves its daily and monthly aggregates itself. ISO weeks can straddle months, so they are then summed from the saved daily aggregates, a week per task. Workers send back timings only, never DataFrames.
 
-            pddframe[week] = coarser_df
+        Parameters
+        ----------
+        granularities: Iterable[str] (default=('daily', 'weekly', 'monthly'))
+            The granularities to build. Weekly aggregates need the daily ones, so those are saved too.
+        num_workers: int (optional)
+            Number of worker processes. By default, one per usable core that the available memory can hold (see pool_size).
+        worker_memory: int (default=WORKER_MEMORY)
+            Memory a worker needs to roll up a month, in bytes. Only used to size the pool.
 
-        return pddframe
+        Returns
+        -------
+        Dict(str, Dict(str, float))
+            The seconds it took to build every period of every granularity.
+        """
+        granularities = self._check_granularities(granularities)
+        num_workers = num_workers or pool_size(worker_memory)
+        by_month = [granularity for granularity in ('daily', 'monthly')
+                    if granularity in granularities or
+                    (granularity == 'daily' and 'weekly' in granularities)]
+
+        hours_by_month = defaultdict(list)
+        days_by_week = defaultdict(set)
+        for fname in self.store.keys(self.date_match):
+            timestamp = key2hour(fname)
+            hours_by_month[self._datetime_to_key(timestamp, 'monthly')].append(fname)
+            days_by_week[self._datetime_to_key(timestamp, 'weekly')].add(
+                self._datetime_to_key(timestamp, 'daily'))
+        logging.info(" AGGLOMERATE: Rolling up {} months with {} workers".format(
+            len(hours_by_month), num_workers))
+
+        timings = {granularity: dict() for granularity in granularities}
+
+        def _report(task_timings):
+            for granularity, periods in task_timings.items():
+                for period, seconds in sorted(periods.items()):
+                    if granularity in timings:
+                        timings[granularity][period] = seconds
+                        logging.info(" AGGLOMERATE: {} {} took {:.2f}s".format(
+                            granularity, period, seconds))
+
+        # Workers are spawned rather than forked, like HourlyPipeline's.
+        with ProcessPoolExecutor(max_workers=num_workers,
+                                 mp_context=get_context('spawn')) as executor:
+            futures = [executor.submit(_rollup_task, self, hours, by_month)
+                       for hours in hours_by_month.values()]
+            for future in as_completed(futures):
+                _report(future.result())
+
+            if 'weekly' in granularities:
+                futures = {executor.submit(_rollup_week_task, self, week, sorted(days)): week
+                           for week, days in days_by_week.items()}
+                for future in as_completed(futures):
+                    _report({'weekly': {futures[future]: future.result()}})
+
+        return timings
 
-    def hourly2monthly(self, also_save: bool = True) -> PandasDataFrame:
+    def hourly2daily(self, also_save: bool = True) -> PandasDataFrame:
         """
-        Agglomerates hourly to daily.
+        Agglomerates hourly to daily (see rollup).
 
         Parameters
         ----------
@@ -196,66 +435,131 @@ class Agglomerate:
         Returns
         -------
         PandasDataFrame
-            Monthly events count.
+            Daily events count.
         """
-        unmerged = defaultdict(list)
-        pddframe = defaultdict(lambda: None)
-
-        for hourly_data in self.data_path.joinpath('hourly').glob('*.csv'):
-            fname = hourly_data.stem
-            try:
-                datetime_obj = datetime.strptime(fname, "%Y-%m-%d-%H")
-            except ValueError:  # This catches and ignores invalid date ranges.
-                continue
-            key = self._datetime_to_key(datetime_obj, granularity='monthly')
-            if self.date_match is not None and key != self.date_match:
-                continue
-            else:
-                dframe = pd.read_csv(hourly_data, index_col=0)
-                unmerged[key].append(dframe)
+        return self.rollup(('daily',), also_save)['daily']
 
-        for month, df_collection in unmerged.items():
-            logging.info(
-                " AGGLOMERATE: Processing hourly-to-monthy for {}".format(month))
-            coarser_df = df_collection[0]
-            for i, next_df in enumerate(df_collection[1:]):
-                coarser_df = coarser_df.add(next_df, fill_value=0)
+    def hourly2weekly(self, also_save: bool = True) -> PandasDataFrame:
+        """
+        Agglomerates hourly to ISO weekly (see rollup).
 
-            num_events = coarser_df.astype(bool).sum(axis=1)
-            total_events = coarser_df.sum(axis=1)
+        Parameters
+        ----------
+        also_save: bool
+            A flag to save the agglomerated data.
 
-            coarser_df["TotalEvents"] = total_events
-            coarser_df["NumEvents"] = num_events
+        Returns
+        -------
+        PandasDataFrame
+            Weekly events count.
+        """
+        return self.rollup(('weekly',), also_save)['weekly']
 
-            coarser_df.sort_values(
-                by=['NumEvents', 'TotalEvents'], ascending=False, inplace=True)
+    def hourly2monthly(self, also_save: bool = True) -> PandasDataFrame:
+        """
+        Agglomerates hourly to monthly (see rollup).
 
-            if also_save:
-                coarser_df.to_csv(root.joinpath(
-                    'data/monthly/{}.csv'.format(month)), index_label="Repositories")
-            pddframe[month] = coarser_df
+        Parameters
+        ----------
+        also_save: bool
+            A flag to save the agglomerated data.
 
-        return pddframe
+        Returns
+        -------
+        PandasDataFrame
+            Monthly events count.
+        """
+        return self.rollup(('monthly',), also_save)['monthly']
 
-    def alltime(self):
+    def _iter_scores(self, granularity: str, column: str, start: str = None,
+                     end: str = None) -> Iterator[PandasSeries]:
         """
-        Agglomerate all time top repos.
+        Streams one column of the saved aggregates of a granularity, from start to end (inclusive).
         """
-        # unmerged = defaultdict(list)
-        # pddframe = defaultdict(lambda: None)
+        for rollup_path in sorted(self.data_path.joinpath(granularity).glob('*.csv')):
+            period = rollup_path.stem
+            if (start is not None and period < start) or (end is not None and period > end):
+                continue
+            scores = pd.read_csv(rollup_path, index_col=0,
+                                 usecols=lambda name: name in ('Repositories', column))
+            if column in scores.columns:
+                yield scores[column]
+
+    def top_repos(self, K: int = 10000, column: str = 'TotalEvents',
+                  granularity: str = 'monthly', start: str = None, end: str = None,
+                  capacity: int = None, also_save: bool = True) -> PandasDataFrame:
+        """
+        Ranks repositories over a range of saved aggregates, reading one column at a time.
 
-        for i, monthly_data in enumerate(self.data_path.joinpath('monthly').glob('*.csv')):
-            monthly = pd.read_csv(monthly_data, index_col=0)
-            monthly = monthly.iloc[:1000000]
-            monthly.drop([
-                'CommitCommentEvent', 'ForkEvent', 'IssuesEvent', 'PullRequestEvent', 'PullRequestReviewCommentEvent', 'PushEvent'], axis=1, inplace=True)
+        Parameters
+        ----------
+        K: int (default=10000)
+            Number of repositories to keep.
+        column: str (default='TotalEvents')
+            Column to rank by, e.g., 'NumEvents' or an event type.
+        granularity: str (default='monthly')
+            Aggregates to read.
+        start: str (optional)
+            First period, e.g., '2020-01' (monthly), '2020-W02' (weekly) or '2020-01-06' (daily).
+        end: str (optional)
+            Last period (inclusive).
+        capacity: int (optional)
+            If provided, rank approximately with this many counters (see SpaceSavingRanking). Otherwise, rank exactly (see ExactRanking).
+        also_save: bool
+            A flag to save the ranking to {data_path}/active_repos.csv, most active repository last (as MetricsGetter.set_top_K_repos expects).
 
-            if i == 0:
-                ranking = monthly
-            else:
-                ranking = ranking.add(monthly, fill_value=0)
+        Returns
+        -------
+        PandasDataFrame
+            The top K repositories, most active first.
+        """
+        if capacity is None:
+            ranking = ExactRanking(column)
+        else:
+            ranking = SpaceSavingRanking(column, capacity)
+        for scores in self._iter_scores(granularity, column, start, end):
+            ranking.update(scores)
+
+        top_df = ranking.top(K)
+        if also_save:
+            top_df.iloc[::-1].to_csv(self.data_path.joinpath('active_repos.csv'),
+                                     index_label='Repository')
+        return top_df
+
+    def alltime(self) -> PandasDataFrame:
+        """
+        Agglomerate all time top repos.
 
-        set_trace()
+        Returns
+        -------
+        PandasDataFrame
+            The sum of the saved monthly data (top million repositories of every month), with TotalEvents and NumEvents recomputed from the summed counts.
+        """
+        def _monthly():
+            for monthly_data in self.data_path.joinpath('monthly').glob('*.csv'):
+                monthly = pd.read_csv(monthly_data, index_col=0)
+                monthly = monthly.iloc[:1000000]
+                # Derived columns don't add up across months (see _finalize).
+                yield monthly.drop(columns=[column for column in DERIVED_COLUMNS
+                                            if column in monthly.columns])
+
+        alltime_df = self._finalize(sum_frames(_monthly()))
+        return alltime_df.drop([
+            'CommitCommentEvent', 'ForkEvent', 'IssuesEvent', 'PullRequestEvent', 'PullRequestReviewCommentEvent', 'PushEvent'], axis=1, errors='ignore')
+
+
+def _rollup_task(agglomerate: Agglomerate, fnames: List[str],
+                 granularities: List[str]) -> Dict[str, Dict[str, float]]:
+    """
+    Unit of work of parallel_rollup: rolls up some hours and saves the aggregates from the worker.
+    """
+    timings = dict()
+    agglomerate._rollup_hours(fnames, granularities, timings=timings, progress=False)
+    return timings
+
+
+def _rollup_week_task(agglomerate: Agglomerate, week: str, days: List[str]) -> float:
+    return agglomerate._rollup_week(week, days)
 
 
 if __name__ == "__main__":
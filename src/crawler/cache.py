@@ -0,0 +1,214 @@
+import os
+import sys
+import gzip
+import logging
+from threading import Lock
+from pathlib import Path, PosixPath
+from typing import Dict, Union, NewType
+
+# Logging Config
+logging.basicConfig(format='[+] %(message)s', level=logging.INFO)
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+# Common types used here.
+PathType = NewType('Path', PosixPath)
+
+GZIP_MAGIC = b'\x1f\x8b'
+# A gzip member has a 10 byte header and an 8 byte trailer (CRC32 + ISIZE).
+GZIP_MIN_SIZE = 18
+
+
+class ArchiveCache:
+    def __init__(self, cache_path: PathType = root.joinpath('data', 'cache'),
+                 max_bytes: int = 50 * 1024 ** 3,
+                 offline: bool = False):
+        """
+        An on-disk cache of GH Archive .json.gz files keyed by archive hour.
+
+        Parameters
+        ----------
+        cache_path: PathType (default: {root}/data/cache)
+            Directory that holds the cached archives.
+        max_bytes: int (default=50 GiB)
+            Size cap of the cache. The least recently used archives are evicted once it is exceeded.
+        offline: bool (default=False)
+            If True, archives are only ever read from the cache and nothing is downloaded.
+
+        Notes
+        -----
+        + Archives are downloaded straight to path(key) by Downloader, which only renames them into place once their size and gzip trailer (CRC32 and size) have been verified, so a crash mid-download never leaves a truncated archive in the cache. They are then handed over with admit.
+        + Reading an archive refreshes its modification time, which is what the LRU eviction orders by.
+        + The total size of the cache is tracked as archives are admitted and dropped, so the directory is only listed when something has to be evicted.
+        """
+        self.cache_path = Path(cache_path)
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._total = self.size()
+
+    def __getstate__(self) -> Dict:
+        # Locks can't be pickled (e.g., when a Crawler is sent to worker processes).
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def path(self, key: str) -> PathType:
+        """
+        Where an archive hour is (or would be) cached.
+        """
+        return self.cache_path.joinpath(key + '.json.gz')
+
+    @staticmethod
+    def is_intact(archive: PathType, verify: bool = False) -> bool:
+        """
+        Checks if an archive on disk looks like a complete gzip file.
+
+        Parameters
+        ----------
+        archive: PathType
+            Path to the .json.gz file.
+        verify: bool (default=False)
+            If True, decompress the whole file so that the CRC32 and size recorded in the gzip trailer are checked too.
+
+        Returns
+        -------
+        bool:
+            True if the archive is intact. False otherwise.
+        """
+        try:
+            if archive.stat().st_size < GZIP_MIN_SIZE:
+                return False
+            with open(archive, 'rb') as archive_file:
+                if archive_file.read(2) != GZIP_MAGIC:
+                    return False
+            if verify:
+                with gzip.open(archive, 'rb') as json_bytes:
+                    while json_bytes.read(1024 ** 2):
+                        pass
+        except (OSError, EOFError):
+            return False
+        return True
+
+    def get(self, key: str, expected_size: int = None) -> Union[PathType, None]:
+        """
+        Look up an archive hour.
+
+        Parameters
+        ----------
+        key: str
+            The archive hour formatted as YYYY-MM-DD-H.
+        expected_size: int (optional)
+            The size of the archive in bytes, if known (e.g., the 'bytes' CrawlManifest recorded when the hour was crawled).
+
+        Returns
+        -------
+        PathType or None:
+            Path to the cached archive, or None if it isn't (intact) in the cache.
+        """
+        archive = self.path(key)
+        try:
+            size = archive.stat().st_size
+        except FileNotFoundError:
+            return None
+        if (expected_size is not None and size != int(expected_size)) or \
+                not self.is_intact(archive):
+            logging.info(" Cache: Dropping damaged archive {}".format(archive.name))
+            self._drop(archive, size)
+            return None
+        os.utime(archive)
+        return archive
+
+    def admit(self, archive: PathType) -> PathType:
+        """
+        Accounts for an archive that was just saved at path(key) and evicts the least recently used ones if the cache is over max_bytes.
+
+        Returns
+        -------
+        PathType:
+            The archive.
+        """
+        size = archive.stat().st_size
+        with self._lock:
+            self._total += size
+        self.evict(keep=archive)
+        return archive
+
+    def discard(self, key: str) -> None:
+        """
+        Drops an archive hour that turned out to be unreadable (e.g., truncated by another tool), so that it is downloaded again next time.
+
+        Parameters
+        ----------
+        key: str
+            The archive hour formatted as YYYY-MM-DD-H.
+        """
+        archive = self.path(key)
+        try:
+            size = archive.stat().st_size
+        except FileNotFoundError:
+            return
+        logging.info(" Cache: Dropping unreadable archive {}".format(archive.name))
+        self._drop(archive, size)
+
+    def _drop(self, archive: PathType, size: int) -> None:
+        try:
+            archive.unlink()
+        except FileNotFoundError:  # Dropped by another thread.
+            return
+        with self._lock:
+            self._total -= size
+
+    def size(self) -> int:
+        """
+        Returns
+        -------
+        int:
+            Total size of the cached archives in bytes.
+        """
+        return sum(archive.stat().st_size for archive in self.cache_path.glob('*.json.gz'))
+
+    def evict(self, keep: PathType = None) -> None:
+        """
+        Delete the least recently used archives until the cache is within max_bytes.
+
+        Parameters
+        ----------
+        keep: PathType (optional)
+            An archive that must not be evicted (e.g., the one that was just added).
+        """
+        with self._lock:
+            if self._total <= self.max_bytes:
+                return
+            # Other processes may share the cache, so the directory is the source of truth here.
+            archives = []
+            for archive in self.cache_path.glob('*.json.gz'):
+                try:
+                    stat = archive.stat()
+                except FileNotFoundError:  # Evicted by another process.
+                    continue
+                archives.append((stat.st_mtime, stat.st_size, archive))
+
+            total = sum(size for _, size, _ in archives)
+            for _, size, archive in sorted(archives, key=lambda a: a[0]):
+                if total <= self.max_bytes:
+                    break
+                if archive == keep:
+                    continue
+                try:
+                    archive.unlink()
+                except FileNotFoundError:
+                    pass
+                total -= size
+                logging.info(" Cache: Evicted {}".format(archive.name))
+            self._total = total
@@ -0,0 +1,373 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+from array import array
+from scipy import sparse
+from pathlib import Path, PosixPath
+from itertools import islice
+from typing import Dict, Iterable, List, Tuple, NewType
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from utils import iter_events, EventPrefilter, get_json_loads, MemoryMonitor
+
+# Common types used here.
+PathType = NewType('Path', PosixPath)
+PandasDataFrame = NewType('PandasDataFrame', pd.core.frame.DataFrame)
+
+# Number of buffered increments after which they are folded into the sparse matrix.
+COMPACT_EVERY = 1 << 20
+# Number of events between two memory samples (see count_events).
+SAMPLE_EVERY = 1 << 16
+# Number of frames summed at once (see sum_frames).
+SUM_CHUNK_SIZE = 32
+
+
+class Interner:
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Maps names (e.g., repositories or event types) to consecutive integer IDs.
+
+        Parameters
+        ----------
+        names: Iterable[str] (optional)
+            Names to intern up front.
+        """
+        self.ids = dict()
+        self.names = []
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name: str) -> int:
+        """
+        Returns
+        -------
+        int:
+            The ID of the name. New names get the next free ID.
+        """
+        name_id = self.ids.get(name)
+        if name_id is None:
+            name_id = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def intern_all(self, names: Iterable[str]) -> np.ndarray:
+        """
+        Returns
+        -------
+        np.ndarray:
+            The IDs of the names (see intern).
+        """
+        ids, intern = self.ids, self.intern
+        return np.array([ids[name] if name in ids else intern(name) for name in names],
+                        dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+class HourlyCounts:
+    def __init__(self, track_actors: bool = False):
+        """
+        Compact event counts: a repository x event type sparse matrix of integers.
+
+        Parameters
+        ----------
+        track_actors: bool (default=False)
+            If True, the distinct actors of the counted events are kept too (see actors), for distinct-count sketches. Otherwise actors is None.
+
+        Notes
+        -----
+        + Repository names and event types are interned to integer IDs. Increments are buffered as (repository, event type, count) triplets and periodically summed into a scipy.sparse CSR matrix, so memory depends on the number of non-zero counts rather than on repositories x event types.
+        + Merging hours is a sparse add (see merge).
+        + Conversion to a DataFrame only happens at the edge (see to_dataframe).
+        """
+        self.repos = Interner()
+        self.event_types = Interner()
+        self.actors = set() if track_actors else None
+        self._rows = array('q')
+        self._cols = array('q')
+        self._vals = array('q')
+        self._matrix = sparse.csr_matrix((0, 0), dtype=np.int64)
+
+    def add(self, event_type: str, repo_name: str, incr: int = 1) -> None:
+        """
+        Increments the count of an event type for a repository.
+        """
+        self._rows.append(self.repos.intern(repo_name))
+        self._cols.append(self.event_types.intern(event_type))
+        self._vals.append(incr)
+        if len(self._vals) >= COMPACT_EVERY:
+            self._compact()
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.repos), len(self.event_types)
+
+    def _compact(self) -> None:
+        self._matrix.resize(self.shape)
+        if len(self._vals):
+            buffered = sparse.coo_matrix(
+                (np.frombuffer(self._vals, dtype=np.int64),
+                 (np.frombuffer(self._rows, dtype=np.int64),
+                  np.frombuffer(self._cols, dtype=np.int64))),
+                shape=self.shape, dtype=np.int64)
+            self._matrix = (self._matrix + buffered.tocsr()).tocsr()
+            self._rows, self._cols, self._vals = array('q'), array('q'), array('q')
+
+    @property
+    def matrix(self) -> sparse.csr_matrix:
+        """
+        Returns
+        -------
+        sparse.csr_matrix:
+            Counts with a row per repository (see repos) and a column per event type (see event_types).
+        """
+        self._compact()
+        return self._matrix
+
+    def merge(self, other: 'HourlyCounts') -> 'HourlyCounts':
+        """
+        Adds the counts of another hour (in place).
+
+        Parameters
+        ----------
+        other: HourlyCounts
+            The counts to add. Its repositories and event types are mapped onto ours.
+
+        Returns
+        -------
+        HourlyCounts:
+            self
+        """
+        other_matrix = other.matrix.tocoo()
+        repo_ids = self.repos.intern_all(other.repos.names)
+        event_ids = self.event_types.intern_all(other.event_types.names)
+        self._compact()
+        if other_matrix.nnz:
+            remapped = sparse.coo_matrix(
+                (other_matrix.data,
+                 (repo_ids[other_matrix.row], event_ids[other_matrix.col])),
+                shape=self.shape, dtype=np.int64)
+            self._matrix = (self._matrix + remapped.tocsr()).tocsr()
+        if self.actors is not None and other.actors is not None:
+            self.actors |= other.actors
+        return self
+
+    def to_dataframe(self) -> PandasDataFrame:
+        """
+        Returns
+        -------
+        PandasDataFrame:
+            Integer counts indexed by repository with a column per event type.
+        """
+        return pd.DataFrame(self.matrix.toarray(), index=self.repos.names,
+                            columns=self.event_types.names)
+
+    @classmethod
+    def from_dataframe(cls, data_df: PandasDataFrame) -> 'HourlyCounts':
+        """
+        Builds the counts from a DataFrame indexed by repository (e.g., a saved hour).
+        """
+        counts = cls()
+        counts.repos = Interner(data_df.index)
+        counts.event_types = Interner(data_df.columns)
+        counts._matrix = sparse.csr_matrix(
+            data_df.fillna(0).to_numpy(dtype=np.int64))
+        return counts
+
+    def __len__(self) -> int:
+        return len(self.repos)
+
+    def __getstate__(self) -> Dict:
+        # Only ship the compacted matrix (e.g., from a worker process).
+        self._compact()
+        return self.__dict__.copy()
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+
+
+def count_event(mined_data_dict: HourlyCounts, event: Dict) -> None:
+    """
+    Adds one event to the counts of its repository.
+
+    Parameters
+    ----------
+    mined_data_dict: HourlyCounts
+        The counts to update.
+    event: Dict
+        JSON dictionary of the event.
+    """
+    event_name = event['type']
+    repo_name = event['repo']['name']
+    if mined_data_dict.actors is not None:
+        actor = event.get('actor')
+        if actor:
+            mined_data_dict.actors.add(actor['login'])
+
+    if event_name == "IssuesEvent":
+        payload = event['payload']
+        action = payload['action']
+        if action == 'opened' or action == 'reopened':
+            # New Issue has been opened
+            event_type = 'IssueCreated'
+        elif action == 'closed':
+            # New Issue has been opened
+            event_type = 'IssueClosed'
+        else:
+            event_type = 'OtherIssueEvent'
+        mined_data_dict.add(event_type, repo_name)
+
+    elif event_name == "PullRequestEvent":
+        payload = event['payload']
+        action = payload['action']
+        pull_request = payload['pull_request']
+        if action == 'opened':
+            # New Pull Request has been opened
+            event_type = 'PullRequestOpened'
+        if action == 'closed':
+            # New Pull Request has been opened
+            event_type = 'PullRequestClosed'
+        if action == 'closed' and pull_request['merged']:
+            # New Pull Request has been merged
+            event_type = 'PullRequestMerged'
+        if action == 'closed' and not pull_request['merged']:
+            # New Pull Request has been rejected
+            event_type = 'PullRequestRejected'
+        else:
+            event_type = 'OtherPullRequestEvent'
+        mined_data_dict.add(event_type, repo_name)
+
+    elif event_name == "PushEvent":
+        payload = event['payload']
+        num_distinct_commits = payload['distinct_size']
+        event_type = 'CommitEvent'
+        mined_data_dict.add(event_type, repo_name, num_distinct_commits)
+
+    else:
+        event_type = event_name
+        mined_data_dict.add(event_type, repo_name)
+
+
+def count_events(all_events: Iterable[Dict], monitor: MemoryMonitor = None,
+                 track_actors: bool = False) -> HourlyCounts:
+    """
+    Counts the events of every repository.
+
+    Events are counted as they stream in, so none of them is kept around.
+
+    Parameters
+    ----------
+    all_events: Iterable[Dict]
+        JSON dictionaries of the events (e.g., one hour of GH Archive).
+    monitor: MemoryMonitor (optional)
+        If provided, memory is sampled every SAMPLE_EVERY events. Above its ceiling, buffered increments are folded into the sparse matrix right away.
+    track_actors: bool (default=False)
+        If True, the distinct actors are collected too (see HourlyCounts).
+
+    Returns
+    -------
+    HourlyCounts:
+        Sparse counts of every event type for every repository.
+    """
+    mined_data_dict = HourlyCounts(track_actors)
+    for num_events, event in enumerate(all_events, 1):
+        count_event(mined_data_dict, event)
+        if monitor is not None and num_events % SAMPLE_EVERY == 0:
+            if monitor.over_limit():
+                mined_data_dict._compact()
+
+    if monitor is not None:
+        monitor.sample()
+    return mined_data_dict
+
+
+def _groupby_sum(frames: List[PandasDataFrame]) -> PandasDataFrame:
+    return pd.concat(frames).groupby(level=0, sort=False).sum()
+
+
+def sum_frames(frames: Iterable[PandasDataFrame],
+               chunk_size: int = SUM_CHUNK_SIZE) -> PandasDataFrame:
+    """
+    Sums count frames indexed by repository with a tree reduction.
+
+    Frames are read chunk_size at a time and each chunk is summed with a single concat and groupby. Partial sums of equal depth are then merged pairwise, so every count is realigned a logarithmic number of times (instead of once per frame, as with chained DataFrame.add) and at most one chunk plus a partial sum per level is held in memory.
+
+    Parameters
+    ----------
+    frames: Iterable[PandasDataFrame]
+        Counts indexed by repository with a column per event type (e.g., the hours of a month). Missing counts are zeros.
+    chunk_size: int (default=SUM_CHUNK_SIZE)
+        Number of frames summed at once.
+
+    Returns
+    -------
+    PandasDataFrame:
+        Integer counts of every repository in any frame, with a column per event type in any frame.
+    """
+    partials = []  # (depth, partial sum), deepest first.
+    frames = iter(frames)
+    while True:
+        chunk = list(islice(frames, chunk_size))
+        if not chunk:
+            break
+        depth, partial = 0, _groupby_sum(chunk)
+        while partials and partials[-1][0] == depth:
+            partial = _groupby_sum([partials.pop()[1], partial])
+            depth += 1
+        partials.append((depth, partial))
+
+    if not partials:
+        return pd.DataFrame(dtype=np.int64)
+    return _groupby_sum([partial for _, partial in partials]).fillna(0).astype(np.int64)
+
+
+def count_archive(archive_path: PathType, event_set: set, json_backend: str = 'auto',
+                  memory_limit: int = None, track_actors: bool = False) -> Tuple[HourlyCounts, Dict]:
+    """
+    Decompresses, parses, and counts one GH Archive hour saved on disk.
+
+    This is the unit of work of the worker processes, so it only takes and returns small, picklable values.
+
+    Parameters
+    ----------
+    archive_path: PathType
+        Path to the .json.gz file.
+    event_set: set
+        Event types to count.
+    json_backend: str (default='auto')
+        JSON decoder to use (see get_json_loads).
+    memory_limit: int (optional)
+        Memory ceiling of the worker in bytes (see count_events).
+    track_actors: bool (default=False)
+        If True, the distinct actors are collected and sent back too (see HourlyCounts).
+
+    Returns
+    -------
+    Tuple(HourlyCounts, Dict):
+        The counts of the hour and its stats ('bytes', 'events', and the 'peak_rss' of the worker).
+    """
+    _, loads = get_json_loads(json_backend)
+    prefilter = EventPrefilter(event_set)
+    stats = {'events': 0}
+
+    def _events(archive_file):
+        for data in iter_events(archive_file, prefilter, loads):
+            if data['type'] in event_set:
+                stats['events'] += 1
+                yield data
+
+    monitor = MemoryMonitor(memory_limit)
+    with open(archive_path, 'rb') as archive_file:
+        counts = count_events(_events(archive_file), monitor, track_actors)
+        stats['bytes'] = archive_file.tell()
+    stats['peak_rss'] = monitor.peak
+
+    return counts, stats
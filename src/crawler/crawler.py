@@ -1,19 +1,24 @@
 import os
 import sys
 import json
-import gzip
 import certifi
 import logging
 import requests
 import pandas as pd
+from copy import copy
 from tqdm import tqdm
-from io import BytesIO
 from ipdb import set_trace
-from itertools import product
 from urllib3 import PoolManager
+from urllib3.exceptions import HTTPError
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from collections import defaultdict
 from pathlib import Path, PosixPath
-from typing import Dict, Tuple, List, Union, NewType
+from datetime import datetime
+from threading import Lock
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory
+from typing import Dict, Tuple, List, Union, NewType, Iterator, BinaryIO, Callable
 
 # Logging Config
 logging.basicConfig(format='[+] %(message)s', level=logging.INFO)
@@ -25,6 +30,16 @@ root = Path(os.path.abspath(os.path.join(
 if root.joinpath('src') not in sys.path:
     sys.path.append(str(root.joinpath('src')))
 
+from utils import iter_events, EventPrefilter, get_json_loads, MemoryMonitor, MIB
+from utils import hour_range, daterange2hours, shard_range, shard_hours, hour2url, to_hour
+from .cache import ArchiveCache
+from .downloader import Downloader
+from .storage import CSVStore, ParquetStore
+from .manifest import CrawlManifest, file_checksum
+from .counts import count_events
+from .sketches import SketchStore
+from .pipeline import HourlyPipeline
+
 # Common types used here.
 URL = NewType('URL', str)
 DateRange = Tuple[int, int]
@@ -41,7 +56,19 @@ class Crawler:
                  event_set: set = {'PushEvent', 'ForkEvent', 'StarEvent', 'IssuesEvent',
                                    'PullRequestEvent', 'IssuesCommentEvent',
                                    'CommitCommentEvent', 'PullRequestReviewEvent',
-                                   'PullRequestReviewCommentEvent'}):
+                                   'PullRequestReviewCommentEvent'},
+                 max_workers: int = 4,
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 ordered: bool = True,
+                 cache: ArchiveCache = None,
+                 json_backend: str = 'auto',
+                 manifest: CrawlManifest = None,
+                 start: Union[datetime, str] = None,
+                 end: Union[datetime, str] = None,
+                 num_processes: int = 0,
+                 memory_limit: int = None,
+                 sketches: SketchStore = None):
         """
         A crawler for GH Archive (https://www.gharchive.org/).
 
@@ -59,6 +86,30 @@ class Crawler:
             Yearly data as a tuple of start and end values.
         event_set: set
             A set of events to filter repositories by.
+        max_workers: int (default=4)
+            Maximum number of hourly archives downloaded concurrently. Use 1 to crawl serially.
+        retries: int (default=3)
+            Number of times a failed download is retried. Retries resume where the transfer stopped (see Downloader).
+        backoff: float (default=0.5)
+            Backoff factor (in seconds) between retries. The n-th retry waits a random time between 0 and backoff * 2^(n-1) seconds.
+        ordered: bool (default=True)
+            If True, hours are handed to the parser in chronological order. Otherwise, they are handed over as soon as they finish.
+        cache: ArchiveCache (optional)
+            A local cache of the downloaded archives. Without one, every run downloads the archives again.
+        json_backend: str (default='auto')
+            JSON decoder to parse events with: 'orjson', 'simdjson' or 'json'. With 'auto', the fastest installed one is used.
+        manifest: CrawlManifest (optional)
+            A record of the finished hours. If provided, save_events skips the hours that are already done and retries the ones that failed.
+        start: datetime or str (optional)
+            First hour of a continuous time range, e.g., '2020-03-14 18:00'. Overrides hour, date, month, and year.
+        end: datetime or str (optional)
+            Last hour (inclusive) of the time range, e.g., '2020-04-02 06:00'.
+        num_processes: int (default=0)
+            If positive, hours are downloaded by max_workers I/O threads and decompressed, parsed, and counted by this many worker processes (see HourlyPipeline). Hours are then handed over as they finish, regardless of ordered.
+        memory_limit: int (optional)
+            Memory ceiling in bytes, e.g., 2 * 1024 ** 3. Above it, no new hour is started until one finishes, and buffered counts are compacted early. The peak RSS of every hour is logged either way.
+        sketches: SketchStore (optional)
+            If provided, save_events also saves distinct-count sketches of the repositories and actors of every hour.
 
         Notes
         -----
@@ -67,6 +118,10 @@ class Crawler:
 
         + For ranges provide a tuple of start and end values
         E.g., for first half of 2019 provide: hour=(0, 23), date=(1, 31), month=(1, 6), year=2019.
+        Dates that don't exist (e.g., Feb 30) are skipped.
+
+        + For a continuous range of hours provide start and end timestamps
+        E.g., start='2020-03-14 18:00', end='2020-04-02 06:00'.
 
         + Events of interest:
             - Push
@@ -84,6 +139,75 @@ class Crawler:
         self.hour = hour
         self.month = month
         self.event_set = event_set
+        self.start = None
+        self.end = None
+        self.timestamps = None
+        if start is not None:
+            self.set_time_range(start, end)
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.ordered = ordered
+        self.cache = cache
+        self.manifest = manifest
+        self.num_processes = num_processes
+        self.memory_limit = memory_limit
+        self.sketches = sketches
+        self.json_backend, self._loads = get_json_loads(json_backend)
+        logging.info(" Crawler: Decoding JSON with {}".format(self.json_backend))
+        self._https_lock = Lock()
+        self._https = None
+        self._downloader = None
+
+    def __getstate__(self) -> Dict:
+        # The connection pool and its lock can't be pickled (e.g., by pathos). Workers build their own.
+        state = self.__dict__.copy()
+        del state['_https_lock']
+        state['_https'] = None
+        state['_downloader'] = None
+        return state
+
+    def __setstate__(self, state: Dict) -> None:
+        self.__dict__.update(state)
+        self._https_lock = Lock()
+
+    @property
+    def https(self) -> PoolManager:
+        """
+        A long-lived connection pool shared by all the downloads of this crawler.
+
+        Returns
+        -------
+        PoolManager:
+            A thread-safe pool that keeps up to max_workers connections alive. It is created by the first download, whichever thread makes it.
+        """
+        if self._https is None:
+            with self._https_lock:
+                if self._https is None:
+                    self._https = PoolManager(maxsize=max(1, self.max_workers),
+                                              cert_reqs='CERT_REQUIRED',
+                                              ca_certs=certifi.where())
+        return self._https
+
+    @property
+    def downloader(self) -> Downloader:
+        """
+        Downloads archives over the shared connection pool, retrying and resuming failed transfers.
+        """
+        if self._downloader is None:
+            https = self.https
+            with self._https_lock:
+                if self._downloader is None:
+                    self._downloader = Downloader(https, retries=self.retries,
+                                                  backoff=self.backoff)
+        return self._downloader
+
+    @property
+    def track_actors(self) -> bool:
+        """
+        Whether hours are counted with their distinct actors. They are only needed for the sketches.
+        """
+        return self.sketches is not None
 
     def set_date_range(self, hour: Union[DateRange, int] = (0, 23),
                        date: Union[DateRange, int] = (1, 31),
@@ -93,6 +217,25 @@ class Crawler:
         self.year = year
         self.hour = hour
         self.month = month
+        self.start = None
+        self.end = None
+        self.timestamps = None
+
+    def set_time_range(self, start: Union[datetime, str],
+                       end: Union[datetime, str]) -> None:
+        """
+        Crawl every hour from start to end (both inclusive) instead of a date range.
+
+        Parameters
+        ----------
+        start: datetime or str
+            First hour, e.g., '2020-03-14 18:00'.
+        end: datetime or str
+            Last hour, e.g., '2020-04-02 06:00'.
+        """
+        self.start = to_hour(start)
+        self.end = to_hour(end)
+        self.timestamps = None
 
     def update_eventset(self, new_eventset: Iterable) -> None:
         """
@@ -154,9 +297,23 @@ class Crawler:
             return False
         return True
 
+    def _daterange2hours(self) -> Iterator[datetime]:
+        """
+        Generates the hours to crawl.
+
+        Yields
+        ------
+        datetime:
+            The hours of this shard (see shard), else every hour of the time range (if set), else of the date range. Dates that don't exist are never generated.
+        """
+        if self.timestamps is not None:
+            return iter(self.timestamps)
+        if self.start is not None:
+            return hour_range(self.start, self.end)
+        return daterange2hours(self.hour, self.date, self.month, self.year)
+
     def _daterange2url(self) -> URL:
         """
-        TODO: Move to Utils
         Converts user provided date range into a GH Archive URL.
 
         GH Archive uses a specific string format to encode the data url. This method formats user provided date-range into a URL that can be queried.
@@ -166,31 +323,35 @@ class Crawler:
         str:
             Download URL for the GH Archive data
         """
+        for timestamp in self._daterange2hours():
+            yield hour2url(timestamp)
 
-        # If no range is provided, convert to a 2 element tuple. It's just
-        # much easier to generate a string this way.
-        if not isinstance(self.hour, tuple):
-            self.hour = self.hour, self.hour
-
-        if not isinstance(self.date, tuple):
-            self.date = self.date, self.date
-
-        if not isinstance(self.month, tuple):
-            self.month = self.month, self.month
-
-        if not isinstance(self.year, tuple):
-            self.year = self.year, self.year
-
-        hour = self._inclusive_range(*self.hour)
-        year = self._inclusive_range(*self.year)
-        date = self._inclusive_range(*self.date)
-        month = self._inclusive_range(*self.month)
+    def shard(self, num_shards: int) -> List['Crawler']:
+        """
+        Splits the hours to crawl into balanced, contiguous shards (e.g., one per worker).
 
-        # Generate a cartesian product of all the date-time combinations
-        all_timestamps = tuple(product(year, month, date, hour))
+        Parameters
+        ----------
+        num_shards: int
+            Number of shards.
 
-        for yy, mm, dd, hh in all_timestamps:
-            yield 'https://data.gharchive.org/{:02d}-{:02d}-{:02d}-{}.json.gz'.format(yy, mm, dd, hh)
+        Returns
+        -------
+        List(Crawler):
+            A copy of this crawler for every shard. Shard sizes differ by at most one hour.
+        """
+        shards = []
+        if self.start is not None:
+            for start, end in shard_range(self.start, self.end, num_shards):
+                shard = copy(self)
+                shard.set_time_range(start, end)
+                shards.append(shard)
+        else:
+            for hours in shard_hours(list(self._daterange2hours()), num_shards):
+                shard = copy(self)
+                shard.timestamps = hours
+                shards.append(shard)
+        return shards
 
     @staticmethod
     def filter_by_event(json_data: dict, filter_set: set) -> bool:
@@ -214,38 +375,151 @@ class Crawler:
         else:
             return False
 
-    # TODO: Move the following methods to a different file
-    def _url2dictlist(self, mined_url: str) -> List[Dict]:
+    @staticmethod
+    def _url2key(mined_url: str) -> str:
+        """
+        Extracts the archive hour from a GH Archive URL.
+
+        Examples
+        --------
+        + _url2key('https://data.gharchive.org/2020-03-12-16.json.gz') :-> '2020-03-12-16'
+        """
+        return mined_url[mined_url.rfind("/") + 1:].split(".")[0]
+
+    def _fetch_archive(self, mined_url: str, spool_path: Path = None) -> Tuple[Path, bool]:
         """
-        Generates a json file with all the metadata.
+        Downloads one GH Archive hour to disk.
 
         Parameters
         ----------
         mined_url: str
             URL of the GH Archive json.gz file.
+        spool_path: Path (optional)
+            Directory for the download if there is no cache.
 
         Returns
         -------
-        List(Dict):
-            Returns a list of the JSON dictionaries corresponding to the mined data.
+        Tuple(Path, bool):
+            Path to the .json.gz file, and whether it is a temporary file (i.e., not in the cache) that should be deleted after use.
+
+        Raises
+        ------
+        FileNotFoundError:
+            If the cache is offline and the archive isn't cached.
+        HTTPError:
+            If the archive can't be downloaded (see Downloader.download).
+        """
+        key = self._url2key(mined_url)
+        if self.cache is not None:
+            # The manifest knows the size of the hours crawled before, which catches archives damaged since.
+            record = self.manifest.get(key) if self.manifest is not None else None
+            archive = self.cache.get(key, record.get('bytes') if record else None)
+            if archive is not None:
+                return archive, False
+            if self.cache.offline:
+                raise FileNotFoundError(
+                    "{} is not cached (offline mode)".format(key))
+            archive = self.downloader.download(mined_url, self.cache.path(key))
+            return self.cache.admit(archive), False
+
+        archive = PosixPath(spool_path).joinpath(key + '.json.gz')
+        return self.downloader.download(mined_url, archive), True
+
+    @contextmanager
+    def _open_archive(self, mined_url: str) -> Iterator[BinaryIO]:
+        """
+        Opens one GH Archive hour as a binary stream of gzip data.
+
+        If a cache is configured, the archive is served from (and, on a miss, first downloaded into) the cache. Otherwise, it is downloaded to a temporary file that is deleted once the stream is closed.
+
+        Parameters
+        ----------
+        mined_url: str
+            URL of the GH Archive json.gz file.
+
+        Yields
+        ------
+        BinaryIO:
+            A readable stream of the .json.gz file.
+
+        Raises
+        ------
+        FileNotFoundError:
+            If the cache is offline and the archive isn't cached.
+        """
+        with TemporaryDirectory() as spool_path:
+            archive, _ = self._fetch_archive(mined_url, spool_path)
+            with open(archive, 'rb') as archive_file:
+                yield archive_file
+
+    def _iter_archive(self, mined_url: str, prefilter: EventPrefilter = None,
+                      loads: Callable = None, stats: Dict = None) -> Iterator[Dict]:
+        """
+        Streams every event of one GH Archive hour.
+
+        The archive is decompressed incrementally and each line is parsed only once, so memory stays flat irrespective of the size of the hour.
+
+        Parameters
+        ----------
+        mined_url: str
+            URL of the GH Archive json.gz file.
+        prefilter: EventPrefilter (optional)
+            If provided, only the raw lines that pass the prefilter are decoded.
+        loads: Callable (optional)
+            JSON decoder to use instead of the crawler's own.
+        stats: Dict (optional)
+            If provided, the size of the archive is saved under 'bytes' or, if the hour could not be read, the reason under 'error'.
+
+        Yields
+        ------
+        Dict:
+            JSON dictionary of every (prefiltered) event in the hour.
         """
-        https = PoolManager(cert_reqs='CERT_REQUIRED',
-                            ca_certs=certifi.where())
-        dict_list = []
         try:
-            response = https.request('GET', mined_url)
-            compressed_json = BytesIO(response.data)
-            with gzip.GzipFile(fileobj=compressed_json) as json_bytes:
-                json_str = json_bytes.read().decode('utf-8')
-                for json_value in json_str.split('\n'):
-                    if self._is_valid_json(json_value):
-                        data = json.loads(json_value)
-                        if self.filter_by_event(data, self.event_set):
-                            dict_list.append(data)
-        except OSError:
-            pass
-
-        return dict_list
+            with self._open_archive(mined_url) as archive_file:
+                yield from iter_events(archive_file, prefilter,
+                                       loads or self._loads)
+                if stats is not None:
+                    stats['bytes'] = archive_file.tell()
+        except (OSError, EOFError, HTTPError) as error:
+            logging.info(" Crawler: Failed to read {} ({})".format(
+                mined_url, error))
+            if stats is not None:
+                stats['error'] = "{}: {}".format(type(error).__name__, error)
+            if self.cache is not None and not isinstance(error, HTTPError):
+                # Without a manifest record, get() can't tell a truncated archive from a good one.
+                self.cache.discard(self._url2key(mined_url))
+            return
+
+    # TODO: Move the following methods to a different file
+    def _url2events(self, mined_url: str, stats: Dict = None) -> Iterator[Dict]:
+        """
+        Streams the events of one GH Archive hour that belong to the event set.
+
+        Lines of other event types are dropped before they are decoded.
+
+        Parameters
+        ----------
+        mined_url: str
+            URL of the GH Archive json.gz file.
+        stats: Dict (optional)
+            If provided, the number of events is saved under 'events' (see also _iter_archive).
+
+        Yields
+        ------
+        Dict:
+            JSON dictionary of every event that belongs to the event set.
+        """
+        num_events = 0
+        prefilter = EventPrefilter(self.event_set)
+        for data in self._iter_archive(mined_url, prefilter, stats=stats):
+            if self.filter_by_event(data, self.event_set):
+                num_events += 1
+                yield data
+        if stats is not None:
+            stats['events'] = num_events
+        logging.info(" Crawler: {} parsed {} lines, skipped {} lines".format(
+            self._url2key(mined_url), prefilter.parsed, prefilter.skipped))
 
     def _process_pull_request_event(self, data: dict) -> str:
         payload = data['payload']
@@ -303,89 +577,220 @@ class Crawler:
         event_type = 'CommitEvent'
         return event_type, num_distinct_commits
 
-    def _events_dataframe(self) -> None:
+    def _hour2dataframe(self, mined_url: str, stats: Dict = None) -> Tuple[str, PandasDataFrame]:
         """
-        Generate a DataFrame for all the mined attributes
+        Download one hour of GH Archive and count its events.
+
+        Parameters
+        ----------
+        mined_url: str
+            URL of the GH Archive json.gz file.
+        stats: Dict (optional)
+            If provided, filled with the 'bytes', 'events', 'peak_rss', and distinct 'actors' (see track_actors) of the hour, or the 'error' that stopped it.
+
+        Returns
+        -------
+        Tuple(str, PandasDataFrame):
+            The hour (formatted as YYYY-MM-DD-H) and the event counts of every repository.
         """
-        mined_data_df = defaultdict(lambda: None)
-        for mined_url in self._daterange2url():
-            key = mined_url[mined_url.rfind("/") + 1:].split(".")[0]
-            all_events = self._url2dictlist(mined_url)
-            mined_data_dict = defaultdict(lambda: defaultdict(int))
-            for event in all_events:
-                event_name = event['type']
-                repo_name = event['repo']['name']
-
-                if event_name == "IssuesEvent":
-                    payload = event['payload']
-                    action = payload['action']
-                    if action == 'opened' or action == 'reopened':
-                        # New Issue has been opened
-                        event_type = 'IssueCreated'
-                    elif action == 'closed':
-                        # New Issue has been opened
-                        event_type = 'IssueClosed'
-                    else:
-                        event_type = 'OtherIssueEvent'
-                    mined_data_dict[event_type][repo_name] += 1
-
-                elif event_name == "PullRequestEvent":
-                    payload = event['payload']
-                    action = payload['action']
-                    pull_request = payload['pull_request']
-                    if action == 'opened':
-                        # New Pull Request has been opened
-                        event_type = 'PullRequestOpened'
-                    if action == 'closed':
-                        # New Pull Request has been opened
-                        event_type = 'PullRequestClosed'
-                    if action == 'closed' and pull_request['merged']:
-                        # New Pull Request has been merged
-                        event_type = 'PullRequestMerged'
-                    if action == 'closed' and not pull_request['merged']:
-                        # New Pull Request has been rejected
-                        event_type = 'PullRequestRejected'
-                    else:
-                        event_type = 'OtherPullRequestEvent'
-                    mined_data_dict[event_type][repo_name] += 1
-
-                elif event_name == "PushEvent":
-                    payload = event['payload']
-                    num_distinct_commits = payload['distinct_size']
-                    event_type = 'CommitEvent'
-                    mined_data_dict[event_type][repo_name] += num_distinct_commits
+        key = self._url2key(mined_url)
+        monitor = MemoryMonitor(self.memory_limit)
+        all_events = self._url2events(mined_url, stats)
+        mined_data_dict = count_events(all_events, monitor, self.track_actors)
+        if stats is not None:
+            stats['peak_rss'] = monitor.peak
+            if self.track_actors:
+                stats['actors'] = mined_data_dict.actors
+
+        return key, mined_data_dict.to_dataframe()
+
+    def _crawl_hour(self, mined_url: str) -> Tuple[str, PandasDataFrame, Dict]:
+        """
+        Count the events of one hour and keep track of it in the manifest (if any).
 
+        Parameters
+        ----------
+        mined_url: str
+            URL of the GH Archive json.gz file.
+
+        Returns
+        -------
+        Tuple(str, PandasDataFrame, Dict):
+            The hour, its event counts (None if the hour failed), and its stats (see _hour2dataframe).
+        """
+        key = self._url2key(mined_url)
+        if self.manifest is not None:
+            self.manifest.mark_started(key)
+
+        stats = dict()
+        key, data_df = self._hour2dataframe(mined_url, stats)
+        if 'error' in stats:
+            if self.manifest is not None:
+                self.manifest.mark_failed(key, stats['error'])
+            data_df = None
+
+        return key, data_df, stats
+
+    def _iter_hourly_dataframes(self, resume: bool = False) -> Iterator[Tuple[str, PandasDataFrame, Dict]]:
+        """
+        Download and count all the hours in the date range.
+
+        At most max_workers hours are in flight at any time, all of them sharing one connection pool.
+
+        Parameters
+        ----------
+        resume: bool (default=False)
+            If True, skip the hours the manifest lists as done.
+
+        Yields
+        ------
+        Tuple(str, PandasDataFrame, Dict):
+            The hour, its event counts (None if the hour failed), and its stats. The hours are chronological only if self.ordered is True.
+        """
+        mined_urls = self._daterange2url()
+        if resume and self.manifest is not None:
+            mined_urls = list(mined_urls)
+            pending = set(self.manifest.pending(map(self._url2key, mined_urls)))
+            logging.info(" Crawler: Resuming with {} of {} hours left".format(
+                len(pending), len(mined_urls)))
+            mined_urls = [mined_url for mined_url in mined_urls
+                          if self._url2key(mined_url) in pending]
+
+        if self.num_processes > 0:
+            pipeline = HourlyPipeline(self, num_downloaders=self.max_workers,
+                                      num_workers=self.num_processes)
+            for key, counts, stats in pipeline.run(mined_urls):
+                if counts is None:
+                    if self.manifest is not None:
+                        self.manifest.mark_failed(key, stats['error'])
+                    yield key, None, stats
                 else:
-                    event_type = event_name
-                    mined_data_dict[event_type][repo_name] += 1
+                    if self.track_actors:
+                        stats['actors'] = counts.actors
+                    yield key, counts.to_dataframe(), stats
+            return
+
+        if self.max_workers <= 1:
+            for mined_url in mined_urls:
+                yield self._crawl_hour(mined_url)
+            return
+
+        monitor = MemoryMonitor(self.memory_limit)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = deque()
+            for mined_url in mined_urls:
+                while len(in_flight) >= self.max_workers or \
+                        (in_flight and monitor.over_limit()):
+                    yield from self._drain(in_flight, wait_for_all=False)
+                in_flight.append(executor.submit(
+                    self._crawl_hour, mined_url))
+            yield from self._drain(in_flight, wait_for_all=True)
+
+    def _drain(self, in_flight: deque, wait_for_all: bool) -> Iterator[Tuple[str, PandasDataFrame]]:
+        """
+        Hand over finished downloads.
+
+        Parameters
+        ----------
+        in_flight: deque
+            Futures of the downloads in progress.
+        wait_for_all: bool
+            If True, wait for every download. Otherwise, free up at least one slot.
+
+        Yields
+        ------
+        Tuple(str, PandasDataFrame, Dict):
+            The hour, its event counts, and its stats.
+        """
+        while in_flight:
+            if self.ordered:
+                yield in_flight.popleft().result()
+            else:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.remove(future)
+                    yield future.result()
+            if not wait_for_all:
+                return
+
+    def _events_dataframe(self) -> None:
+        """
+        Generate a DataFrame for all the mined attributes
 
-            mined_data_df[key] = pd.DataFrame(mined_data_dict).fillna(0)
+        Hours that could not be downloaded are None.
+        """
+        mined_data_df = defaultdict(lambda: None)
+        for key, data_df, _ in self._iter_hourly_dataframes():
+            mined_data_df[key] = data_df
 
         return mined_data_df
 
-    def save_events_as_csv(self,
-                           save_path: Path = root.joinpath('data', 'hourly')) -> None:
+    def save_events(self, store: Union[CSVStore, ParquetStore]) -> bool:
         """
-        Generate a CSV file with all the mined attributes
+        Save the mined attributes of every hour to a store.
+
+        Every hour is saved as soon as it is counted. With a manifest, the hours that are already done are skipped, so an interrupted crawl resumes where it stopped.
 
         Parameters
         ----------
-        save_path: str
-            Save path as a string.
+        store: CSVStore or ParquetStore
+            Where to save the hourly counts.
+
+        Returns
+        -------
+        bool:
+            True if the last hour had any events to save.
         """
+        saved = False
+        for fname, data_df, stats in self._iter_hourly_dataframes(resume=True):
+            if 'peak_rss' in stats:
+                logging.info(" Crawler: {} peaked at {:.1f} MiB RSS".format(
+                    fname, stats['peak_rss'] / MIB))
+            if data_df is None:  # The hour failed. It is retried on the next run.
+                saved = False
+                continue
 
-        mined_data_df = self._events_dataframe()
-        for fname, data_df in mined_data_df.items():
+            checksum = None
             if len(data_df):
-                logging.info(" Crawler Saving as {}.csv".format(fname))
-                save_location = save_path.joinpath(fname + '.csv')
-                data_df.to_csv(save_location, index_label="Repository")
+                logging.info(" Crawler Saving {} to {}".format(
+                    fname, type(store).__name__))
+                checksum = file_checksum(store.write(fname, data_df))
                 saved = True
             else:
                 saved = False
 
+            if self.sketches is not None:
+                self.sketches.add(fname, data_df.index, stats.get('actors'))
+            if self.manifest is not None:
+                self.manifest.mark_done(fname, stats.get('bytes'),
+                                        stats.get('events'), checksum)
+
         return saved
 
+    def save_events_as_csv(self,
+                           save_path: Path = root.joinpath('data', 'hourly')) -> bool:
+        """
+        Generate a CSV file with all the mined attributes
+
+        Parameters
+        ----------
+        save_path: str
+            Save path as a string.
+        """
+        return self.save_events(CSVStore(save_path))
+
+    def save_events_as_parquet(self,
+                               save_path: Path = root.joinpath('data', 'parquet')) -> bool:
+        """
+        Save all the mined attributes to a Parquet dataset partitioned by year, month, and day.
+
+        Parameters
+        ----------
+        save_path: Path
+            Root directory of the dataset.
+        """
+        return self.save_events(ParquetStore(save_path))
+
 
 if __name__ == "__main__":
     date = {"date": 31, "month": 3, "year": 2020, "hour": 20}
@@ -0,0 +1,178 @@
+import os
+import sys
+import time
+import random
+import logging
+from pathlib import Path, PosixPath
+from typing import Union, NewType
+
+# Logging Config
+logging.basicConfig(format='[+] %(message)s', level=logging.INFO)
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from urllib3 import PoolManager
+from urllib3.util import Retry, Timeout
+from urllib3.exceptions import HTTPError
+
+from .cache import ArchiveCache
+
+# Common types used here.
+PathType = NewType('Path', PosixPath)
+
+# Statuses worth another attempt. Anything else (e.g., 404 for an hour GH Archive doesn't have) fails right away.
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HTTPStatusError(HTTPError):
+    def __init__(self, status: int, url: str):
+        super().__init__("HTTP {} for {}".format(status, url))
+        self.status = status
+
+
+class Downloader:
+    def __init__(self, pool: PoolManager = None, retries: int = 3,
+                 backoff: float = 0.5, max_backoff: float = 30.0,
+                 connect_timeout: float = 10.0, read_timeout: float = 60.0,
+                 chunk_size: int = 1024 ** 2):
+        """
+        Downloads GH Archive hours to disk, resuming interrupted transfers.
+
+        Parameters
+        ----------
+        pool: PoolManager (optional)
+            Connection pool to download with (e.g., Crawler.https). A new one is created by default.
+        retries: int (default=3)
+            Number of times a failed attempt is retried.
+        backoff: float (default=0.5)
+            Backoff factor (in seconds). The n-th retry waits a random time between 0 and backoff * 2^(n-1) seconds.
+        max_backoff: float (default=30.0)
+            Upper bound of a single wait (in seconds).
+        connect_timeout: float (default=10.0)
+            Seconds to wait for a connection.
+        read_timeout: float (default=60.0)
+            Seconds to wait for the next bytes of a response. A stalled transfer is retried.
+        chunk_size: int (default=1 MiB)
+            Bytes written to disk at a time.
+
+        Notes
+        -----
+        + The download is streamed to {destination}.part. If it is interrupted, the next attempt asks for the rest of the file with an HTTP Range request instead of starting over. The .part file survives failed calls, so a later call resumes it too.
+        + The file is only renamed to its destination once its size matches the one announced by the server and its gzip trailer (CRC32 and size) has been verified.
+        + Waits are jittered so that many workers that fail together don't retry together.
+        """
+        self.pool = pool if pool is not None else PoolManager()
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = Timeout(connect=connect_timeout, read=read_timeout)
+        self.chunk_size = chunk_size
+
+    def _wait(self, attempt: int) -> None:
+        delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+        time.sleep(random.uniform(0, delay))
+
+    def _attempt(self, url: str, partial: PathType) -> bool:
+        """
+        Fetches (the rest of) a file into partial.
+
+        Returns
+        -------
+        bool:
+            True if the file is complete. False if the transfer ended early and should be resumed.
+        """
+        offset = partial.stat().st_size if partial.exists() else 0
+        headers = {'Range': 'bytes={}-'.format(offset)} if offset else {}
+        # Retries are ours to make (they resume), so urllib3 only follows redirects.
+        response = self.pool.request('GET', url, headers=headers, preload_content=False,
+                                     timeout=self.timeout,
+                                     retries=Retry(total=None, connect=0, read=0, status=0,
+                                                   other=0, redirect=3))
+        try:
+            if response.status == 416:
+                # Nothing left to fetch. Let the integrity check decide.
+                return True
+            if response.status not in (200, 206):
+                raise HTTPStatusError(response.status, url)
+
+            total = None
+            if response.status == 206:
+                content_range = response.headers.get('Content-Range', '')
+                start, _, size = content_range.replace('bytes ', '').partition('/')
+                if not start.startswith('{}-'.format(offset)):
+                    partial.unlink()  # Start over on the next attempt.
+                    raise HTTPError("Unexpected Content-Range {!r} for {}".format(
+                        content_range, url))
+                if size.isdigit():
+                    total = int(size)
+            else:
+                # The server ignored the range (or there was none). Start over.
+                offset = 0
+                if response.headers.get('Content-Length', '').isdigit():
+                    total = int(response.headers['Content-Length'])
+
+            with open(partial, 'ab' if offset else 'wb') as partial_file:
+                # Offsets count raw bytes, so never let urllib3 decode them.
+                for chunk in response.stream(self.chunk_size, decode_content=False):
+                    partial_file.write(chunk)
+        finally:
+            response.release_conn()
+
+        return total is None or partial.stat().st_size >= total
+
+    def download(self, url: str, destination: Union[PathType, str]) -> PathType:
+        """
+        Downloads a file and verifies it's an intact gzip archive.
+
+        Parameters
+        ----------
+        url: str
+            URL of the GH Archive json.gz file.
+        destination: PathType
+            Where to save the file.
+
+        Returns
+        -------
+        PathType:
+            The destination.
+
+        Raises
+        ------
+        HTTPStatusError:
+            If the server refuses the file (e.g., HTTP 404).
+        HTTPError:
+            If the last attempt failed on the network.
+        OSError:
+            If the last attempt failed on disk or the file kept arriving damaged.
+        """
+        destination = Path(destination)
+        partial = destination.with_name(destination.name + '.part')
+        for attempt in range(self.retries + 1):
+            try:
+                if self._attempt(url, partial):
+                    if ArchiveCache.is_intact(partial, verify=True):
+                        os.replace(partial, destination)
+                        return destination
+                    # Resuming won't fix a damaged file.
+                    partial.unlink()
+                    error = OSError("Damaged archive from {}".format(url))
+                else:
+                    error = OSError("Transfer of {} ended early".format(url))
+            except HTTPStatusError as status_error:
+                if status_error.status not in RETRY_STATUSES:
+                    raise
+                error = status_error
+            except HTTPError as http_error:
+                error = http_error
+            except OSError as os_error:
+                error = os_error
+
+            if attempt < self.retries:
+                logging.info(" Downloader: Retrying {} ({})".format(url, error))
+                self._wait(attempt)
+        raise error
@@ -0,0 +1,200 @@
+import os
+import sys
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Union
+
+# Logging Config
+logging.basicConfig(format='[+] %(message)s', level=logging.INFO)
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from utils import EventPrefilter, hour2key, hour2url
+
+from .counts import HourlyCounts, count_event
+from .storage import CSVStore, ParquetStore
+from .manifest import CrawlManifest, file_checksum
+from .sketches import SketchStore
+
+
+class Consumer:
+    """
+    Something that wants to see the events of every hour (see EventBus).
+
+    Attributes
+    ----------
+    event_set: set or None
+        Event types to receive. None receives every event.
+    repo_set: set or None
+        Repositories to receive. None receives every repository.
+    """
+    event_set = None
+    repo_set = None
+
+    def wants(self, data: Dict) -> bool:
+        if self.event_set is not None and data['type'] not in self.event_set:
+            return False
+        if self.repo_set is not None and data['repo']['name'] not in self.repo_set:
+            return False
+        return True
+
+    def handle(self, data: Dict, timestamp: datetime) -> None:
+        """
+        Called for every wanted event of the hour that starts at timestamp.
+        """
+        raise NotImplementedError
+
+    def end_hour(self, timestamp: datetime, stats: Dict) -> None:
+        """
+        Called once all the events of the hour were handled.
+
+        Parameters
+        ----------
+        timestamp: datetime
+            The hour.
+        stats: Dict
+            The 'bytes' of the hour.
+        """
+        pass
+
+    def discard_hour(self, timestamp: datetime, stats: Dict) -> None:
+        """
+        Called instead of end_hour if the hour could not be read to the end. Whatever was kept of its events must be dropped, as they are only part of the hour.
+
+        Parameters
+        ----------
+        timestamp: datetime
+            The hour.
+        stats: Dict
+            The 'error' that stopped the hour.
+        """
+        pass
+
+    def finish(self) -> None:
+        """
+        Called once all the hours were handled.
+        """
+        pass
+
+
+class HourlyCountConsumer(Consumer):
+    def __init__(self, event_set: set, store: Union[CSVStore, ParquetStore],
+                 manifest: CrawlManifest = None, sketches: SketchStore = None):
+        """
+        Counts events per repository and saves one table per hour, like Crawler.save_events.
+
+        Parameters
+        ----------
+        event_set: set
+            Event types to count.
+        store: CSVStore or ParquetStore
+            Where to save the hourly counts.
+        manifest: CrawlManifest (optional)
+            If provided, the saved hours are marked as done.
+        sketches: SketchStore (optional)
+            If provided, distinct-count sketches of the repositories and actors of every saved hour are saved too.
+        """
+        self.event_set = set(event_set)
+        self.store = store
+        self.manifest = manifest
+        self.sketches = sketches
+        self._reset()
+
+    def handle(self, data: Dict, timestamp: datetime) -> None:
+        count_event(self.counts, data)
+        self.num_events += 1
+
+    def end_hour(self, timestamp: datetime, stats: Dict) -> None:
+        key = hour2key(timestamp)
+        data_df = self.counts.to_dataframe()
+        checksum = None
+        if len(data_df):
+            checksum = file_checksum(self.store.write(key, data_df))
+        if self.sketches is not None:
+            self.sketches.add(key, data_df.index, self.counts.actors)
+        if self.manifest is not None:
+            self.manifest.mark_done(key, stats.get('bytes'), self.num_events, checksum)
+        self._reset()
+
+    def discard_hour(self, timestamp: datetime, stats: Dict) -> None:
+        # Don't save a partial hour.
+        if self.manifest is not None:
+            self.manifest.mark_failed(hour2key(timestamp), stats['error'])
+        self._reset()
+
+    def _reset(self) -> None:
+        self.counts = HourlyCounts(track_actors=self.sketches is not None)
+        self.num_events = 0
+
+
+class EventBus:
+    def __init__(self, crawler):
+        """
+        Fetches and decodes every hour once and dispatches its events to all the registered consumers.
+
+        Parameters
+        ----------
+        crawler: Crawler
+            Provides the hours, the connection pool, the cache, and the JSON decoder.
+
+        Examples
+        --------
+        + bus = EventBus(crawler)
+          bus.subscribe(HourlyCountConsumer(crawler.event_set, CSVStore()))
+          bus.subscribe(MetricsConsumer(metrics_getter, save_name='metrics.json'))
+          bus.run()
+
+        Notes
+        -----
+        + Raw lines are prefiltered with the union of what the consumers want, so only lines that some consumer needs are decoded.
+        + An hour that fails midway is discarded by every consumer (see Consumer.discard_hour), so none of them keeps part of it.
+        """
+        self.crawler = crawler
+        self.consumers = []
+
+    def subscribe(self, consumer: Consumer) -> Consumer:
+        self.consumers.append(consumer)
+        return consumer
+
+    def _prefilter(self) -> Union[EventPrefilter, None]:
+        """
+        A prefilter that lets through what any of the consumers wants, or None if some consumer wants every event.
+        """
+        if any(consumer.event_set is None for consumer in self.consumers):
+            return None
+        event_set = set().union(*(consumer.event_set for consumer in self.consumers))
+        repo_set = None
+        if all(consumer.repo_set is not None for consumer in self.consumers):
+            repo_set = set().union(*(consumer.repo_set for consumer in self.consumers))
+        return EventPrefilter(event_set, repo_set)
+
+    def run(self) -> None:
+        """
+        Makes one pass over the crawler's hours.
+        """
+        for timestamp in self.crawler._daterange2hours():
+            stats = dict()
+            prefilter = self._prefilter()
+            for data in self.crawler._iter_archive(hour2url(timestamp), prefilter,
+                                                   stats=stats):
+                for consumer in self.consumers:
+                    if consumer.wants(data):
+                        consumer.handle(data, timestamp)
+
+            for consumer in self.consumers:
+                if 'error' in stats:
+                    consumer.discard_hour(timestamp, stats)
+                else:
+                    consumer.end_hour(timestamp, stats)
+            if prefilter is not None:
+                logging.info(" Event bus: {} parsed {} lines, skipped {} lines".format(
+                    hour2key(timestamp), prefilter.parsed, prefilter.skipped))
+
+        for consumer in self.consumers:
+            consumer.finish()
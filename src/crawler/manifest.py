@@ -0,0 +1,156 @@
+import os
+import sys
+import sqlite3
+import hashlib
+from datetime import datetime
+from contextlib import closing
+from pathlib import Path, PosixPath
+from typing import Dict, Iterable, List, Union, NewType
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+# Common types used here.
+PathType = NewType('Path', PosixPath)
+
+# Status of an hour in the manifest.
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def file_checksum(path: PathType) -> str:
+    """
+    Computes the SHA-1 checksum of a file.
+
+    Parameters
+    ----------
+    path: PathType
+        The file to checksum.
+
+    Returns
+    -------
+    str:
+        Hex digest of the file's contents.
+    """
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as data_file:
+        for chunk in iter(lambda: data_file.read(1024 ** 2), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+class CrawlManifest:
+    def __init__(self, path: PathType = root.joinpath('data', 'manifest.sqlite')):
+        """
+        A persistent record of the crawled hours, used to resume crawls.
+
+        Parameters
+        ----------
+        path: PathType (default: {root}/data/manifest.sqlite)
+            The SQLite database file.
+
+        Notes
+        -----
+        + Each hour (formatted as YYYY-MM-DD-H) is either 'running', 'done' or 'failed'. Alongside, the manifest keeps the number of attempts, the archive's size in bytes, the number of events counted, the checksum of the saved output, and the last error.
+        + A connection is opened per operation, so the manifest can be shared by threads and processes.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS hours (
+                    hour TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    bytes INTEGER,
+                    events INTEGER,
+                    checksum TEXT,
+                    error TEXT,
+                    updated TEXT NOT NULL
+                )""")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=60)
+
+    def _upsert(self, hour: str, **columns) -> None:
+        columns['updated'] = datetime.now().isoformat()
+        names = ', '.join(columns)
+        updates = ', '.join('{0}=excluded.{0}'.format(name) for name in columns)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO hours (hour, {}) VALUES (?{}) "
+                "ON CONFLICT(hour) DO UPDATE SET {}".format(
+                    names, ', ?' * len(columns), updates),
+                (hour, *columns.values()))
+
+    def mark_started(self, hour: str) -> None:
+        self._upsert(hour, status=RUNNING, error=None)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "UPDATE hours SET attempts = attempts + 1 WHERE hour = ?", (hour,))
+
+    def mark_done(self, hour: str, num_bytes: int = None, num_events: int = None,
+                  checksum: str = None) -> None:
+        self._upsert(hour, status=DONE, bytes=num_bytes, events=num_events,
+                     checksum=checksum, error=None)
+
+    def mark_failed(self, hour: str, error: str) -> None:
+        self._upsert(hour, status=FAILED, error=error)
+
+    def get(self, hour: str) -> Union[Dict, None]:
+        """
+        Parameters
+        ----------
+        hour: str
+            Hour formatted as YYYY-MM-DD-H.
+
+        Returns
+        -------
+        Dict or None:
+            The manifest record of the hour, or None if it was never crawled.
+        """
+        with closing(self._connect()) as connection:
+            connection.row_factory = sqlite3.Row
+            row = connection.execute(
+                "SELECT * FROM hours WHERE hour = ?", (hour,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def is_done(self, hour: str) -> bool:
+        record = self.get(hour)
+        return record is not None and record['status'] == DONE
+
+    def pending(self, hours: Iterable[str]) -> List[str]:
+        """
+        Filters out the hours that were already crawled successfully.
+
+        Parameters
+        ----------
+        hours: Iterable[str]
+            Hours formatted as YYYY-MM-DD-H.
+
+        Returns
+        -------
+        List[str]:
+            Hours that were never crawled, failed, or were interrupted.
+        """
+        with closing(self._connect()) as connection:
+            done = {hour for hour, in connection.execute(
+                "SELECT hour FROM hours WHERE status = ?", (DONE,))}
+        return [hour for hour in hours if hour not in done]
+
+    def summary(self) -> Dict[str, int]:
+        """
+        Returns
+        -------
+        Dict(str, int):
+            Number of hours in each status.
+        """
+        with closing(self._connect()) as connection:
+            return dict(connection.execute(
+                "SELECT status, COUNT(*) FROM hours GROUP BY status"))
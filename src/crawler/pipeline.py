@@ -0,0 +1,218 @@
+import os
+import sys
+import logging
+from queue import Queue, Empty, Full
+from threading import Event, Thread
+from collections import deque
+from tempfile import TemporaryDirectory
+from pathlib import Path, PosixPath
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, Tuple, NewType
+
+# Logging Config
+logging.basicConfig(format='[+] %(message)s', level=logging.INFO)
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from .counts import count_archive, HourlyCounts
+
+# Common types used here.
+PathType = NewType('Path', PosixPath)
+HourResult = Tuple[str, HourlyCounts, Dict]
+
+# Marks the end of a stage's output.
+_DONE = None
+# Seconds a stage waits on a queue before checking whether the pipeline was stopped.
+_POLL_SECONDS = 0.1
+
+
+class HourlyPipeline:
+    def __init__(self, crawler, num_downloaders: int = 4, num_workers: int = None,
+                 queue_size: int = None):
+        """
+        A staged pipeline that downloads, counts, and merges GH Archive hours.
+
+            download (I/O threads) -> decompress + parse + count (worker processes) -> merge (caller)
+
+        Parameters
+        ----------
+        crawler: Crawler
+            The crawler that provides the hours, the connection pool, the cache, and the event set.
+        num_downloaders: int (default=4)
+            Number of download threads.
+        num_workers: int (default=os.cpu_count())
+            Number of worker processes that decompress, parse, and count.
+        queue_size: int (default=2 * num_workers)
+            Capacity of the queues between stages. It caps the number of downloaded hours waiting on disk and of counted hours waiting to be merged, so memory stays bounded.
+
+        Notes
+        -----
+        + Downloads are spooled to the crawler's cache or, without one, to a temporary directory that is cleaned up as soon as an hour is counted.
+        + Workers only exchange file paths and per-hour counts (see count_archive) with the parent, never event dictionaries.
+        """
+        self.crawler = crawler
+        self.num_downloaders = max(1, num_downloaders)
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or 2 * self.num_workers
+
+    def _put(self, queue: Queue, item) -> bool:
+        """
+        Puts an item on a bounded queue unless the pipeline is stopped while waiting for room.
+        """
+        while not self._stop.is_set():
+            try:
+                queue.put(item, timeout=_POLL_SECONDS)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _get(self, queue: Queue):
+        """
+        Gets an item from a queue, or _DONE if the pipeline is stopped while waiting for one.
+        """
+        while not self._stop.is_set():
+            try:
+                return queue.get(timeout=_POLL_SECONDS)
+            except Empty:
+                continue
+        return _DONE
+
+    def _download(self, urls: Queue, downloaded: Queue, spool_path: PathType) -> None:
+        """
+        Download stage: fetch hours to disk until the URL queue runs dry.
+        """
+        try:
+            while not self._stop.is_set():
+                mined_url = urls.get()
+                if mined_url is _DONE:
+                    return
+                key = self.crawler._url2key(mined_url)
+                try:
+                    if self.crawler.manifest is not None:
+                        self.crawler.manifest.mark_started(key)
+                    archive, is_temporary = self.crawler._fetch_archive(
+                        mined_url, spool_path)
+                except Exception as error:  # A broken hour must not stall the pipeline.
+                    logging.info(" Pipeline: Failed to download {} ({})".format(
+                        mined_url, error))
+                    self._put(downloaded, (key, None, False, "{}: {}".format(
+                        type(error).__name__, error)))
+                    continue
+                if not self._put(downloaded, (key, archive, is_temporary, None)) and is_temporary:
+                    os.remove(archive)
+        finally:
+            self._put(downloaded, _DONE)
+
+    def _count(self, downloaded: Queue, counted: Queue,
+               executor: ProcessPoolExecutor) -> None:
+        """
+        Count stage: hand downloaded hours to the worker processes, at most queue_size at a time.
+        """
+        in_flight = deque()
+        num_finished = 0
+        try:
+            while num_finished < self.num_downloaders and not self._stop.is_set():
+                item = self._get(downloaded)
+                if item is _DONE:
+                    num_finished += 1
+                    continue
+                key, archive, is_temporary, error = item
+                if error is not None:
+                    self._put(counted, (key, None, {'error': error}))
+                    continue
+                if len(in_flight) >= self.queue_size:
+                    self._put(counted, self._collect(*in_flight.popleft()))
+                future = executor.submit(count_archive, archive, self.crawler.event_set,
+                                         self.crawler.json_backend, self.crawler.memory_limit,
+                                         self.crawler.track_actors)
+                in_flight.append((key, archive, is_temporary, future))
+
+            while in_flight:
+                key, archive, is_temporary, future = in_flight.popleft()
+                if self._stop.is_set():
+                    future.cancel()
+                self._put(counted, self._collect(key, archive, is_temporary, future))
+        finally:
+            self._put(counted, _DONE)
+
+    def _collect(self, key: str, archive: PathType, is_temporary: bool, future) -> HourResult:
+        try:
+            counts, stats = future.result()
+        except Exception as error:  # A broken hour must not stall the pipeline.
+            logging.info(" Pipeline: Failed to count {} ({})".format(key, error))
+            counts, stats = None, {'error': "{}: {}".format(type(error).__name__, error)}
+            if not is_temporary and isinstance(error, (OSError, EOFError)):
+                self.crawler.cache.discard(key)
+        finally:
+            if is_temporary:
+                os.remove(archive)
+        return key, counts, stats
+
+    @staticmethod
+    def _drain(*queues: Queue) -> None:
+        for queue in queues:
+            while True:
+                try:
+                    queue.get_nowait()
+                except Empty:
+                    break
+
+    def run(self, mined_urls: Iterable[str]) -> Iterator[HourResult]:
+        """
+        Runs the pipeline over some hours. The caller is the merge stage.
+
+        Parameters
+        ----------
+        mined_urls: Iterable[str]
+            URLs of the GH Archive json.gz files.
+
+        Yields
+        ------
+        Tuple(str, HourlyCounts, Dict):
+            The hour, its counts (None if the hour failed), and its stats ('bytes', 'events', and 'peak_rss', or 'error'). Hours are yielded as they finish.
+
+        Notes
+        -----
+        + If the caller stops early (e.g., breaks out of the loop or closes the generator), the stages are stopped, the queues drained, and pending hours cancelled before the generator returns.
+        """
+        self._stop = Event()
+        urls = Queue()
+        downloaded = Queue(maxsize=self.queue_size)
+        counted = Queue(maxsize=self.queue_size)
+
+        for mined_url in mined_urls:
+            urls.put(mined_url)
+        for _ in range(self.num_downloaders):
+            urls.put(_DONE)
+
+        # Workers are spawned rather than forked, as the download threads are already running.
+        with TemporaryDirectory() as spool_path, \
+                ProcessPoolExecutor(max_workers=self.num_workers,
+                                    mp_context=get_context('spawn')) as executor:
+            stages = [Thread(target=self._download, args=(urls, downloaded, spool_path),
+                             daemon=True) for _ in range(self.num_downloaders)]
+            stages.append(Thread(target=self._count, args=(downloaded, counted, executor),
+                                 daemon=True))
+            for stage in stages:
+                stage.start()
+
+            try:
+                while True:
+                    result = counted.get()
+                    if result is _DONE:
+                        break
+                    yield result
+            finally:
+                self._stop.set()
+                self._drain(urls, downloaded, counted)
+                for stage in stages:
+                    stage.join()
+                # Hours a stage put after the first drain.
+                self._drain(downloaded, counted)
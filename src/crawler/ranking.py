@@ -0,0 +1,130 @@
+import os
+import sys
+import heapq
+import pandas as pd
+from pathlib import Path, PosixPath
+from operator import itemgetter
+from typing import Tuple, NewType
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+# Common types used here.
+PandasDataFrame = NewType('PandasDataFrame', pd.core.frame.DataFrame)
+PandasSeries = NewType('PandasSeries', pd.core.series.Series)
+PathType = NewType('Path', PosixPath)
+
+
+class ExactRanking:
+    def __init__(self, column: str = 'TotalEvents'):
+        """
+        Ranks repositories by the sum of a score over many aggregates.
+
+        Parameters
+        ----------
+        column: str (default='TotalEvents')
+            Name of the score (e.g., an event column of the aggregates).
+
+        Notes
+        -----
+        + Only one number per repository is kept, never the aggregates themselves. For a fixed memory budget, see SpaceSavingRanking.
+        """
+        self.column = column
+        self.totals = dict()
+
+    def update(self, scores: PandasSeries) -> None:
+        """
+        Adds the scores of one aggregate (indexed by repository).
+        """
+        totals = self.totals
+        for repo, score in zip(scores.index.tolist(), scores.tolist()):
+            if score:
+                totals[repo] = totals.get(repo, 0) + score
+
+    def top(self, k: int) -> PandasDataFrame:
+        """
+        Returns
+        -------
+        PandasDataFrame:
+            The k repositories with the highest scores, best first.
+        """
+        best = heapq.nlargest(k, self.totals.items(), key=itemgetter(1))
+        return pd.DataFrame([score for _, score in best], columns=[self.column],
+                            index=pd.Index([repo for repo, _ in best], name='Repository'))
+
+
+class SpaceSavingRanking:
+    def __init__(self, column: str = 'TotalEvents', capacity: int = 100000):
+        """
+        Ranks repositories approximately with a fixed number of counters (Space-Saving, Metwally et al. 2005).
+
+        Parameters
+        ----------
+        column: str (default='TotalEvents')
+            Name of the score (e.g., an event column of the aggregates).
+        capacity: int (default=100000)
+            Number of repositories tracked at once. Memory doesn't grow beyond it, however many repositories stream by.
+
+        Notes
+        -----
+        + Once the counters are full, a new repository takes over the smallest counter and starts from its value. So a count may overestimate a repository's score, by at most its MaxError, and never underestimates it.
+        + Every repository whose score exceeds (sum of all scores) / capacity is guaranteed to be tracked.
+        """
+        self.column = column
+        self.capacity = capacity
+        self.counts = dict()
+        self.errors = dict()
+        self._heap = []  # (count, repo) of the tracked repositories. Outdated entries are skipped lazily.
+
+    def _smallest(self) -> Tuple[int, str]:
+        while True:
+            count, repo = self._heap[0]
+            if self.counts.get(repo) == count:
+                return count, repo
+            heapq.heappop(self._heap)
+
+    def add(self, repo: str, score: int) -> None:
+        """
+        Adds a positive score to a repository.
+        """
+        if repo in self.counts:
+            self.counts[repo] += score
+        elif len(self.counts) < self.capacity:
+            self.counts[repo] = score
+            self.errors[repo] = 0
+        else:
+            floor, evicted = self._smallest()
+            heapq.heappop(self._heap)
+            del self.counts[evicted], self.errors[evicted]
+            self.counts[repo] = floor + score
+            self.errors[repo] = floor
+        heapq.heappush(self._heap, (self.counts[repo], repo))
+
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, repo) for repo, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def update(self, scores: PandasSeries) -> None:
+        """
+        Adds the scores of one aggregate (indexed by repository).
+        """
+        for repo, score in zip(scores.index.tolist(), scores.tolist()):
+            if score > 0:
+                self.add(repo, score)
+
+    def top(self, k: int) -> PandasDataFrame:
+        """
+        Returns
+        -------
+        PandasDataFrame:
+            The k repositories with the highest counts, best first, with the most their count may overestimate them by (MaxError).
+        """
+        best = heapq.nlargest(k, self.counts.items(), key=itemgetter(1))
+        repos = [repo for repo, _ in best]
+        return pd.DataFrame({self.column: [count for _, count in best],
+                             'MaxError': [self.errors[repo] for repo in repos]},
+                            index=pd.Index(repos, name='Repository'))
@@ -0,0 +1,150 @@
+import os
+import sys
+import sqlite3
+from datetime import datetime
+from contextlib import closing
+from pathlib import Path, PosixPath
+from collections import defaultdict
+from typing import Dict, Iterable, Tuple, Union, NewType
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from utils import key2hour
+
+# Common types used here.
+PathType = NewType('Path', PosixPath)
+# What an aggregate knows about one of its hourly inputs: (checksum, size, mtime_ns).
+Signature = Tuple[str, int, int]
+
+
+class RollupLedger:
+    def __init__(self, path: PathType = root.joinpath('data', 'rollups.sqlite')):
+        """
+        A persistent record of the hourly inputs that make up each daily, weekly, and monthly aggregate.
+
+        Parameters
+        ----------
+        path: PathType (default: {root}/data/rollups.sqlite)
+            The SQLite database file.
+
+        Notes
+        -----
+        + Every input hour is recorded with the checksum, size, and modification time of its file when it was added. An hour whose file changed since is stale.
+        + Every aggregate has a watermark: its latest input hour.
+        + A connection is opened per operation, like CrawlManifest.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS inputs (
+                    granularity TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    hour TEXT NOT NULL,
+                    checksum TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    PRIMARY KEY (granularity, hour)
+                )""")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS rollups (
+                    granularity TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    watermark TEXT NOT NULL,
+                    hours INTEGER NOT NULL,
+                    updated TEXT NOT NULL,
+                    PRIMARY KEY (granularity, period)
+                )""")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=60)
+
+    def inputs(self, granularity: str,
+               periods: Iterable[str] = None) -> Dict[str, Dict[str, Signature]]:
+        """
+        Parameters
+        ----------
+        granularity: str
+            'daily', 'weekly' or 'monthly'.
+        periods: Iterable[str] (optional)
+            Only these aggregates, e.g., the days of a week. By default, every aggregate of the granularity.
+
+        Returns
+        -------
+        Dict(str, Dict(str, Signature)):
+            The input hours of every aggregate and their signatures (checksum, size, mtime_ns).
+        """
+        query = ("SELECT period, hour, checksum, size, mtime_ns FROM inputs "
+                 "WHERE granularity = ?")
+        params = [granularity]
+        if periods is not None:
+            periods = list(periods)
+            query += " AND period IN ({})".format(', '.join('?' * len(periods)))
+            params += periods
+        inputs = defaultdict(dict)
+        with closing(self._connect()) as connection:
+            for period, hour, *signature in connection.execute(query, params):
+                inputs[period][hour] = tuple(signature)
+        return inputs
+
+    def signatures(self) -> Dict[str, Signature]:
+        """
+        Returns
+        -------
+        Dict(str, Signature):
+            The last known signature of every input hour, whatever its aggregate.
+        """
+        with closing(self._connect()) as connection:
+            return {hour: tuple(signature) for hour, *signature in connection.execute(
+                "SELECT hour, checksum, size, mtime_ns FROM inputs")}
+
+    def record(self, granularity: str, period: str, inputs: Dict[str, Signature]) -> None:
+        """
+        Replaces the inputs of an aggregate and moves its watermark.
+
+        Parameters
+        ----------
+        granularity: str
+            'daily', 'weekly' or 'monthly'.
+        period: str
+            The aggregate, e.g., '2020-03-12' (daily), '2020-10' (weekly) or '2020-03' (monthly).
+        inputs: Dict(str, Signature)
+            Its input hours and their signatures.
+        """
+        watermark = max(inputs, key=key2hour)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM inputs WHERE granularity = ? AND period = ?",
+                               (granularity, period))
+            connection.executemany(
+                "INSERT OR REPLACE INTO inputs VALUES (?, ?, ?, ?, ?, ?)",
+                [(granularity, period, hour, *signature)
+                 for hour, signature in inputs.items()])
+            connection.execute(
+                "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?)",
+                (granularity, period, watermark, len(inputs), datetime.now().isoformat()))
+
+    def forget(self, granularity: str, period: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            for table in ('inputs', 'rollups'):
+                connection.execute(
+                    "DELETE FROM {} WHERE granularity = ? AND period = ?".format(table),
+                    (granularity, period))
+
+    def watermark(self, granularity: str, period: str) -> Union[str, None]:
+        """
+        Returns
+        -------
+        str or None:
+            The latest input hour of the aggregate, or None if it was never rolled up.
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT watermark FROM rollups WHERE granularity = ? AND period = ?",
+                (granularity, period)).fetchone()
+        return row[0] if row is not None else None
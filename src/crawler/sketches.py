@@ -0,0 +1,306 @@
+import os
+import sys
+import sqlite3
+import numpy as np
+from hashlib import blake2b
+from datetime import datetime, timedelta
+from contextlib import closing
+from pathlib import Path, PosixPath
+from typing import Iterable, List, Union, NewType
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from utils import key2hour, to_hour
+
+# Common types used here.
+PathType = NewType('Path', PosixPath)
+
+# Default number of register bits: 4096 registers (4 KiB) per sketch, for a standard error of about 1.6%.
+PRECISION = 12
+# What is counted: distinct repositories and distinct actors.
+SKETCH_KINDS = ('repos', 'actors')
+# Names of the periods an hour belongs to, as in Agglomerate.
+PERIOD_FORMATS = {'daily': '%Y-%m-%d', 'weekly': '%G-W%V', 'monthly': '%Y-%m'}
+
+
+def _hash(name: str) -> int:
+    # Python's hash() is salted per process, so sketches saved by different runs wouldn't merge.
+    return int.from_bytes(blake2b(name.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HyperLogLog:
+    def __init__(self, precision: int = PRECISION, registers: np.ndarray = None):
+        """
+        A HyperLogLog sketch (Flajolet et al. 2007): estimates the number of distinct names added to it in a fixed amount of memory.
+
+        Parameters
+        ----------
+        precision: int (default=PRECISION)
+            Number of bits that pick a register (4 to 16). The sketch has 2^precision one-byte registers and a standard error of about 1.04 / sqrt(2^precision).
+        registers: np.ndarray (optional)
+            Registers to start from (e.g., see from_bytes).
+
+        Notes
+        -----
+        + Sketches of the same precision merge losslessly (see merge): the sketch of a month is the merge of the sketches of its hours.
+        """
+        assert 4 <= precision <= 16, "Precision must be between 4 and 16."
+        self.precision = precision
+        if registers is None:
+            registers = np.zeros(1 << precision, dtype=np.uint8)
+        self.registers = registers
+
+    def update(self, names: Iterable[str]) -> 'HyperLogLog':
+        """
+        Adds names (in place).
+
+        Returns
+        -------
+        HyperLogLog:
+            self
+        """
+        width = 64 - self.precision
+        mask = (1 << width) - 1
+        indices, ranks = [], []
+        for name in names:
+            hashed = _hash(name)
+            indices.append(hashed >> width)
+            # Position of the first 1 bit after the register bits.
+            ranks.append(width - (hashed & mask).bit_length() + 1)
+        if indices:
+            np.maximum.at(self.registers, np.array(indices, dtype=np.int64),
+                          np.array(ranks, dtype=np.uint8))
+        return self
+
+    def merge(self, other: 'HyperLogLog') -> 'HyperLogLog':
+        """
+        Adds the names of another sketch (in place).
+
+        Returns
+        -------
+        HyperLogLog:
+            self
+        """
+        assert self.precision == other.precision, "Can't merge sketches of different precisions."
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self) -> int:
+        """
+        Returns
+        -------
+        int:
+            Estimated number of distinct names. Small counts are estimated by linear counting.
+        """
+        num_registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / num_registers)
+        estimate = alpha * num_registers ** 2 / np.exp2(-self.registers.astype(np.float64)).sum()
+        num_zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * num_registers and num_zeros:
+            estimate = num_registers * np.log(num_registers / num_zeros)
+        return int(round(estimate))
+
+    def to_bytes(self) -> bytes:
+        return self.registers.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'HyperLogLog':
+        registers = np.frombuffer(data, dtype=np.uint8).copy()
+        return cls(int(len(registers)).bit_length() - 1, registers)
+
+
+class SketchStore:
+    def __init__(self, path: PathType = root.joinpath('data', 'sketches.sqlite'),
+                 precision: int = PRECISION):
+        """
+        Distinct-count sketches of the repositories and actors of every crawled hour, and of the periods made of them.
+
+        Parameters
+        ----------
+        path: PathType (default: {root}/data/sketches.sqlite)
+            The SQLite database file.
+        precision: int (default=PRECISION)
+            Precision of new sketches (see HyperLogLog).
+
+        Examples
+        --------
+        + sketches = SketchStore()
+          Crawler(start='2020-03-01 00:00', end='2020-03-31 23:00', sketches=sketches).save_events_as_csv()
+          sketches.count('2020-03-09 00:00', '2020-03-15 23:00', 'actors')
+          sketches.count_period('monthly', '2020-03', 'repos')
+
+        Notes
+        -----
+        + Daily, weekly, and monthly sketches are merged from the hourly ones when first queried and kept until one of their hours changes.
+        + A time range is answered from the daily sketches of its whole days and the hourly sketches of the hours at either end. The count tables are never read.
+        + A connection is opened per operation, like CrawlManifest.
+        """
+        self.path = Path(path)
+        self.precision = precision
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS hours (
+                    hour TEXT PRIMARY KEY,
+                    stamp TEXT NOT NULL,
+                    daily TEXT NOT NULL,
+                    weekly TEXT NOT NULL,
+                    monthly TEXT NOT NULL,
+                    repos BLOB NOT NULL,
+                    actors BLOB
+                )""")
+            for column in ('stamp', *PERIOD_FORMATS):
+                connection.execute(
+                    "CREATE INDEX IF NOT EXISTS hours_{0} ON hours ({0})".format(column))
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS periods (
+                    granularity TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    repos BLOB NOT NULL,
+                    actors BLOB NOT NULL,
+                    PRIMARY KEY (granularity, period)
+                )""")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=60)
+
+    def add(self, key: str, repos: Iterable[str], actors: Iterable[str] = None) -> None:
+        """
+        Saves the sketches of an hour, replacing any previous ones.
+
+        Parameters
+        ----------
+        key: str
+            The hour, formatted as YYYY-MM-DD-H.
+        repos: Iterable[str]
+            Repositories active in the hour (e.g., the index of its counts).
+        actors: Iterable[str] (optional)
+            Actors active in the hour. Hours saved without them are left out of actor counts.
+        """
+        timestamp = key2hour(key)
+        periods = [timestamp.strftime(period_format)
+                   for period_format in PERIOD_FORMATS.values()]
+        repos_sketch = HyperLogLog(self.precision).update(repos).to_bytes()
+        actors_sketch = None
+        if actors is not None:
+            actors_sketch = HyperLogLog(self.precision).update(actors).to_bytes()
+
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO hours VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, timestamp.strftime('%Y-%m-%dT%H'), *periods, repos_sketch,
+                 actors_sketch))
+            connection.executemany(
+                "DELETE FROM periods WHERE granularity = ? AND period = ?",
+                list(zip(PERIOD_FORMATS, periods)))
+
+    def keys(self) -> List[str]:
+        """
+        Returns
+        -------
+        List[str]:
+            The sketched hours, formatted as YYYY-MM-DD-H.
+        """
+        with closing(self._connect()) as connection:
+            return [hour for hour, in connection.execute(
+                "SELECT hour FROM hours ORDER BY stamp")]
+
+    def _merge(self, blobs: Iterable[bytes]) -> HyperLogLog:
+        sketch = HyperLogLog(self.precision)
+        for blob in blobs:
+            if blob is not None:
+                sketch.merge(HyperLogLog.from_bytes(blob))
+        return sketch
+
+    def period_sketch(self, granularity: str, period: str, kind: str = 'repos') -> HyperLogLog:
+        """
+        Parameters
+        ----------
+        granularity: str
+            'daily', 'weekly' or 'monthly'.
+        period: str
+            The period, e.g., '2020-03-12' (daily), '2020-W11' (weekly) or '2020-03' (monthly).
+        kind: str (default='repos')
+            'repos' or 'actors'.
+
+        Returns
+        -------
+        HyperLogLog:
+            The merge of the sketches of the period's hours (empty if none were sketched).
+        """
+        assert granularity in PERIOD_FORMATS, "Chosen granularity not 'daily', 'weekly', or 'monthly'."
+        assert kind in SKETCH_KINDS, "Chosen kind not 'repos' or 'actors'."
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT {} FROM periods WHERE granularity = ? AND period = ?".format(kind),
+                (granularity, period)).fetchone()
+            if row is not None:
+                return HyperLogLog.from_bytes(row[0])
+
+            hours = connection.execute(
+                "SELECT repos, actors FROM hours WHERE {} = ?".format(granularity),
+                (period,)).fetchall()
+            if not hours:
+                return HyperLogLog(self.precision)
+            sketches = dict(zip(SKETCH_KINDS, (self._merge(blobs) for blobs in zip(*hours))))
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO periods VALUES (?, ?, ?, ?)",
+                    (granularity, period, sketches['repos'].to_bytes(),
+                     sketches['actors'].to_bytes()))
+        return sketches[kind]
+
+    def count_period(self, granularity: str, period: str, kind: str = 'repos') -> int:
+        """
+        Returns
+        -------
+        int:
+            Estimated number of distinct repositories or actors of a period (see period_sketch).
+        """
+        return self.period_sketch(granularity, period, kind).count()
+
+    def count(self, start: Union[datetime, str], end: Union[datetime, str],
+              kind: str = 'repos') -> int:
+        """
+        Estimates the number of distinct repositories or actors from start to end.
+
+        Parameters
+        ----------
+        start: datetime or str
+            First hour, e.g., '2020-03-14 18:00'.
+        end: datetime or str
+            Last hour (inclusive), e.g., '2020-04-02 06:00'.
+        kind: str (default='repos')
+            'repos' or 'actors'.
+
+        Returns
+        -------
+        int:
+            Estimated number of distinct names over the sketched hours of the range.
+        """
+        assert kind in SKETCH_KINDS, "Chosen kind not 'repos' or 'actors'."
+        start, end = to_hour(start), to_hour(end)
+        first_day = start.date() if start.hour == 0 else start.date() + timedelta(days=1)
+        last_day = end.date() if end.hour == 23 else end.date() - timedelta(days=1)
+        first_day, last_day = first_day.isoformat(), last_day.isoformat()
+
+        with closing(self._connect()) as connection:
+            days = [day for day, in connection.execute(
+                "SELECT DISTINCT daily FROM hours WHERE daily BETWEEN ? AND ?",
+                (first_day, last_day))]
+            edges = [blob for blob, in connection.execute(
+                "SELECT {} FROM hours WHERE stamp BETWEEN ? AND ? "
+                "AND daily NOT BETWEEN ? AND ?".format(kind),
+                (start.strftime('%Y-%m-%dT%H'), end.strftime('%Y-%m-%dT%H'),
+                 first_day, last_day))]
+
+        sketch = self._merge(edges)
+        for day in days:
+            sketch.merge(self.period_sketch('daily', day, kind))
+        return sketch.count()
@@ -0,0 +1,410 @@
+import os
+import sys
+import sqlite3
+import logging
+import pandas as pd
+from abc import ABC, abstractmethod
+from datetime import datetime
+from contextlib import closing
+from pathlib import Path, PosixPath
+from typing import List, Tuple, Union, NewType, Iterable, Iterator
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # Only the ParquetStore needs pyarrow.
+    pa = None
+
+# Logging Config
+logging.basicConfig(format='[+] %(message)s', level=logging.INFO)
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+# Common types used here.
+PandasDataFrame = NewType('PandasDataFrame', pd.core.frame.DataFrame)
+PathType = NewType('Path', PosixPath)
+Filters = List[Tuple[str, str, object]]
+
+# Name of the index of a store, under its path.
+INDEX_NAME = '_hours.sqlite'
+
+
+def _is_hourly_key(key: str) -> bool:
+    """
+    Checks if a key is a valid GH Archive hour (formatted as YYYY-MM-DD-H).
+    """
+    try:
+        datetime.strptime(key, "%Y-%m-%d-%H")
+    except ValueError:  # This catches and ignores invalid dates.
+        return False
+    return True
+
+
+def _has_flat_hours(path: PathType) -> bool:
+    """
+    Checks if a directory has hours in the flat layout (YYYY-MM-DD-H.csv).
+    """
+    return any(_is_hourly_key(flat_file.stem) for flat_file in Path(path).glob('*.csv'))
+
+
+def partition_path(path: PathType, key: str) -> PathType:
+    """
+    The year=YYYY/month=MM/day=DD directory of an hour under path.
+    """
+    timestamp = datetime.strptime(key, "%Y-%m-%d-%H")
+    return path.joinpath('year={:04d}'.format(timestamp.year),
+                         'month={:02d}'.format(timestamp.month),
+                         'day={:02d}'.format(timestamp.day))
+
+
+class HourIndex:
+    def __init__(self, path: PathType):
+        """
+        A persisted list of the hours in a store, so that selecting a day or a month is a lookup instead of a directory scan.
+
+        Parameters
+        ----------
+        path: PathType
+            The SQLite database file. Its name starts with '_', so pyarrow datasets skip it.
+
+        Notes
+        -----
+        + A connection is opened per operation, so crawl workers in other processes can add hours concurrently.
+        """
+        self.path = Path(path)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(str(self.path), timeout=60)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS hours (hour TEXT PRIMARY KEY)")
+        return connection
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def add(self, *keys: str) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("INSERT OR IGNORE INTO hours VALUES (?)",
+                                   [(key,) for key in keys])
+
+    def rebuild(self, keys: Iterable[str]) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM hours")
+            connection.executemany("INSERT OR IGNORE INTO hours VALUES (?)",
+                                   [(key,) for key in keys])
+
+    def keys(self, date_match: str = None) -> List[str]:
+        """
+        Parameters
+        ----------
+        date_match: str (optional)
+            Only list hours that start with this date (YYYY, YYYY-MM or YYYY-MM-DD).
+
+        Returns
+        -------
+        List[str]:
+            Hours formatted as YYYY-MM-DD-H.
+        """
+        prefix = date_match or ''
+        with closing(self._connect()) as connection:
+            return [hour for hour, in connection.execute(
+                "SELECT hour FROM hours WHERE hour >= ? AND hour < ? ORDER BY hour",
+                (prefix, prefix + '\uffff'))]
+
+
+class _IndexedStore(ABC):
+    """
+    Lists the hours of a store from its HourIndex. Subclasses define where an hour is saved.
+    """
+    pattern = None  # Glob of the saved hours, relative to the store's path.
+
+    def __init__(self, path: PathType):
+        self.path = Path(path)
+        self.index = HourIndex(self.path.joinpath(INDEX_NAME))
+
+    @abstractmethod
+    def location(self, key: str) -> PathType:
+        """
+        The file (or directory) an hour is saved in.
+
+        Parameters
+        ----------
+        key: str
+            Hour formatted as YYYY-MM-DD-H.
+        """
+
+    def reindex(self) -> None:
+        """
+        Rebuilds the index from the files on disk (e.g., after files were added or deleted by hand).
+
+        Raises
+        ------
+        ValueError:
+            If the store is partitioned but has hours in the flat layout (see _check_layout).
+        """
+        self._check_layout()
+        self.index.rebuild(hourly_data.stem for hourly_data in self.path.glob(self.pattern)
+                           if _is_hourly_key(hourly_data.stem))
+
+    def _check_layout(self) -> None:
+        # A partitioned store doesn't see flat hours, so listing it would silently leave them out.
+        if self.pattern != '*.csv' and _has_flat_hours(self.path):
+            raise ValueError(
+                "{0} has hours in the flat layout (YYYY-MM-DD-H.csv) that a partitioned store "
+                "doesn't see. Move them with migrate_flat_store "
+                "(python src/crawler/storage.py {0}).".format(self.path))
+
+    def _add_to_index(self, key: str) -> None:
+        if self.index.exists():
+            self.index.add(key)
+        else:  # The store predates its index. The new hour is picked up by the scan.
+            self.reindex()
+
+    def keys(self, date_match: str = None) -> Iterator[str]:
+        """
+        Lists the stored hours. The index is built on first use.
+
+        Parameters
+        ----------
+        date_match: str (optional)
+            Only list hours that start with this date (YYYY, YYYY-MM or YYYY-MM-DD).
+
+        Yields
+        ------
+        str:
+            Hour formatted as YYYY-MM-DD-H.
+
+        Raises
+        ------
+        ValueError:
+            If the store is partitioned but has hours in the flat layout.
+        """
+        if not self.path.exists():
+            return
+        if not self.index.exists():
+            self.reindex()
+        else:
+            self._check_layout()
+        yield from self.index.keys(date_match)
+
+
+class CSVStore(_IndexedStore):
+    def __init__(self, path: PathType = root.joinpath('data', 'hourly'),
+                 partitioned: bool = None):
+        """
+        Stores hourly event counts as one CSV file per hour.
+
+        Parameters
+        ----------
+        path: PathType (default: {root}/data/hourly)
+            Directory of the CSV files.
+        partitioned: bool (optional)
+            If True, an hour is saved to {path}/year=YYYY/month=MM/day=DD/YYYY-MM-DD-H.csv. If False, to {path}/YYYY-MM-DD-H.csv (the original layout, see migrate_flat_store). By default, a directory that only holds flat hours keeps the flat layout, and any other directory is partitioned.
+        """
+        super().__init__(path)
+        if partitioned is None:
+            partitioned = not _has_flat_hours(self.path) or \
+                next(self.path.glob('year=*'), None) is not None
+            if not partitioned:
+                logging.info(" Storage: Reading {} in the flat layout. Move it with migrate_flat_store.".format(
+                    self.path))
+        self.partitioned = partitioned
+        self.pattern = 'year=*/month=*/day=*/*.csv' if partitioned else '*.csv'
+        if not partitioned and self.index.exists():
+            # The index may have been built while the store was read as partitioned.
+            self.reindex()
+
+    def location(self, key: str) -> PathType:
+        """
+        The file of an hour.
+        """
+        if self.partitioned:
+            return partition_path(self.path, key).joinpath(key + '.csv')
+        return self.path.joinpath(key + '.csv')
+
+    def write(self, key: str, data_df: PandasDataFrame) -> PathType:
+        save_location = self.location(key)
+        save_location.parent.mkdir(parents=True, exist_ok=True)
+        data_df.to_csv(save_location, index_label="Repository")
+        self._add_to_index(key)
+        return save_location
+
+    def read(self, key: str, columns: List[str] = None) -> PandasDataFrame:
+        """
+        Reads the counts of one hour.
+
+        Parameters
+        ----------
+        key: str
+            Hour formatted as YYYY-MM-DD-H.
+        columns: List[str] (optional)
+            Event columns to read. All by default.
+
+        Returns
+        -------
+        PandasDataFrame:
+            Event counts indexed by repository.
+        """
+        usecols = None if columns is None else ['Repository'] + list(columns)
+        return pd.read_csv(self.location(key), index_col=0, usecols=usecols)
+
+
+class ParquetStore(_IndexedStore):
+    pattern = 'year=*/month=*/day=*/*.parquet'
+
+    def __init__(self, path: PathType = root.joinpath('data', 'parquet')):
+        """
+        Stores hourly event counts in Parquet, partitioned by year, month, and day.
+
+        Parameters
+        ----------
+        path: PathType (default: {root}/data/parquet)
+            Root directory of the dataset.
+
+        Notes
+        -----
+        + An hour is saved to {path}/year=YYYY/month=MM/day=DD/YYYY-MM-DD-H.parquet.
+        + Repository names are dictionary encoded and counts are stored as int64, so nothing is re-parsed from text on read.
+        + Reads support column projection and predicate pushdown (e.g., filters=[('CommitEvent', '>', 0)]).
+        """
+        if pa is None:
+            raise ImportError("ParquetStore requires pyarrow (pip install pyarrow).")
+        super().__init__(path)
+
+    def location(self, key: str) -> PathType:
+        """
+        The file of an hour.
+        """
+        return partition_path(self.path, key).joinpath(key + '.parquet')
+
+    def write(self, key: str, data_df: PandasDataFrame) -> PathType:
+        save_location = self.location(key)
+        save_location.parent.mkdir(parents=True, exist_ok=True)
+        data_df = data_df.fillna(0).astype('int64')
+        data_df.index = pd.CategoricalIndex(data_df.index, name='Repository')
+        table = pa.Table.from_pandas(data_df.reset_index(), preserve_index=False)
+        pq.write_table(table, save_location)
+        self._add_to_index(key)
+        return save_location
+
+    def read(self, key: str, columns: List[str] = None,
+             filters: Filters = None) -> PandasDataFrame:
+        """
+        Reads the counts of one hour.
+
+        Parameters
+        ----------
+        key: str
+            Hour formatted as YYYY-MM-DD-H.
+        columns: List[str] (optional)
+            Event columns to read. All by default.
+        filters: List(Tuple(str, str, object)) (optional)
+            Row predicates pushed down to the Parquet reader, e.g., [('CommitEvent', '>', 0)].
+
+        Returns
+        -------
+        PandasDataFrame:
+            Event counts indexed by repository.
+        """
+        columns = None if columns is None else ['Repository'] + list(columns)
+        table = pq.read_table(self.location(key), columns=columns, filters=filters)
+        return self._to_pandas(table)
+
+    def scan(self, columns: List[str] = None,
+             filters: Filters = None) -> PandasDataFrame:
+        """
+        Reads many hours at once, e.g., a month with filters=[('year', '=', 2020), ('month', '=', 3)].
+
+        Filters on year, month, and day prune whole partitions. Filters on event columns are pushed down to the row groups.
+
+        Parameters
+        ----------
+        columns: List[str] (optional)
+            Event columns to read. All by default.
+        filters: List(Tuple(str, str, object)) (optional)
+            Partition and row predicates.
+
+        Returns
+        -------
+        PandasDataFrame:
+            Event counts of the matching hours indexed by repository (one row per repository and hour) with year, month, and day columns.
+        """
+        dataset = ds.dataset(self.path, format='parquet', partitioning='hive')
+        # Hours don't always see the same events. Unify their schemas so no column is lost.
+        schema = pa.unify_schemas(
+            [dataset.schema] +
+            [fragment.physical_schema for fragment in dataset.get_fragments()])
+        dataset = ds.dataset(self.path, format='parquet', partitioning='hive',
+                             schema=schema)
+        if columns is not None:
+            columns = ['Repository'] + list(columns) + ['year', 'month', 'day']
+        expression = None
+        if filters:
+            expression = pq.filters_to_expression(filters)
+        table = dataset.to_table(columns=columns, filter=expression)
+        return self._to_pandas(table)
+
+    @staticmethod
+    def _to_pandas(table) -> PandasDataFrame:
+        data_df = table.to_pandas().set_index('Repository')
+        data_df.index = data_df.index.astype(str)
+        return data_df.fillna(0)
+
+
+def migrate_flat_store(flat_path: PathType,
+                       store: Union[CSVStore, ParquetStore]) -> int:
+    """
+    Moves the hourly CSV files of a flat directory (the original layout) into a store.
+
+    Parameters
+    ----------
+    flat_path: PathType
+        Directory of the YYYY-MM-DD-H.csv files. It may be the store's own path.
+    store: CSVStore or ParquetStore
+        Where the hours go (a CSVStore must be partitioned). CSV files are moved into their partitions. For a ParquetStore, they are converted and deleted.
+
+    Returns
+    -------
+    int:
+        Number of hours migrated.
+
+    Examples
+    --------
+    + python src/crawler/storage.py data/hourly
+    """
+    assert not isinstance(store, CSVStore) or store.partitioned, \
+        "Migrate into a partitioned store, e.g., CSVStore(path, partitioned=True)."
+    migrated = []
+    for flat_file in Path(flat_path).glob('*.csv'):
+        key = flat_file.stem
+        if not _is_hourly_key(key):
+            continue
+        if isinstance(store, CSVStore):
+            target = store.location(key)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(flat_file, target)
+        else:
+            store.write(key, pd.read_csv(flat_file, index_col=0))
+            flat_file.unlink()
+        migrated.append(key)
+
+    if store.index.exists():
+        store.index.add(*migrated)
+    else:
+        store.reindex()
+    logging.info(" Storage: Migrated {} hours from {} to {}".format(
+        len(migrated), flat_path, store.path))
+    return len(migrated)
+
+
+if __name__ == "__main__":
+    # Usage: python src/crawler/storage.py FLAT_PATH [STORE_PATH]
+    flat_path = Path(sys.argv[1])
+    migrate_flat_store(flat_path, CSVStore(Path(sys.argv[2]) if len(sys.argv) > 2 else flat_path,
+                                           partitioned=True))
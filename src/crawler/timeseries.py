@@ -0,0 +1,302 @@
+import os
+import sys
+import json
+import logging
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from pathlib import Path, PosixPath
+from typing import List, Union, NewType
+
+# Logging Config
+logging.basicConfig(format='[+] %(message)s', level=logging.INFO)
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+# Common types used here.
+PandasSeries = NewType('PandasSeries', pd.core.series.Series)
+PathType = NewType('Path', PosixPath)
+Day = Union[date, str]
+Repos = Union[str, List[str]]
+
+# Largest index build writes by default: 8 GiB.
+MAX_INDEX_BYTES = 8 * 1024 ** 3
+
+
+def _to_day(day: Day) -> date:
+    return day if isinstance(day, date) else date.fromisoformat(day)
+
+
+class PrefixSumIndex:
+    def __init__(self, path: PathType = root.joinpath('data', 'prefix_index')):
+        """
+        Cumulative daily counts of every repository, memory-mapped from disk, for window sums in constant time.
+
+        Parameters
+        ----------
+        path: PathType (default: {root}/data/prefix_index)
+            Directory of the index (see build).
+
+        Examples
+        --------
+        + PrefixSumIndex.build(root.joinpath('data'))
+          index = PrefixSumIndex()
+          index.window_sum('a/b', '2020-03-01', '2020-03-07', 'CommitEvent')
+          index.rolling('a/b', 7, 'CommitEvent', start='2020-01-01', end='2020-12-31')
+
+        Notes
+        -----
+        + Every column is a (days + 1) x repositories int64 array saved as {column}.npy, i.e., 8 * (days + 1) * repositories bytes: a year of a million repositories takes about 3 GB per column. Restrict what is indexed for long ranges (see build). Row d holds the counts of the days before day d, so the sum over days t0 to t1 is row t1 + 1 minus row t0: two reads, however long the window.
+        + Rows are days, so building the index writes one contiguous row per day and a window query over many repositories reads two rows.
+        + Days without a daily aggregate count as zeros.
+        """
+        self.path = Path(path)
+        with open(self.path.joinpath('meta.json')) as meta_file:
+            meta = json.load(meta_file)
+        self.start = date.fromisoformat(meta['start'])
+        self.num_days = meta['num_days']
+        self.columns = meta['columns']
+        with open(self.path.joinpath('repos.txt')) as repos_file:
+            self.repos = repos_file.read().splitlines()
+        self.repo_ids = {repo: repo_id for repo_id, repo in enumerate(self.repos)}
+        self._prefix = dict()
+
+    @staticmethod
+    def build(data_path: PathType = root.joinpath('data'),
+              path: PathType = root.joinpath('data', 'prefix_index'),
+              columns: List[str] = None, repos: Union[List[str], int] = None,
+              max_bytes: int = MAX_INDEX_BYTES) -> PathType:
+        """
+        Builds the index from the daily aggregates of Agglomerate ({data_path}/daily/YYYY-MM-DD.csv).
+
+        Parameters
+        ----------
+        data_path: PathType (default: {root}/data)
+            Where Agglomerate saved its aggregates.
+        path: PathType (default: {root}/data/prefix_index)
+            Directory of the index. An existing index is replaced.
+        columns: List[str] (optional)
+            Columns to index. By default, every column of any daily aggregate.
+        repos: List[str] or int (optional)
+            Repositories to index: a list of names, or K for the K repositories with the most events (TotalEvents, or the sum of the columns of aggregates without it). By default, every repository of any daily aggregate.
+        max_bytes: int (default=MAX_INDEX_BYTES)
+            Largest index to build. Bigger ones are refused rather than filling the disk.
+
+        Returns
+        -------
+        PathType:
+            The directory of the index.
+        """
+        daily_paths = {daily_path.stem: daily_path
+                       for daily_path in Path(data_path).joinpath('daily').glob('*.csv')}
+        assert daily_paths, "No daily aggregates in {}. Run Agglomerate.hourly2daily first.".format(data_path)
+        days = sorted(daily_paths)
+        start, end = _to_day(days[0]), _to_day(days[-1])
+        num_days = (end - start).days + 1
+
+        # First pass: the repositories (and their activity, to pick the top K) and columns of every day.
+        repo_ids, all_columns = dict(), dict()
+        activity = pd.Series(dtype=np.int64)
+        for day in days:
+            if isinstance(repos, int):
+                daily_df = pd.read_csv(daily_paths[day], index_col=0)
+                daily_df.index = daily_df.index.astype(str)
+                all_columns.update(dict.fromkeys(daily_df.columns))
+                events = daily_df['TotalEvents'] if 'TotalEvents' in daily_df.columns \
+                    else daily_df.sum(axis=1, numeric_only=True)
+                activity = activity.add(events.fillna(0).astype(np.int64), fill_value=0)
+                continue
+            header = pd.read_csv(daily_paths[day], index_col=0, nrows=0)
+            all_columns.update(dict.fromkeys(header.columns))
+            if repos is None:
+                for repo in pd.read_csv(daily_paths[day], usecols=[0]).iloc[:, 0].astype(str):
+                    if repo not in repo_ids:
+                        repo_ids[repo] = len(repo_ids)
+        if isinstance(repos, int):
+            repos = activity.sort_values(ascending=False, kind='stable').index[:repos]
+        if repos is not None:
+            repo_ids = {repo: repo_id for repo_id, repo in enumerate(dict.fromkeys(repos))}
+        columns = list(columns or all_columns)
+
+        num_bytes = 8 * (num_days + 1) * len(repo_ids) * len(columns)
+        assert num_bytes <= max_bytes, (
+            "The index would take {:.1f} GiB ({} repositories x {} days x {} columns). "
+            "Index fewer repos or columns, or raise max_bytes.".format(
+                num_bytes / 1024 ** 3, len(repo_ids), num_days, len(columns)))
+
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        prefix = {column: np.lib.format.open_memmap(
+            path.joinpath('{}.npy'.format(column)), mode='w+', dtype=np.int64,
+            shape=(num_days + 1, len(repo_ids))) for column in columns}
+        totals = {column: np.zeros(len(repo_ids), dtype=np.int64) for column in columns}
+        for column in columns:
+            prefix[column][0] = 0
+
+        # Second pass: one row per day, in order.
+        for offset in range(num_days):
+            day = (start + timedelta(days=offset)).isoformat()
+            if day in daily_paths:
+                daily_df = pd.read_csv(daily_paths[day], index_col=0)
+                ids = np.fromiter((repo_ids.get(repo, -1) for repo in daily_df.index.astype(str)),
+                                  dtype=np.int64, count=len(daily_df))
+                indexed = ids >= 0
+                for column in columns:
+                    if column in daily_df.columns:
+                        np.add.at(totals[column], ids[indexed],
+                                  daily_df[column].fillna(0).to_numpy(dtype=np.int64)[indexed])
+            for column in columns:
+                prefix[column][offset + 1] = totals[column]
+
+        for column in columns:
+            prefix[column].flush()
+        with open(path.joinpath('repos.txt'), 'w') as repos_file:
+            repos_file.write('\n'.join(repo_ids) + '\n')
+        with open(path.joinpath('meta.json'), 'w') as meta_file:
+            json.dump({'start': start.isoformat(), 'num_days': num_days,
+                       'columns': columns}, meta_file)
+        logging.info(" Prefix index: {} repositories x {} days x {} columns in {}".format(
+            len(repo_ids), num_days, len(columns), path))
+        return path
+
+    def prefix(self, column: str) -> np.memmap:
+        """
+        Returns
+        -------
+        np.memmap:
+            The (days + 1) x repositories cumulative counts of a column.
+        """
+        if column not in self._prefix:
+            assert column in self.columns, "{} is not indexed. Choose from {}.".format(
+                column, self.columns)
+            self._prefix[column] = np.load(self.path.joinpath('{}.npy'.format(column)),
+                                           mmap_mode='r')
+        return self._prefix[column]
+
+    def _row(self, day: Day) -> int:
+        # Days outside the index are clipped to it.
+        return min(max((_to_day(day) - self.start).days, 0), self.num_days)
+
+    def _ids(self, repos: Repos) -> np.ndarray:
+        return np.array([self.repo_ids[repo] for repo in repos], dtype=np.int64)
+
+    def window_sum(self, repos: Repos, start: Day, end: Day,
+                   column: str = 'TotalEvents') -> Union[int, np.ndarray]:
+        """
+        Sums the counts of some repositories from start to end (both inclusive).
+
+        Parameters
+        ----------
+        repos: str or List[str]
+            A repository or a list of repositories.
+        start: date or str
+            First day, e.g., '2020-03-01'.
+        end: date or str
+            Last day, e.g., '2020-03-07'.
+        column: str (default='TotalEvents')
+            Column to sum, e.g., 'CommitEvent'.
+
+        Returns
+        -------
+        int or np.ndarray:
+            The sum for a repository, or the sums of a list of repositories.
+
+        Raises
+        ------
+        KeyError:
+            If a repository isn't in the index.
+        """
+        assert _to_day(start) <= _to_day(end), "The window starts after it ends."
+        prefix = self.prefix(column)
+        first, last = self._row(start), self._row(_to_day(end) + timedelta(days=1))
+        if isinstance(repos, str):
+            repo_id = self.repo_ids[repos]
+            return int(prefix[last, repo_id] - prefix[first, repo_id])
+        ids = self._ids(repos)
+        return prefix[last, ids] - prefix[first, ids]
+
+    def rolling(self, repo: str, window: int, column: str = 'TotalEvents',
+                start: Day = None, end: Day = None) -> PandasSeries:
+        """
+        Sums of a repository over the window days up to (and including) every day from start to end.
+
+        Parameters
+        ----------
+        repo: str
+            The repository.
+        window: int
+            Number of days in the window, e.g., 7 for a week.
+        column: str (default='TotalEvents')
+            Column to sum, e.g., 'CommitEvent'.
+        start: date or str (optional)
+            First day. By default, the first day of the index.
+        end: date or str (optional)
+            Last day. By default, the last day of the index.
+
+        Returns
+        -------
+        PandasSeries:
+            The sums indexed by day.
+        """
+        first = self._row(start) if start is not None else 0
+        last = min(self._row(end), self.num_days - 1) if end is not None else self.num_days - 1
+        history = np.asarray(self.prefix(column)[:, self.repo_ids[repo]])
+        rows = np.arange(first, last + 1)
+        sums = history[rows + 1] - history[np.maximum(rows + 1 - window, 0)]
+        return pd.Series(sums, name=column, index=pd.Index(
+            [(self.start + timedelta(days=int(row))).isoformat() for row in rows],
+            name='Date'))
+
+
+def main(argv: List[str] = None) -> None:
+    """
+    Examples
+    --------
+    + python src/crawler/timeseries.py build --data-path data
+    + python src/crawler/timeseries.py sum a/b c/d --start 2020-03-01 --end 2020-03-07 --column CommitEvent
+    + python src/crawler/timeseries.py rolling a/b --window 7 --column CommitEvent
+    """
+    parser = argparse.ArgumentParser(description="Prefix-sum index of the daily aggregates.")
+    parser.add_argument('--index-path', type=Path, default=root.joinpath('data', 'prefix_index'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    build = commands.add_parser('build', help="Build the index from the daily aggregates.")
+    build.add_argument('--data-path', type=Path, default=root.joinpath('data'))
+    build.add_argument('--columns', nargs='*')
+    build.add_argument('--repos', nargs='*', help="Repositories to index (default: all).")
+    build.add_argument('--top', type=int, help="Index the top K repositories instead.")
+    build.add_argument('--max-bytes', type=int, default=MAX_INDEX_BYTES)
+    window_sum = commands.add_parser('sum', help="Sum a window for some repositories.")
+    window_sum.add_argument('repos', nargs='+')
+    window_sum.add_argument('--start', required=True)
+    window_sum.add_argument('--end', required=True)
+    window_sum.add_argument('--column', default='TotalEvents')
+    rolling = commands.add_parser('rolling', help="Rolling window sums of a repository.")
+    rolling.add_argument('repo')
+    rolling.add_argument('--window', type=int, default=7)
+    rolling.add_argument('--column', default='TotalEvents')
+    rolling.add_argument('--start')
+    rolling.add_argument('--end')
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        PrefixSumIndex.build(args.data_path, args.index_path, args.columns,
+                             args.top if args.top is not None else args.repos, args.max_bytes)
+    elif args.command == 'sum':
+        sums = PrefixSumIndex(args.index_path).window_sum(args.repos, args.start, args.end,
+                                                          args.column)
+        for repo, total in zip(args.repos, sums):
+            print("{}\t{}".format(repo, total))
+    else:
+        print(PrefixSumIndex(args.index_path).rolling(
+            args.repo, args.window, args.column, args.start, args.end).to_csv(sep='\t'),
+            end='')
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,6 @@ import numpy
 import pandas as pd
 from pathlib import Path
 from ipdb import set_trace
-from functools import partial
-from pathos.multiprocessing import cpu_count, ProcessingPool
 
 import logging
 logging.basicConfig(format='[+] %(message)s', level=logging.INFO)
@@ -42,35 +40,10 @@ def _crawl_and_agglomerate(arg1, crawler_obj, agg_obj):
 
     return saved
 
-def _just_agglomerate(arg1, agg_obj):
-    """
-    Crawl GH Archive to get the list events.
-    """
-    chosen_month = "{year}-{month:02d}".format(**arg1)
-    
-    # Convert hourly csv files in root/data/hourly to monthly data
-    agg_obj.set_match_string(match_string=chosen_month)
-    agg_obj.hourly2monthly()
-
-
-def generate_date_time_range():
-    date_ranges = list()
-    for year in [2020, 2019]:
-        for month in range(1, 13):
-            for date in [(1, 31)]:
-                date_ranges.append(
-                    {"date": date, "month": month, "year": year})
-    return date_ranges
-
 
 if __name__ == "__main__":
-    num_cpu = max(16, cpu_count())
-    kwarg_list = generate_date_time_range()
-
-    crawler = Crawler()
     agg = Agglomerate()
 
-    par_deploy_func = partial(_just_agglomerate, agg_obj=agg)
-
-    with ProcessingPool(num_cpu) as p:
-        res = p.map(par_deploy_func, kwarg_list)
+    # Convert hourly csv files in root/data/hourly to monthly data, a month per worker.
+    # The pool is sized from the usable cores and the available memory.
+    agg.parallel_rollup(granularities=('monthly',))
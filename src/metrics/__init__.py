@@ -1 +1,4 @@
-from .metrics_getter import MetricsGetter
+from .metrics_getter import MetricsGetter, MetricsConsumer, CreateCountConsumer
+from .batch import EventTable, batch_metrics
+from .sink import MetricsSink
+from .lifecycle import LifecycleStore, LIFECYCLE_EVENTS
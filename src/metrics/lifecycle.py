@@ -0,0 +1,270 @@
+import os
+import sys
+import sqlite3
+import pandas as pd
+from datetime import datetime, timezone
+from contextlib import closing
+from pathlib import Path, PosixPath
+from typing import Dict, Union, NewType
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+# Common types used here.
+PandasSeries = NewType('PandasSeries', pd.core.series.Series)
+PathType = NewType('Path', PosixPath)
+
+# Kinds of tracked items, as stored.
+ISSUE, PULL_REQUEST = 0, 1
+KINDS = {'issue': ISSUE, 'pull_request': PULL_REQUEST}
+# Event types that update the store.
+LIFECYCLE_EVENTS = {'IssuesEvent', 'PullRequestEvent', 'IssueCommentEvent',
+                    'PullRequestReviewEvent', 'PullRequestReviewCommentEvent'}
+# Number of items updated in memory before they are written.
+BATCH_SIZE = 10000
+
+_UPSERT = """
+    INSERT INTO items VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (repo, kind, number) DO UPDATE SET
+        opened = COALESCE(excluded.opened, items.opened),
+        first_response = COALESCE(MIN(items.first_response, excluded.first_response),
+                                  items.first_response, excluded.first_response),
+        closed = CASE WHEN excluded.closed IS NOT NULL THEN excluded.closed
+                      WHEN ? THEN NULL ELSE items.closed END,
+        merged = CASE WHEN excluded.closed IS NOT NULL THEN excluded.merged
+                      WHEN ? THEN 0 ELSE items.merged END
+"""
+
+
+def _epoch(timestamp: str) -> Union[int, None]:
+    """
+    Seconds since the epoch of a GitHub timestamp (e.g., '2020-03-12T16:04:05Z'), or None.
+    """
+    if not timestamp:
+        return None
+    return int(datetime.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ").replace(
+        tzinfo=timezone.utc).timestamp())
+
+
+def _login(entity: Dict) -> Union[str, None]:
+    return (entity.get('user') or {}).get('login')
+
+
+class LifecycleStore:
+    def __init__(self, path: PathType = root.joinpath('data', 'lifecycle.sqlite'),
+                 batch_size: int = BATCH_SIZE):
+        """
+        The lifecycle of every issue and pull request seen so far: when it was opened, first responded to, and closed.
+
+        Parameters
+        ----------
+        path: PathType (default: {root}/data/lifecycle.sqlite)
+            The SQLite database file.
+        batch_size: int (default=BATCH_SIZE)
+            Number of items whose updates are kept in memory before they are written in one transaction.
+
+        Examples
+        --------
+        + lifecycle = LifecycleStore()
+          metrics_getter = MetricsGetter(event_set=LIFECYCLE_EVENTS, lifecycle=lifecycle)
+          metrics_getter.populate(crawler)
+          lifecycle.backlog('2020-12-31 23:00')
+          lifecycle.latency('pull_request', '2020-01-01', '2021-01-01')
+
+        Notes
+        -----
+        + An item is keyed by repository, kind, and number. It is a single row of integers (times in seconds since the epoch), so years of events fit on disk and memory only holds the pending batch.
+        + A first response is the earliest comment or review by someone other than the author.
+        + Events must be handled in order: a later close or reopen overrides an earlier one.
+        + A connection is opened per batch, like CrawlManifest.
+        + The updates of an hour can be undone until it is complete (see begin, commit and rollback), so an hour that fails midway leaves no trace.
+        """
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._pending = dict()
+        # Pending items as they were before the uncommitted updates (None if they weren't pending), or None outside of begin/commit.
+        self._journal = None
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("""
+                CREATE TABLE IF NOT EXISTS items (
+                    repo TEXT NOT NULL,
+                    kind INTEGER NOT NULL,
+                    number INTEGER NOT NULL,
+                    opened INTEGER,
+                    first_response INTEGER,
+                    closed INTEGER,
+                    merged INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (repo, kind, number)
+                ) WITHOUT ROWID""")
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=60)
+
+    def _item(self, repo: str, kind: int, number: int) -> Dict:
+        key = (repo, kind, number)
+        item = self._pending.get(key)
+        if self._journal is not None and key not in self._journal:
+            self._journal[key] = dict(item) if item is not None else None
+        if item is None:
+            if len(self._pending) >= self.batch_size and self._journal is None:
+                self.flush()
+            item = self._pending[key] = {'opened': None, 'first_response': None,
+                                         'closed': None, 'merged': False,
+                                         'reopened': False}
+        return item
+
+    def begin(self) -> None:
+        """
+        Starts keeping track of updates, so they can be undone (see rollback). Nothing is written until commit.
+        """
+        self._journal = dict()
+
+    def commit(self) -> None:
+        """
+        Keeps the updates since begin. They are written with the next batch.
+        """
+        self._journal = None
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def rollback(self) -> None:
+        """
+        Undoes the updates since begin.
+        """
+        for key, item in (self._journal or {}).items():
+            if item is None:
+                self._pending.pop(key, None)
+            else:
+                self._pending[key] = item
+        self._journal = None
+
+    def _open(self, repo: str, kind: int, number: int, opened: int) -> Dict:
+        item = self._item(repo, kind, number)
+        if opened is not None:
+            item['opened'] = opened
+        return item
+
+    def _respond(self, item: Dict, author: str, responder: str, responded: int) -> None:
+        if responded is None or responder is None or responder == author:
+            return
+        if item['first_response'] is None or responded < item['first_response']:
+            item['first_response'] = responded
+
+    def handle(self, data: Dict) -> None:
+        """
+        Updates the items an event is about. Events of other types are ignored.
+        """
+        event_type = data['type']
+        if event_type not in LIFECYCLE_EVENTS:
+            return
+        repo = data['repo']['name']
+        payload = data['payload']
+        action = payload.get('action')
+
+        if event_type in ('IssuesEvent', 'IssueCommentEvent'):
+            issue = payload['issue']
+            kind = PULL_REQUEST if issue.get('pull_request') else ISSUE
+            item = self._open(repo, kind, issue['number'], _epoch(issue.get('created_at')))
+            if event_type == 'IssueCommentEvent':
+                comment = payload['comment']
+                self._respond(item, _login(issue), _login(comment),
+                              _epoch(comment.get('created_at')))
+                # A comment carries the issue's state, so an issue closed before the crawl starts still gets closed.
+                if issue.get('state') == 'closed' and issue.get('closed_at'):
+                    item['closed'], item['reopened'] = _epoch(issue['closed_at']), False
+            elif action == 'closed':
+                item['closed'] = _epoch(issue.get('closed_at') or data.get('created_at'))
+                item['reopened'] = False
+            elif action == 'reopened':
+                item['closed'], item['reopened'] = None, True
+            return
+
+        pull_request = payload['pull_request']
+        item = self._open(repo, PULL_REQUEST, pull_request['number'],
+                          _epoch(pull_request.get('created_at')))
+        if event_type == 'PullRequestReviewEvent':
+            review = payload['review']
+            self._respond(item, _login(pull_request), _login(review),
+                          _epoch(review.get('submitted_at')))
+        elif event_type == 'PullRequestReviewCommentEvent':
+            comment = payload['comment']
+            self._respond(item, _login(pull_request), _login(comment),
+                          _epoch(comment.get('created_at')))
+        elif action == 'closed':
+            item['closed'] = _epoch(pull_request.get('closed_at') or data.get('created_at'))
+            item['merged'] = bool(pull_request.get('merged'))
+            item['reopened'] = False
+        elif action == 'reopened':
+            item['closed'], item['merged'], item['reopened'] = None, False, True
+
+    def flush(self) -> None:
+        """
+        Writes the pending updates in one transaction. Updates since begin are written too.
+        """
+        if not self._pending:
+            return
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(_UPSERT, [
+                (repo, kind, number, item['opened'], item['first_response'], item['closed'],
+                 int(item['merged']), item['reopened'], item['reopened'])
+                for (repo, kind, number), item in self._pending.items()])
+        self._pending.clear()
+
+    def backlog(self, at: Union[datetime, str], kind: str = 'issue') -> PandasSeries:
+        """
+        Parameters
+        ----------
+        at: datetime or str
+            The time, e.g., '2020-12-31 23:00' (UTC).
+        kind: str (default='issue')
+            'issue' or 'pull_request'.
+
+        Returns
+        -------
+        PandasSeries:
+            Number of items of every repository that were open at that time.
+        """
+        self.flush()
+        at = int(pd.Timestamp(at, tz='UTC').timestamp())
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT repo, COUNT(*) FROM items WHERE kind = ? AND opened <= ? "
+                "AND (closed IS NULL OR closed > ?) GROUP BY repo",
+                (KINDS[kind], at, at)).fetchall()
+        return pd.Series(dict(rows), name='Backlog', dtype='int64')
+
+    def latency(self, kind: str, start: Union[datetime, str], end: Union[datetime, str],
+                until: str = 'first_response') -> PandasSeries:
+        """
+        Parameters
+        ----------
+        kind: str
+            'issue' or 'pull_request'.
+        start: datetime or str
+            Only items opened from start (inclusive, UTC)...
+        end: datetime or str
+            ... to end (exclusive, UTC).
+        until: str (default='first_response')
+            'first_response' (time to first response, or review latency for pull requests) or 'closed' (time to close).
+
+        Returns
+        -------
+        PandasSeries:
+            The mean latency in hours of every repository, over the items that got there.
+        """
+        assert until in ('first_response', 'closed'), "Choose until from 'first_response' or 'closed'."
+        self.flush()
+        start = int(pd.Timestamp(start, tz='UTC').timestamp())
+        end = int(pd.Timestamp(end, tz='UTC').timestamp())
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT repo, AVG({0} - opened) / 3600.0 FROM items WHERE kind = ? "
+                "AND opened >= ? AND opened < ? AND {0} IS NOT NULL GROUP BY repo".format(until),
+                (KINDS[kind], start, end)).fetchall()
+        return pd.Series(dict(rows), name='Latency', dtype='float64')
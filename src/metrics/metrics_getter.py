@@ -1,17 +1,16 @@
 import os
 import sys
 import json
-import gzip
-import certifi
 import logging
 import requests
 import pandas as pd
-from io import BytesIO
+from copy import copy
 from ipdb import set_trace
 from datetime import datetime
 from itertools import product
-from urllib3 import PoolManager
 from collections import defaultdict
+from multiprocessing import get_context
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path, PosixPath
 from typing import Dict, Tuple, List, Union, NewType
 
@@ -26,6 +25,12 @@ if root.joinpath('src') not in sys.path:
     sys.path.append(str(root.joinpath('src')))
 
 from crawler import Crawler
+from crawler.event_bus import Consumer
+from utils import EventPrefilter, get_json_loads, hour2key, hour2url, url2hour
+
+from .batch import EventTable, batch_metrics
+from .sink import MetricsSink, is_sink_name
+from .lifecycle import LifecycleStore, LIFECYCLE_EVENTS
 
 # Common types used here.
 URL = NewType('URL', str)
@@ -38,11 +43,37 @@ DataCrawler = NewType('Crawler', Crawler)
 
 class MetricsGetter:
     def __init__(self, event_set: set = {
-            'PushEvent', 'IssuesEvent', 'PullRequestEvent'}):
+            'PushEvent', 'IssuesEvent', 'PullRequestEvent'},
+            json_backend: str = 'auto', batch: bool = False,
+            lifecycle: LifecycleStore = None):
+        """
+        Repository health metrics (e.g., CommitRate, IssueOpenRate, AvgIssueCloseTime) per repository and day.
+
+        Parameters
+        ----------
+        event_set: set
+            Event types to compute metrics from.
+        json_backend: str (default='auto')
+            JSON decoder to use (see get_json_loads).
+        batch: bool (default=False)
+            If True, the events of every hour are gathered into a columnar table and the metrics are computed with vectorized groupbys (see batch_metrics) instead of one event at a time. The results are the same.
+        lifecycle: LifecycleStore (optional)
+            If provided, it tracks every issue and pull request across hours (e.g., for backlogs and response times). The events it needs are added to event_set.
+        """
+        self.batch = batch
+        self.lifecycle = lifecycle
         self.data = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
         self.create_count = defaultdict(int)
 
         self.event_set = event_set
+        if lifecycle is not None:
+            self.event_set = set(event_set) | LIFECYCLE_EVENTS
+        # All repositories are usable until set_top_K_repos narrows them down.
+        self.top_N_repos = None
+
+        self.json_backend, self._loads = get_json_loads(json_backend)
+        logging.info(
+            " METRICS GETTER: Decoding JSON with {}".format(self.json_backend))
 
     def set_top_K_repos(self, K=10000) -> None:
         meta_data = pd.read_csv(root.joinpath(
@@ -75,15 +106,7 @@ class MetricsGetter:
         type = json_data["type"]
         if type in self.event_set:
             repo_name = json_data['repo']['name']
-            if repo_name in self.top_N_repos:
-                return True
-        return False
-    
-    def _is_event_usable(self, json_data):
-        type = json_data["type"]
-        if type in self.event_set:
-            repo_name = json_data['repo']['name']
-            if repo_name in self.top_N_repos:
+            if self.top_N_repos is None or repo_name in self.top_N_repos:
                 return True
         return False
 
@@ -140,13 +163,7 @@ class MetricsGetter:
 
         if action == 'closed':
             # An issue has been closed
-            # Update AvgIssueCloseTime
-            # Multiply Previous issueCloseTime to with IssueResolutionRate
-            prevAvgIssueCloseTime = self.data[repo][date]['AvgIssueCloseTime']
-            prevIssueResolveRate = self.data[repo][date]['IssueResolutionRate']
-            prevIssueCloseTime = prevAvgIssueCloseTime * prevIssueResolveRate
-
-            # Add current issue close time
+            # Add its close time to IssueCloseDays. AvgIssueCloseTime is derived from it (see metrics).
             issueCreateTime = datetime.strptime(
                 issue['created_at'], "%Y-%m-%dT%H:%M:%SZ")
 
@@ -157,19 +174,11 @@ class MetricsGetter:
                     issue['closed_at'], "%Y-%m-%dT%H:%M:%SZ")
 
             currentIssueCloseTime = issueRetireTime - issueCreateTime
-            currentIssueCloseTime = currentIssueCloseTime.days
-            currentIssueCloseTime += prevIssueCloseTime
+            self.data[repo][date]['IssueCloseDays'] += currentIssueCloseTime.days
 
             # Increment IssueResolutionRate
             self._update_data(repo, date, 'IssueResolutionRate')
 
-            # Divide current issueClosetime with current IssueResolutionRate
-            currentAvgIssueCloseTime = currentIssueCloseTime / \
-                self.data[repo][date]['IssueResolutionRate']
-
-            # Update Average Issue Close Time
-            self.data[repo][date]['AvgIssueCloseTime'] = currentAvgIssueCloseTime
-
             # Has a bug been closed?
             if 'bug' in issue_labels:
                 self._update_data(repo, date, 'BugCloseRate')
@@ -205,66 +214,395 @@ class MetricsGetter:
         if event_type == 'PushEvent':
             self._process_commit_event(data, date)
 
-    def _url2dictlist(self, mined_url: str) -> None:
-        https = PoolManager(cert_reqs='CERT_REQUIRED',
-                            ca_certs=certifi.where())
-        full_date = mined_url[mined_url.rfind("/") + 1:].split(".")[0]
-        date = datetime.strptime(full_date, "%Y-%m-%d-%H").strftime("%m-%d-%Y")
-        try:
-            response = https.request('GET', mined_url)
-            compressed_json = BytesIO(response.data)
-            with gzip.GzipFile(fileobj=compressed_json) as json_bytes:
-                json_str = json_bytes.read().decode('utf-8')
-                for json_value in json_str.split('\n'):
-                    if self._is_valid_json(json_value):
-                        data = json.loads(json_value)
-                        self._process_create_event(data, date)
-                        # if self._is_event_usable(data):
-                        #     self._process_event(data, date)
-        except OSError:
-            pass
-
-    def populate(self, crawler: DataCrawler, save_name: str = ""):
-        processed_date = set()
-        for mined_url in crawler._daterange2url():
-            full_date = mined_url[mined_url.rfind("/") + 1:].split(".")[0]
-            try:
-                date = datetime.strptime(
-                    full_date, "%Y-%m-%d-%H").strftime("%m-%d-%Y")
-                if date not in processed_date:
-                    processed_date.add(date)
-                    logging.info(
-                        " METRICS GETTER: Processing date {}".format(date))
-                all_events = self._url2dictlist(mined_url)
-            except ValueError:
-                # Date is invalid. Skip.
-                pass
+    def _process_batch(self, table: EventTable, date: str) -> None:
+        """
+        Adds the metrics of a batch of events (see batch_metrics) to those of the date.
+        """
+        for repo, metrics in batch_metrics(table.to_dataframe()).items():
+            day_data = self.data[repo][date]
+            for metric, value in metrics.items():
+                day_data[metric] += value
 
-        if save_name:
-            print(json.dumps(self.data, indent=2),
-                  file=open(root.joinpath("data", "metrics", save_name), 'w+'))
+    def _scratch(self) -> 'MetricsGetter':
+        """
+        An empty MetricsGetter with the same settings and no lifecycle, that gathers the metrics of one hour until it is known to be complete.
+        """
+        scratch = copy(self)
+        scratch.data = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        scratch.create_count = defaultdict(int)
+        scratch.lifecycle = None
+        return scratch
+
+    def _url2dictlist(self, mined_url: str, crawler: DataCrawler,
+                      count_creates: bool = False) -> None:
+        full_date = crawler._url2key(mined_url)
+        date = url2hour(mined_url).strftime("%m-%d-%Y")
+        # Skip the lines we don't need before they are decoded.
+        if count_creates:
+            prefilter = EventPrefilter({'RepositoryEvent'})
         else:
-            print(json.dumps(self.data, indent=2))
-
-    def populate_create_counts(self, crawler: DataCrawler, save_name: str = ""):
+            prefilter = EventPrefilter(self.event_set, self.top_N_repos)
+
+        # An hour counts fully or not at all: it is gathered apart and only merged once it was read to the end.
+        hour = self._scratch()
+        if self.lifecycle is not None:
+            self.lifecycle.begin()
+        stats = dict()
+        table = EventTable() if self.batch and not count_creates else None
+        for data in crawler._iter_archive(mined_url, prefilter, self._loads, stats=stats):
+            if count_creates:
+                hour._process_create_event(data, date)
+            elif self._is_event_usable(data):
+                if self.lifecycle is not None:
+                    self.lifecycle.handle(data)
+                if table is not None:
+                    table.append(data)
+                else:
+                    hour._process_event(data, date)
+        if 'error' in stats:
+            logging.info(" METRICS GETTER: Skipping {} ({})".format(full_date, stats['error']))
+            if self.lifecycle is not None:
+                self.lifecycle.rollback()
+            return
+        if table is not None:
+            hour._process_batch(table, date)
+        self.merge(hour.state())
+        if self.lifecycle is not None:
+            self.lifecycle.commit()
+
+        logging.info(" METRICS GETTER: {} parsed {} lines, skipped {} lines".format(
+            full_date, prefilter.parsed, prefilter.skipped))
+
+    def _process_hours(self, crawler: DataCrawler, count_creates: bool = False,
+                       sink: MetricsSink = None) -> None:
+        """
+        Processes the crawler's hours in order. With a sink, every day is written and freed as soon as the next one starts.
+        """
         processed_date = set()
-        for mined_url in crawler._daterange2url():
-            full_date = mined_url[mined_url.rfind("/") + 1:].split(".")[0]
-            try:
-                date = datetime.strptime(
-                    full_date, "%Y-%m-%d-%H").strftime("%m-%d-%Y")
-                if date not in processed_date:
-                    processed_date.add(date)
-                    logging.info(
-                        " METRICS GETTER: Processing date {}".format(date))
-                all_events = self._url2dictlist(mined_url)
-            except ValueError:
-                # Date is invalid. Skip.
-                pass
+        previous_date = None
+        # The crawler only generates hours that exist, so there's nothing to skip.
+        for timestamp in crawler._daterange2hours():
+            date = timestamp.strftime("%m-%d-%Y")
+            if date not in processed_date:
+                processed_date.add(date)
+                logging.info(
+                    " METRICS GETTER: Processing date {}".format(date))
+                if sink is not None and previous_date is not None:
+                    self._flush_day(previous_date, sink)
+                previous_date = date
+            self._url2dictlist(hour2url(timestamp), crawler, count_creates)
+        if self.lifecycle is not None:
+            self.lifecycle.flush()
+
+    def state(self) -> Dict:
+        """
+        The partial aggregates of the hours processed so far.
+
+        Returns
+        -------
+        Dict:
+            'data' (metrics per repository and date) and 'create_count' (creations per date). Both only hold sums and counts, e.g., IssueCloseDays and IssueResolutionRate rather than AvgIssueCloseTime, so the states of disjoint sets of hours merge by addition (see merge).
+        """
+        return {'data': {repo: {date: dict(metrics) for date, metrics in dates.items()}
+                         for repo, dates in self.data.items()},
+                'create_count': dict(self.create_count)}
+
+    def merge(self, state: Dict) -> 'MetricsGetter':
+        """
+        Adds the partial aggregates of other hours (in place). Merging is associative and commutative, so states can be combined in any order.
+
+        Parameters
+        ----------
+        state: Dict
+            See state.
+
+        Returns
+        -------
+        MetricsGetter:
+            self
+        """
+        for repo, dates in state['data'].items():
+            for date, metrics in dates.items():
+                day_data = self.data[repo][date]
+                for metric, value in metrics.items():
+                    day_data[metric] += value
+        for date, count in state['create_count'].items():
+            self.create_count[date] += count
+        return self
+
+    def save_state(self, state_path: Path) -> None:
+        with open(state_path, 'w') as state_file:
+            json.dump(self.state(), state_file)
+
+    def load_state(self, state_path: Path) -> 'MetricsGetter':
+        """
+        Merges a state saved by save_state (e.g., by another process or machine).
+        """
+        with open(state_path) as state_file:
+            return self.merge(json.load(state_file))
 
+    def metrics(self) -> Dict:
+        """
+        Returns
+        -------
+        Dict:
+            The metrics per repository and date, with AvgIssueCloseTime instead of IssueCloseDays.
+        """
+        return {repo: {date: self._derive(day_data) for date, day_data in dates.items()}
+                for repo, dates in self.data.items()}
+
+    @staticmethod
+    def _derive(day_data: Dict) -> Dict:
+        day_metrics = dict(day_data)
+        close_days = day_metrics.pop('IssueCloseDays', None)
+        if close_days is not None:
+            day_metrics['AvgIssueCloseTime'] = close_days / day_metrics['IssueResolutionRate']
+        return day_metrics
+
+    def _flush_day(self, date: str, sink: MetricsSink) -> None:
+        """
+        Writes the metrics of a day to a sink and frees them.
+        """
+        day_metrics = dict()
+        for repo in list(self.data):
+            dates = self.data[repo]
+            if date in dates:
+                day_metrics[repo] = self._derive(dates.pop(date))
+                if not dates:
+                    del self.data[repo]
+        sink.write_day(date, day_metrics)
+
+    def flush_days(self, sink: MetricsSink) -> None:
+        """
+        Writes the metrics of every remaining day to a sink, in chronological order, and frees them.
+        """
+        dates = set()
+        for repo_dates in self.data.values():
+            dates.update(repo_dates)
+        for date in sorted(dates, key=lambda date: datetime.strptime(date, "%m-%d-%Y")):
+            self._flush_day(date, sink)
+
+    def _process_shards(self, crawler: DataCrawler, num_processes: int,
+                        count_creates: bool = False, state_path: Path = None) -> None:
+        """
+        Processes the crawler's hours in shards, one per worker process, and merges their states.
+
+        With a state_path, every shard saves its state there and shards whose state was already saved (e.g., by an interrupted run) are loaded instead of processed again.
+        """
+        # Lifecycles depend on the order of events, which shards don't keep.
+        assert self.lifecycle is None, "Lifecycle tracking needs a serial run (num_processes=0)."
+        if state_path is not None:
+            PosixPath(state_path).mkdir(parents=True, exist_ok=True)
+        # Workers are spawned, like HourlyPipeline's.
+        with ProcessPoolExecutor(max_workers=num_processes,
+                                 mp_context=get_context('spawn')) as executor:
+            futures = []
+            for shard in crawler.shard(num_processes):
+                hours = list(shard._daterange2hours())
+                if not hours:
+                    continue
+                shard_path = None
+                if state_path is not None:
+                    shard_path = PosixPath(state_path).joinpath('{}_{}{}.json'.format(
+                        hour2key(hours[0]), hour2key(hours[-1]),
+                        '_creates' if count_creates else ''))
+                    if shard_path.exists():
+                        logging.info(" METRICS GETTER: Loading {}".format(shard_path.name))
+                        self.load_state(shard_path)
+                        continue
+                futures.append(executor.submit(
+                    _shard_state, self.event_set, self.json_backend, self.batch,
+                    self.top_N_repos, shard, count_creates, shard_path))
+            for future in as_completed(futures):
+                self.merge(future.result())
+
+    def save_metrics(self, save_name: str = ""):
+        """
+        Saves the metrics to {root}/data/metrics/{save_name}, or prints them without a save_name.
+
+        Names ending with .jsonl or .jsonl.gz are saved as JSON lines (see MetricsSink), and the saved days are freed. Otherwise, the metrics are saved as one compact JSON document.
+        """
+        if is_sink_name(save_name):
+            with MetricsSink(root.joinpath("data", "metrics", save_name)) as sink:
+                self.flush_days(sink)
+        elif save_name:
+            with open(root.joinpath("data", "metrics", save_name), 'w+') as metrics_file:
+                json.dump(self.metrics(), metrics_file)
+        else:
+            print(json.dumps(self.metrics(), indent=2))
+
+    def save_create_counts(self, save_name: str = ""):
         if save_name:
             print(json.dumps(self.create_count, indent=2),
                   file=open(root.joinpath("data", "measures", "repositories", save_name), 'w+'))
         else:
             print(json.dumps(self.create_count, indent=2))
 
+    def populate(self, crawler: DataCrawler, save_name: str = "",
+                 num_processes: int = 0, state_path: Path = None):
+        """
+        Computes the metrics of the crawler's hours and saves them.
+
+        Parameters
+        ----------
+        crawler: Crawler
+            Provides the hours.
+        save_name: str (optional)
+            Where to save the metrics (see save_metrics).
+        num_processes: int (default=0)
+            If positive, the hours are split into this many shards (see Crawler.shard), processed by as many worker processes, and their states merged.
+        state_path: Path (optional)
+            Directory where every shard saves its state. Shards that were already saved are not processed again.
+
+        Notes
+        -----
+        + With a save_name ending with .jsonl or .jsonl.gz, every day is written and freed as soon as it is complete (see MetricsSink), so memory holds a single day. Sharded runs write their days once the shards are merged.
+        """
+        if not is_sink_name(save_name):
+            if num_processes > 0:
+                self._process_shards(crawler, num_processes, state_path=state_path)
+            else:
+                self._process_hours(crawler)
+            self.save_metrics(save_name)
+            return
+
+        with MetricsSink(root.joinpath("data", "metrics", save_name)) as sink:
+            if num_processes > 0:
+                self._process_shards(crawler, num_processes, state_path=state_path)
+            else:
+                self._process_hours(crawler, sink=sink)
+            self.flush_days(sink)
+
+    def populate_create_counts(self, crawler: DataCrawler, save_name: str = "",
+                               num_processes: int = 0, state_path: Path = None):
+        if num_processes > 0:
+            self._process_shards(crawler, num_processes, count_creates=True,
+                                 state_path=state_path)
+        else:
+            self._process_hours(crawler, count_creates=True)
+        self.save_create_counts(save_name)
+
+
+def _shard_state(event_set: set, json_backend: str, batch: bool,
+                 top_N_repos: Union[set, None], crawler: DataCrawler,
+                 count_creates: bool, state_path: Path = None) -> Dict:
+    """
+    Unit of work of MetricsGetter._process_shards: processes a shard of hours and returns its state.
+    """
+    metrics_getter = MetricsGetter(event_set, json_backend, batch)
+    metrics_getter.top_N_repos = top_N_repos
+    metrics_getter._process_hours(crawler, count_creates)
+    if state_path is not None:
+        metrics_getter.save_state(state_path)
+    return metrics_getter.state()
+
+
+class MetricsConsumer(Consumer):
+    def __init__(self, metrics_getter: MetricsGetter, save_name: str = ""):
+        """
+        Feeds repository health metrics from an EventBus, i.e., MetricsGetter.populate without a pass of its own.
+
+        Parameters
+        ----------
+        metrics_getter: MetricsGetter
+            Holds the metrics, the usable event types, and the top-K repositories.
+        save_name: str (optional)
+            Where to save the metrics once the bus is done (see MetricsGetter.save_metrics).
+
+        Notes
+        -----
+        + An hour is gathered apart (see MetricsGetter._scratch) and only merged once it ends, and its lifecycle updates are only committed then, so an hour that fails midway leaves the metrics and the lifecycle store untouched (see discard_hour).
+        """
+        self.metrics_getter = metrics_getter
+        self.save_name = save_name
+        self._reset()
+        # Days are streamed out as they complete if the metrics go to a MetricsSink.
+        self.sink = None
+        if is_sink_name(save_name):
+            self.sink = MetricsSink(root.joinpath("data", "metrics", save_name))
+        self.date = None
+
+    @property
+    def event_set(self) -> set:
+        return self.metrics_getter.event_set
+
+    @property
+    def repo_set(self) -> Union[set, None]:
+        return self.metrics_getter.top_N_repos
+
+    def _reset(self) -> None:
+        self.table = EventTable()
+        self.hour = self.metrics_getter._scratch()
+        if self.metrics_getter.lifecycle is not None:
+            self.metrics_getter.lifecycle.begin()
+
+    def handle(self, data: Dict, timestamp: datetime) -> None:
+        if self.metrics_getter.lifecycle is not None:
+            self.metrics_getter.lifecycle.handle(data)
+        if self.metrics_getter.batch:
+            self.table.append(data)
+        else:
+            self.hour._process_event(data, timestamp.strftime("%m-%d-%Y"))
+
+    def end_hour(self, timestamp: datetime, stats: Dict) -> None:
+        date = timestamp.strftime("%m-%d-%Y")
+        if self.metrics_getter.batch:
+            self.hour._process_batch(self.table, date)
+        self.metrics_getter.merge(self.hour.state())
+        if self.metrics_getter.lifecycle is not None:
+            self.metrics_getter.lifecycle.commit()
+        self._reset()
+        if self.sink is not None:
+            if self.date is not None and self.date != date:
+                self.metrics_getter._flush_day(self.date, self.sink)
+            self.date = date
+
+    def finish(self) -> None:
+        if self.metrics_getter.lifecycle is not None:
+            self.metrics_getter.lifecycle.commit()
+            self.metrics_getter.lifecycle.flush()
+        if self.sink is not None:
+            self.metrics_getter.flush_days(self.sink)
+            self.sink.close()
+        else:
+            self.metrics_getter.save_metrics(self.save_name)
+
+    def discard_hour(self, timestamp: datetime, stats: Dict) -> None:
+        if self.metrics_getter.lifecycle is not None:
+            self.metrics_getter.lifecycle.rollback()
+        self._reset()
+
+
+class CreateCountConsumer(Consumer):
+    def __init__(self, metrics_getter: MetricsGetter, save_name: str = ""):
+        """
+        Counts repository creations from an EventBus, i.e., MetricsGetter.populate_create_counts without a pass of its own.
+
+        Parameters
+        ----------
+        metrics_getter: MetricsGetter
+            Holds the creation counts.
+        save_name: str (optional)
+            Where to save the counts once the bus is done (see MetricsGetter.save_create_counts).
+        """
+        self.metrics_getter = metrics_getter
+        self.save_name = save_name
+        self.event_set = {'RepositoryEvent'}
+        # The creations of the current hour, added once it ends.
+        self.num_created = 0
+
+    def handle(self, data: Dict, timestamp: datetime) -> None:
+        if data['payload']['action'] == 'created':
+            self.num_created += 1
+
+    def end_hour(self, timestamp: datetime, stats: Dict) -> None:
+        if self.num_created:
+            self.metrics_getter.create_count[timestamp.strftime("%m-%d-%Y")] += self.num_created
+        self.num_created = 0
+
+    def discard_hour(self, timestamp: datetime, stats: Dict) -> None:
+        self.num_created = 0
+
+    def finish(self) -> None:
+        self.metrics_getter.save_create_counts(self.save_name)
+
@@ -0,0 +1,81 @@
+import os
+import sys
+import gzip
+import json
+from pathlib import Path, PosixPath
+from typing import Dict, NewType
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split('frisky-frog')[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+# Common types used here.
+PathType = NewType('Path', PosixPath)
+
+# Suffixes of the files MetricsSink writes.
+SINK_SUFFIXES = ('.jsonl', '.jsonl.gz')
+
+
+def is_sink_name(save_name: str) -> bool:
+    """
+    Returns
+    -------
+    bool:
+        True if metrics saved under this name go to a MetricsSink rather than a single JSON document.
+    """
+    return str(save_name).endswith(SINK_SUFFIXES)
+
+
+class MetricsSink:
+    def __init__(self, path: PathType):
+        """
+        Writes metrics as JSON lines, a day at a time.
+
+        Parameters
+        ----------
+        path: PathType
+            The file. It is gzipped if its name ends with .gz.
+
+        Examples
+        --------
+        + {"Date": "03-12-2020", "Repository": "a/b", "CommitRate": 3, "IssueOpenRate": 1}
+
+        Notes
+        -----
+        + Every line holds the metrics of one repository on one day, without indentation. A day is written as soon as it is complete, so it can be freed (see MetricsGetter.populate).
+        + json2repos reads these files directly.
+        """
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.name.endswith('.gz'):
+            self._file = gzip.open(self.path, 'wt')
+        else:
+            self._file = open(self.path, 'w')
+        self.num_lines = 0
+
+    def write_day(self, date: str, day_metrics: Dict[str, Dict]) -> None:
+        """
+        Parameters
+        ----------
+        date: str
+            The day, formatted as MM-DD-YYYY.
+        day_metrics: Dict(str, Dict)
+            The metrics of every repository on that day.
+        """
+        for repo, metrics in day_metrics.items():
+            self._file.write(json.dumps({'Date': date, 'Repository': repo, **metrics},
+                                        separators=(',', ':')))
+            self._file.write('\n')
+        self.num_lines += len(day_metrics)
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> 'MetricsSink':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1 +1,6 @@
 from .data_util import json2repos
+from .archive_util import iter_archive_lines, iter_events, EventPrefilter
+from .archive_util import get_json_loads, available_json_backends, benchmark_json_backends
+from .date_util import hour_range, daterange2hours, shard_range, shard_hours, to_hour
+from .date_util import hour2key, key2hour, hour2url, url2hour
+from .memory_util import current_rss, available_memory, usable_cpus, pool_size, MemoryMonitor, MIB
@@ -0,0 +1,217 @@
+import re
+import sys
+import gzip
+import json
+import logging
+from time import time
+from importlib import import_module
+from typing import Dict, Iterator, BinaryIO, Union, Callable, Tuple
+
+# JSON decoders in the order of preference. Each is used only if it is installed.
+JSON_BACKENDS = ('orjson', 'simdjson', 'json')
+
+# Matches the name of the repository an event belongs to (without decoding the JSON).
+REPO_NAME = re.compile(rb'"repo":\s?\{[^{}]*?"name":\s?"([^"]*)"')
+
+
+class EventPrefilter:
+    def __init__(self, event_set: set, repo_set: Union[set, None] = None):
+        """
+        Screens raw archive lines by event type (and optionally repository) before any JSON decoding.
+
+        Parameters
+        ----------
+        event_set: set
+            Event types to keep (e.g., {'PushEvent', 'IssuesEvent'}).
+        repo_set: set (optional)
+            Repository names to keep. If None, events of all repositories are kept.
+
+        Notes
+        -----
+        + The filter never drops a line that would pass the JSON based filters. It may let through a few that don't (e.g., a nested "type" that matches), so the decoded events must still be filtered as usual.
+        + The number of kept and dropped lines is tallied in `parsed` and `skipped`.
+        """
+        self.type_tokens = tuple(
+            token.format(event_type).encode('utf-8')
+            for event_type in event_set
+            for token in ('"type":"{}"', '"type": "{}"'))
+        self.repo_set = set(repo_set) if repo_set is not None else None
+        self.parsed = 0
+        self.skipped = 0
+
+    def _repo_matches(self, line: bytes) -> bool:
+        if self.repo_set is None:
+            return True
+        match = REPO_NAME.search(line)
+        if match is None:  # Unusual layout. Let the JSON filter decide.
+            return True
+        repo_name = match.group(1).replace(b'\\/', b'/').decode('utf-8', 'replace')
+        return repo_name in self.repo_set
+
+    def __call__(self, line: bytes) -> bool:
+        """
+        Parameters
+        ----------
+        line: bytes
+            One raw line of a GH Archive hour.
+
+        Returns
+        -------
+        bool:
+            True if the line may hold a wanted event and needs to be parsed. False otherwise.
+        """
+        if any(token in line for token in self.type_tokens) and self._repo_matches(line):
+            self.parsed += 1
+            return True
+        self.skipped += 1
+        return False
+
+
+def get_json_loads(backend: str = 'auto') -> Tuple[str, Callable]:
+    """
+    Picks the function used to decode JSON lines.
+
+    Parameters
+    ----------
+    backend: str (default='auto')
+        One of 'auto', 'orjson', 'simdjson' or 'json'. With 'auto', the fastest installed backend is used and the stdlib json is the fallback.
+
+    Returns
+    -------
+    Tuple(str, Callable):
+        The name of the chosen backend and its `loads` function.
+
+    Raises
+    ------
+    ValueError:
+        If the backend is unknown.
+    ImportError:
+        If the requested backend isn't installed.
+    """
+    if backend != 'auto' and backend not in JSON_BACKENDS:
+        raise ValueError("Unknown JSON backend '{}'. Please choose from among {}.".format(
+            backend, ('auto',) + JSON_BACKENDS))
+
+    candidates = JSON_BACKENDS if backend == 'auto' else (backend,)
+    for candidate in candidates:
+        try:
+            module = import_module(candidate)
+        except ImportError:
+            if backend != 'auto':
+                raise
+            continue
+        return candidate, module.loads
+
+
+def available_json_backends() -> Tuple[str, ...]:
+    """
+    Returns
+    -------
+    Tuple(str, ...):
+        Names of the installed JSON backends.
+    """
+    available = []
+    for backend in JSON_BACKENDS:
+        try:
+            import_module(backend)
+        except ImportError:
+            continue
+        available.append(backend)
+    return tuple(available)
+
+
+def iter_archive_lines(fileobj: BinaryIO) -> Iterator[bytes]:
+    """
+    Lazily decompress a GH Archive .json.gz stream one line at a time.
+
+    Parameters
+    ----------
+    fileobj: BinaryIO
+        Any readable binary stream holding gzip data (e.g., an unbuffered
+        HTTP response or an open file).
+
+    Yields
+    ------
+    bytes:
+        One (still encoded) line of the decompressed archive.
+
+    Notes
+    -----
+    + Only a small decompression buffer is held in memory at any time, so the
+    peak memory does not depend on the size of the archive hour.
+    """
+    with gzip.GzipFile(fileobj=fileobj) as json_bytes:
+        for line in json_bytes:
+            yield line
+
+
+def iter_events(fileobj: BinaryIO, prefilter: EventPrefilter = None,
+                loads: Callable = json.loads) -> Iterator[Dict]:
+    """
+    Parse a GH Archive .json.gz stream into events, one line at a time.
+
+    Parameters
+    ----------
+    fileobj: BinaryIO
+        Any readable binary stream holding gzip data.
+    prefilter: EventPrefilter (optional)
+        If provided, only the lines that pass the prefilter are decoded.
+    loads: Callable (default=json.loads)
+        The JSON decoder (see get_json_loads).
+
+    Yields
+    ------
+    Dict:
+        The JSON dictionary of each event. Blank or malformed lines are skipped.
+
+    Notes
+    -----
+    + Every line is decoded exactly once.
+    """
+    for line in iter_archive_lines(fileobj):
+        if prefilter is not None and not prefilter(line):
+            continue
+        try:
+            yield loads(line)
+        except ValueError:  # This catches blank lines and invalid JSON.
+            continue
+
+
+def benchmark_json_backends(archive_path: str) -> Dict[str, float]:
+    """
+    Measures how fast each installed JSON backend decodes a GH Archive hour.
+
+    Parameters
+    ----------
+    archive_path: str
+        Path to a GH Archive .json.gz file.
+
+    Returns
+    -------
+    Dict(str, float):
+        Events decoded per second by each backend.
+    """
+    with open(archive_path, 'rb') as archive_file:
+        lines = list(iter_archive_lines(archive_file))
+
+    events_per_sec = dict()
+    for backend in available_json_backends():
+        _, loads = get_json_loads(backend)
+        num_events = 0
+        start = time()
+        for line in lines:
+            try:
+                loads(line)
+            except ValueError:
+                continue
+            num_events += 1
+        events_per_sec[backend] = num_events / max(time() - start, 1e-9)
+        logging.info(" {}: {:,.0f} events/sec ({} events)".format(
+            backend, events_per_sec[backend], num_events))
+
+    return events_per_sec
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format='[+] %(message)s', level=logging.INFO)
+    benchmark_json_backends(sys.argv[1])
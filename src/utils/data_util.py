@@ -1,19 +1,54 @@
 import re
+import gzip
 import json
 import pandas as pd
 from pathlib import Path
 from ipdb import set_trace
+from typing import Dict
 from collections import defaultdict
 
 
+def _read_metric_lines(json_file: Path) -> Dict[str, Dict[str, Dict]]:
+    """
+    Reads metrics saved as JSON lines (see metrics.MetricsSink).
+
+    Returns
+    -------
+    Dict(str, Dict(str, Dict)):
+        The metrics of every repository by date, as in the JSON documents.
+    """
+    data = defaultdict(dict)
+    opener = gzip.open if json_file.name.endswith('.gz') else open
+    with opener(json_file, 'rt') as f:
+        for line in f:
+            metrics = json.loads(line)
+            date = metrics.pop('Date')
+            data[metrics.pop('Repository')][date] = metrics
+    return data
+
+
 def json2repos(json_dir: Path, save_dir: Path) -> None:
+    """
+    Pivots the saved metrics into a CSV file per repository, indexed by date.
+
+    Parameters
+    ----------
+    json_dir: Path
+        Directory of the metrics: JSON documents (*.json) or JSON lines (*.jsonl, *.jsonl.gz).
+    save_dir: Path
+        Where to save the CSV files.
+    """
     repos = defaultdict(list)
-    for json_file in json_dir.glob("*.json"):
-        with open(json_file) as f:
-            data = json.load(f)
-            for repo, metrics in data.items():
-                dframe = pd.DataFrame.from_dict(metrics, orient='index')
-                repos[repo].append(dframe)
+    for json_file in [*json_dir.glob("*.json"), *json_dir.glob("*.jsonl"),
+                      *json_dir.glob("*.jsonl.gz")]:
+        if json_file.suffix == '.json':
+            with open(json_file) as f:
+                data = json.load(f)
+        else:
+            data = _read_metric_lines(json_file)
+        for repo, metrics in data.items():
+            dframe = pd.DataFrame.from_dict(metrics, orient='index')
+            repos[repo].append(dframe)
 
     for repo, all_metrics in repos.items():
         repo_name = re.sub('/', '-', repo)
@@ -0,0 +1,170 @@
+from datetime import datetime, timedelta
+from typing import Iterator, List, Tuple, Union
+
+ONE_HOUR = timedelta(hours=1)
+ARCHIVE_URL = 'https://data.gharchive.org/{:%Y-%m-%d}-{}.json.gz'
+
+Timestamp = Union[datetime, str]
+DateRange = Union[Tuple[int, int], int]
+
+
+def to_hour(timestamp: Timestamp) -> datetime:
+    """
+    Truncates a timestamp to the hour.
+
+    Parameters
+    ----------
+    timestamp: datetime or str
+        A datetime or an ISO formatted string, e.g., '2020-03-14 18:00'.
+
+    Returns
+    -------
+    datetime:
+        The timestamp without minutes, seconds, and microseconds.
+    """
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def hour2key(timestamp: datetime) -> str:
+    """
+    Formats an hour the way GH Archive names its files.
+
+    Examples
+    --------
+    + hour2key(datetime(2020, 3, 2, 6)) :-> '2020-03-02-6'
+    """
+    return '{:%Y-%m-%d}-{}'.format(timestamp, timestamp.hour)
+
+
+def key2hour(key: str) -> datetime:
+    """
+    Parses a GH Archive hour (formatted as YYYY-MM-DD-H) back into a datetime.
+    """
+    return datetime.strptime(key, "%Y-%m-%d-%H")
+
+
+def hour2url(timestamp: datetime) -> str:
+    """
+    Converts an hour into the GH Archive URL of its data.
+
+    Examples
+    --------
+    + hour2url(datetime(2020, 3, 2, 6)) :-> 'https://data.gharchive.org/2020-03-02-6.json.gz'
+    """
+    return ARCHIVE_URL.format(timestamp, timestamp.hour)
+
+
+def url2hour(mined_url: str) -> datetime:
+    """
+    Extracts the hour from a GH Archive URL.
+    """
+    return key2hour(mined_url[mined_url.rfind("/") + 1:].split(".")[0])
+
+
+def hour_range(start: Timestamp, end: Timestamp) -> Iterator[datetime]:
+    """
+    Generates every hour between two timestamps (both inclusive).
+
+    Parameters
+    ----------
+    start: datetime or str
+        The first hour, e.g., '2020-03-14 18:00'.
+    end: datetime or str
+        The last hour, e.g., '2020-04-02 06:00'.
+
+    Yields
+    ------
+    datetime:
+        Consecutive hours. Only hours that exist on the calendar are generated.
+    """
+    timestamp, end = to_hour(start), to_hour(end)
+    while timestamp <= end:
+        yield timestamp
+        timestamp += ONE_HOUR
+
+
+def daterange2hours(hour: DateRange = (0, 23), date: DateRange = (1, 31),
+                    month: DateRange = (1, 12),
+                    year: DateRange = (2019, 2020)) -> Iterator[datetime]:
+    """
+    Generates the hours of a year x month x date x hour product, skipping dates that don't exist (e.g., Feb 30).
+
+    Parameters
+    ----------
+    hour, date, month, year: Tuple(int, int) or int
+        Inclusive (start, end) ranges, or single values.
+
+    Yields
+    ------
+    datetime:
+        The hours in chronological order.
+    """
+    def _inclusive_range(value):
+        start, end = value if isinstance(value, tuple) else (value, value)
+        return range(start, end + 1)
+
+    for yy in _inclusive_range(year):
+        for mm in _inclusive_range(month):
+            for dd in _inclusive_range(date):
+                try:
+                    day = datetime(yy, mm, dd)
+                except ValueError:  # This skips dates that don't exist.
+                    continue
+                for hh in _inclusive_range(hour):
+                    yield day.replace(hour=hh)
+
+
+def shard_range(start: Timestamp, end: Timestamp,
+                num_shards: int) -> List[Tuple[datetime, datetime]]:
+    """
+    Splits the hours between two timestamps into balanced, contiguous shards.
+
+    Parameters
+    ----------
+    start: datetime or str
+        The first hour.
+    end: datetime or str
+        The last hour.
+    num_shards: int
+        Number of shards. Fewer are returned if there are fewer hours than shards.
+
+    Returns
+    -------
+    List(Tuple(datetime, datetime)):
+        Inclusive (start, end) hours of each shard. Shard sizes differ by at most one hour.
+
+    Examples
+    --------
+    + shard_range('2020-01-01 00:00', '2020-01-01 04:00', 2) :-> [(00:00, 02:00), (03:00, 04:00)]
+    """
+    start, end = to_hour(start), to_hour(end)
+    num_hours = int((end - start) / ONE_HOUR) + 1
+    if num_hours <= 0:
+        return []
+    num_shards = max(1, min(num_shards, num_hours))
+    bounds = [start + ONE_HOUR * (num_hours * i // num_shards)
+              for i in range(num_shards + 1)]
+    return [(bounds[i], bounds[i + 1] - ONE_HOUR) for i in range(num_shards)]
+
+
+def shard_hours(hours: List[datetime], num_shards: int) -> List[List[datetime]]:
+    """
+    Splits a list of hours into balanced, contiguous shards.
+
+    Parameters
+    ----------
+    hours: List[datetime]
+        The hours to split (e.g., from daterange2hours).
+    num_shards: int
+        Number of shards. Fewer are returned if there are fewer hours than shards.
+
+    Returns
+    -------
+    List(List(datetime)):
+        The hours of each shard. Shard sizes differ by at most one hour.
+    """
+    num_shards = max(1, min(num_shards, len(hours)))
+    bounds = [len(hours) * i // num_shards for i in range(num_shards + 1)]
+    return [hours[bounds[i]:bounds[i + 1]] for i in range(num_shards) if hours]
@@ -0,0 +1,110 @@
+import os
+import resource
+from typing import Union
+
+MIB = 1024 ** 2
+
+
+def current_rss() -> int:
+    """
+    Resident set size of this process.
+
+    Returns
+    -------
+    int:
+        RSS in bytes. Where /proc isn't available (e.g., macOS), the peak RSS so far is returned instead.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes.
+        return max_rss if os.uname().sysname == 'Darwin' else max_rss * 1024
+
+
+class MemoryMonitor:
+    def __init__(self, limit: Union[int, None] = None):
+        """
+        Samples the RSS of this process and keeps track of its peak.
+
+        Parameters
+        ----------
+        limit: int (optional)
+            Memory ceiling in bytes. None means no ceiling.
+
+        Notes
+        -----
+        + RSS is per process, so with several hours in flight in threads the peak of an hour includes the others.
+        """
+        self.limit = limit
+        self.peak = 0
+
+    def sample(self) -> int:
+        """
+        Returns
+        -------
+        int:
+            The current RSS in bytes.
+        """
+        rss = current_rss()
+        self.peak = max(self.peak, rss)
+        return rss
+
+    def over_limit(self) -> bool:
+        """
+        Returns
+        -------
+        bool:
+            True if there is a ceiling and the current RSS is above it.
+        """
+        return self.limit is not None and self.sample() > self.limit
+
+
+def available_memory() -> int:
+    """
+    Memory that can be used without swapping.
+
+    Returns
+    -------
+    int:
+        MemAvailable in bytes, or the free physical memory where /proc isn't available.
+    """
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+
+
+def usable_cpus() -> int:
+    """
+    Returns
+    -------
+    int:
+        Number of cores this process may run on (e.g., as limited by taskset or a container).
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # Not on Linux.
+        return os.cpu_count() or 1
+
+
+def pool_size(worker_memory: int) -> int:
+    """
+    Number of worker processes that fit on this machine.
+
+    Parameters
+    ----------
+    worker_memory: int
+        Memory a worker needs at its peak, in bytes.
+
+    Returns
+    -------
+    int:
+        One worker per usable core, as long as the available memory can hold them all, and at least one.
+    """
+    return max(1, min(usable_cpus(), available_memory() // worker_memory))
@@ -0,0 +1,93 @@
+import os
+import sys
+import gzip
+import json
+import unittest
+from tempfile import NamedTemporaryFile
+from io import BytesIO
+from pathlib import Path
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from utils import iter_archive_lines, iter_events, EventPrefilter
+from utils import get_json_loads, available_json_backends, benchmark_json_backends
+from crawler.counts import count_events
+
+
+def _make_archive(events, extra_lines=()):
+    lines = [json.dumps(event) for event in events] + list(extra_lines)
+    return BytesIO(gzip.compress('\n'.join(lines).encode('utf-8')))
+
+
+class TestArchiveUtil(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super(TestArchiveUtil, self).__init__(*args, **kwargs)
+        self.events = [
+            {"type": "PushEvent", "repo": {"name": "a/b"},
+             "payload": {"distinct_size": 2}},
+            {"type": "WatchEvent", "repo": {"name": "c/d"}, "payload": {}},
+            {"type": "IssuesEvent", "repo": {"name": "a/b"},
+             "payload": {"action": "opened"}},
+        ]
+
+    def test_iter_archive_lines(self):
+        lines = list(iter_archive_lines(_make_archive(self.events)))
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(all(isinstance(line, bytes) for line in lines))
+
+    def test_iter_events(self):
+        archive = _make_archive(self.events, extra_lines=['', '{"broken": '])
+        self.assertEqual(list(iter_events(archive)), self.events)
+
+    def test_prefilter_by_event_type(self):
+        prefilter = EventPrefilter({'PushEvent', 'IssuesEvent'})
+        archive = _make_archive(self.events)
+        events = list(iter_events(archive, prefilter))
+        self.assertEqual([event['type'] for event in events],
+                         ['PushEvent', 'IssuesEvent'])
+        self.assertEqual((prefilter.parsed, prefilter.skipped), (2, 1))
+
+    def test_prefilter_by_repo(self):
+        prefilter = EventPrefilter({'PushEvent', 'IssuesEvent'}, {'c/d'})
+        compact = b'{"id":"1","type":"PushEvent","repo":{"id":2,"name":"a\\/b"}}'
+        self.assertFalse(prefilter(compact))
+        prefilter.repo_set = {'a/b'}
+        self.assertTrue(prefilter(compact))
+        self.assertFalse(prefilter(b'{"id":"1","type":"WatchEvent"}'))
+        self.assertEqual((prefilter.parsed, prefilter.skipped), (1, 2))
+
+    def test_json_backends_agree(self):
+        self.assertIn('json', available_json_backends())
+        counts = []
+        for backend in available_json_backends():
+            name, loads = get_json_loads(backend)
+            self.assertEqual(name, backend)
+            archive = _make_archive(self.events, extra_lines=['', '{"x": '])
+            self.assertEqual(list(iter_events(archive, loads=loads)),
+                             self.events)
+            # Prefiltered lines are decoded and counted the same too.
+            archive = _make_archive(self.events * 50)
+            prefilter = EventPrefilter({'PushEvent', 'IssuesEvent'})
+            data_df = count_events(iter_events(archive, prefilter, loads)).to_dataframe()
+            counts.append(data_df.sort_index(axis=0).sort_index(axis=1))
+
+        for data_df in counts[1:]:
+            self.assertTrue(data_df.equals(counts[0]))
+        self.assertEqual(counts[0].loc['a/b', 'CommitEvent'], 100)
+        self.assertNotIn('c/d', counts[0].index)
+
+    def test_unknown_json_backend(self):
+        with self.assertRaises(ValueError):
+            get_json_loads('yaml')
+
+    def test_benchmark_json_backends(self):
+        with NamedTemporaryFile(suffix='.json.gz') as archive_file:
+            archive_file.write(_make_archive(self.events * 10).getvalue())
+            archive_file.flush()
+            events_per_sec = benchmark_json_backends(archive_file.name)
+        self.assertEqual(set(events_per_sec), set(available_json_backends()))
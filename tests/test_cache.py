@@ -0,0 +1,85 @@
+import os
+import sys
+import gzip
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import ArchiveCache, Crawler
+
+
+class TestArchiveCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.archive = gzip.compress(b'{"type": "PushEvent"}\n' * 100)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def save(self, cache, key, archive=None):
+        # Stands in for Downloader, which saves archives at their cache path.
+        cache.path(key).write_bytes(self.archive if archive is None else archive)
+        return cache.admit(cache.path(key))
+
+    def test_admit_and_get(self):
+        cache = ArchiveCache(cache_path=self.tmp_dir.name)
+        self.assertIsNone(cache.get('2020-03-12-16'))
+        self.save(cache, '2020-03-12-16')
+        cached = cache.get('2020-03-12-16', expected_size=len(self.archive))
+        self.assertEqual(cached.read_bytes(), self.archive)
+        self.assertEqual(cache._total, len(self.archive))
+
+    def test_damaged_archive_is_dropped(self):
+        cache = ArchiveCache(cache_path=self.tmp_dir.name)
+        self.save(cache, '2020-03-12-16', self.archive[:10])
+        self.assertIsNone(cache.get('2020-03-12-16'))
+        # A truncated archive still looks like gzip, but not like the recorded size.
+        self.save(cache, '2020-03-12-17', self.archive[:-4])
+        self.assertIsNone(cache.get('2020-03-12-17', expected_size=len(self.archive)))
+        self.assertEqual(list(Path(self.tmp_dir.name).iterdir()), [])
+        self.assertEqual(cache._total, 0)
+
+    def test_lru_eviction(self):
+        cache = ArchiveCache(cache_path=self.tmp_dir.name,
+                             max_bytes=3 * len(self.archive))
+        for hour in range(3):
+            self.save(cache, '2020-03-12-{}'.format(hour))
+            os.utime(cache.get('2020-03-12-{}'.format(hour)),
+                     (hour, hour))
+        # Touch the oldest hour so that the second one is evicted instead.
+        cache.get('2020-03-12-0')
+        self.save(cache, '2020-03-12-3')
+        self.assertIsNotNone(cache.get('2020-03-12-0'))
+        self.assertIsNone(cache.get('2020-03-12-1'))
+        self.assertLessEqual(cache.size(), cache.max_bytes)
+        self.assertEqual(cache._total, cache.size())
+        # The total of an existing cache is picked up.
+        self.assertEqual(ArchiveCache(cache_path=self.tmp_dir.name)._total, cache.size())
+
+    def test_offline_crawler_reads_only_from_cache(self):
+        cache = ArchiveCache(cache_path=self.tmp_dir.name, offline=True)
+        self.save(cache, '2020-03-12-16')
+        crawler = Crawler(hour=(16, 17), date=12, month=3, year=2020,
+                          cache=cache)
+        events = [list(crawler._url2events(url))
+                  for url in crawler._daterange2url()]
+        self.assertEqual([len(hour) for hour in events], [100, 0])
+
+    def test_unreadable_archive_is_dropped(self):
+        cache = ArchiveCache(cache_path=self.tmp_dir.name, offline=True)
+        # Truncated, but never crawled, so there is no recorded size to catch it.
+        self.save(cache, '2020-03-12-16', self.archive[:-4])
+        crawler = Crawler(hour=16, date=12, month=3, year=2020, cache=cache)
+        mined_url = next(crawler._daterange2url())
+        stats = {}
+        list(crawler._url2events(mined_url, stats=stats))
+        self.assertIn('error', stats)
+        self.assertIsNone(cache.get('2020-03-12-16'))
+        self.assertEqual(cache._total, 0)
@@ -0,0 +1,93 @@
+import os
+import sys
+import pickle
+import unittest
+import pandas as pd
+from pathlib import Path
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import counts
+from crawler.counts import HourlyCounts, count_events, sum_frames
+from utils import MemoryMonitor
+
+
+class TestHourlyCounts(unittest.TestCase):
+    def __init__(self, *args, **kwargs):
+        super(TestHourlyCounts, self).__init__(*args, **kwargs)
+        self.events = [
+            {"type": "PushEvent", "repo": {"name": "a/b"}, "payload": {"distinct_size": 3}},
+            {"type": "PushEvent", "repo": {"name": "a/b"}, "payload": {"distinct_size": 1}},
+            {"type": "ForkEvent", "repo": {"name": "c/d"}, "payload": {}},
+            {"type": "IssuesEvent", "repo": {"name": "c/d"}, "payload": {"action": "closed"}},
+        ]
+
+    def test_count_events(self):
+        data_df = count_events(self.events).to_dataframe()
+        self.assertEqual(data_df.loc['a/b', 'CommitEvent'], 4)
+        self.assertEqual(data_df.loc['c/d', 'IssueClosed'], 1)
+        self.assertEqual(data_df.loc['a/b', 'ForkEvent'], 0)
+        self.assertTrue((data_df.dtypes == 'int64').all())
+
+    def test_compaction(self):
+        default, counts.COMPACT_EVERY = counts.COMPACT_EVERY, 3
+        try:
+            hourly = count_events(self.events * 5)
+        finally:
+            counts.COMPACT_EVERY = default
+        self.assertEqual(hourly.matrix.sum(), 5 * (4 + 1 + 1))
+
+    def test_sum_frames(self):
+        frames = [count_events(self.events[:2]).to_dataframe(),
+                  count_events(self.events[2:]).to_dataframe(),
+                  pd.DataFrame({'ForkEvent': [2.0, None]}, index=['e/f', 'c/d'])]
+        chained = frames[0]
+        for data_df in frames[1:]:
+            chained = chained.add(data_df, fill_value=0)
+        summed = sum_frames(iter(frames), chunk_size=1)
+        self.assertTrue((summed.dtypes == 'int64').all())
+        pd.testing.assert_frame_equal(
+            summed.sort_index().sort_index(axis=1),
+            chained.fillna(0).astype('int64').sort_index().sort_index(axis=1))
+
+    def test_memory_ceiling(self):
+        # Any process is over a 1 byte ceiling, so buffered increments are compacted at every sample.
+        monitor = MemoryMonitor(limit=1)
+        default, counts.SAMPLE_EVERY = counts.SAMPLE_EVERY, 2
+        try:
+            hourly = count_events(self.events * 5, monitor)
+        finally:
+            counts.SAMPLE_EVERY = default
+        self.assertEqual(len(hourly._vals), 0)
+        self.assertTrue(hourly.to_dataframe().equals(
+            count_events(self.events * 5).to_dataframe()))
+        self.assertGreater(monitor.peak, 0)
+
+    def test_merge(self):
+        first = count_events(self.events)
+        second = count_events(self.events[2:] + [
+            {"type": "WatchEvent", "repo": {"name": "e/f"}, "payload": {}}])
+        expected = first.to_dataframe().add(
+            second.to_dataframe(), fill_value=0).fillna(0)
+        merged = first.merge(second).to_dataframe()
+        self.assertTrue(merged.sort_index().sort_index(axis=1).equals(
+            expected.astype('int64').sort_index().sort_index(axis=1)))
+
+    def test_dataframe_round_trip_and_pickle(self):
+        data_df = count_events(self.events).to_dataframe()
+        restored = pickle.loads(pickle.dumps(HourlyCounts.from_dataframe(data_df)))
+        self.assertTrue(restored.to_dataframe().equals(data_df))
+
+    def test_actors_only_when_tracked(self):
+        events = [dict(event, actor={'login': login})
+                  for event, login in zip(self.events, ['x', 'y', 'x', 'z'])]
+        self.assertIsNone(count_events(events).actors)
+        first = count_events(events[:2], track_actors=True)
+        self.assertEqual(first.actors, {'x', 'y'})
+        self.assertEqual(first.merge(count_events(events[2:], track_actors=True)).actors,
+                         {'x', 'y', 'z'})
@@ -2,6 +2,8 @@ import os
 import sys
 import numpy
 import unittest
+from time import sleep
+from random import random
 from pathlib import Path
 from ipdb import set_trace
 
@@ -38,3 +40,58 @@ class TestCrawler(unittest.TestCase):
     def test_save_events_as_csv(self):
         dataframe = self.test_crawl.save_events_as_csv(
             save_path=self.save_path)
+
+    def test_concurrent_hours_are_ordered(self):
+        crawler = Crawler(hour=(0, 23), date=1, month=3, year=2020,
+                          max_workers=4, ordered=True)
+
+        def fake_hour2dataframe(mined_url, stats=None):
+            sleep(random() / 100)
+            return mined_url, None
+
+        crawler._hour2dataframe = fake_hour2dataframe
+        urls = [url for url, _, _ in crawler._iter_hourly_dataframes()]
+        self.assertEqual(urls, list(crawler._daterange2url()))
+
+    def test_concurrent_hours_unordered(self):
+        crawler = Crawler(hour=(0, 23), date=1, month=3, year=2020,
+                          max_workers=4, ordered=False)
+        crawler._hour2dataframe = lambda mined_url, stats=None: (mined_url, None)
+        urls = [url for url, _, _ in crawler._iter_hourly_dataframes()]
+        self.assertEqual(sorted(urls), sorted(crawler._daterange2url()))
+
+    def test_memory_ceiling_throttles_hours(self):
+        # Any process is over a 1 byte ceiling, so hours are crawled one at a time.
+        crawler = Crawler(hour=(0, 5), date=1, month=3, year=2020,
+                          max_workers=4, memory_limit=1)
+        running, peaks = [], []
+
+        def fake_hour2dataframe(mined_url, stats=None):
+            running.append(mined_url)
+            peaks.append(len(running))
+            sleep(random() / 100)
+            running.remove(mined_url)
+            return mined_url, None
+
+        crawler._hour2dataframe = fake_hour2dataframe
+        urls = [url for url, _, _ in crawler._iter_hourly_dataframes()]
+        self.assertEqual(urls, list(crawler._daterange2url()))
+        self.assertEqual(max(peaks), 1)
+
+    def test_daterange2url_skips_invalid_dates(self):
+        crawler = Crawler(hour=0, date=(29, 31), month=(2, 4), year=2020)
+        urls = list(crawler._daterange2url())
+        self.assertEqual(len(urls), 1 + 3 + 2)
+        self.assertNotIn('https://data.gharchive.org/2020-02-30-0.json.gz', urls)
+
+    def test_time_range_and_shards(self):
+        crawler = Crawler(start='2020-03-14 18:00', end='2020-04-02 06:00')
+        urls = list(crawler._daterange2url())
+        self.assertEqual(urls[0], 'https://data.gharchive.org/2020-03-14-18.json.gz')
+        self.assertEqual(urls[-1], 'https://data.gharchive.org/2020-04-02-6.json.gz')
+        shards = crawler.shard(4)
+        self.assertEqual(sum([list(shard._daterange2url()) for shard in shards], []),
+                         urls)
+        shards = self.test_crawl.shard(2)
+        self.assertEqual([list(shard._daterange2url()) for shard in shards],
+                         [[url] for url in self.test_crawl._daterange2url()])
@@ -0,0 +1,52 @@
+import os
+import sys
+import unittest
+from pathlib import Path
+from datetime import datetime
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from utils import hour_range, daterange2hours, shard_range, shard_hours
+from utils import hour2key, key2hour, hour2url, url2hour
+
+
+class TestDateUtil(unittest.TestCase):
+    def test_hour_range(self):
+        hours = list(hour_range('2020-03-14 18:00', '2020-04-02 06:00'))
+        self.assertEqual(hours[0], datetime(2020, 3, 14, 18))
+        self.assertEqual(hours[-1], datetime(2020, 4, 2, 6))
+        self.assertEqual(len(hours), 18 * 24 + 12 + 1)
+
+    def test_daterange2hours_skips_invalid_dates(self):
+        hours = list(daterange2hours(hour=0, date=(28, 31), month=(2, 4),
+                                     year=2019))
+        # Feb has 28 days in 2019, Mar has 31, and Apr has 30.
+        self.assertEqual(len(hours), 1 + 4 + 3)
+        self.assertEqual(hours, sorted(hours))
+
+    def test_shard_range_is_balanced(self):
+        shards = shard_range('2020-01-01 00:00', '2020-01-31 23:00', 7)
+        sizes = [int((end - start).total_seconds() // 3600) + 1
+                 for start, end in shards]
+        self.assertEqual(sum(sizes), 744)
+        self.assertLessEqual(max(sizes) - min(sizes), 1)
+        for (_, end), (start, _) in zip(shards, shards[1:]):
+            self.assertEqual((start - end).total_seconds(), 3600)
+
+    def test_shard_hours(self):
+        hours = list(daterange2hours(hour=16, date=(1, 5), month=1, year=2020))
+        shards = shard_hours(hours, 2)
+        self.assertEqual([len(shard) for shard in shards], [2, 3])
+        self.assertEqual(sum(shards, []), hours)
+        self.assertEqual(len(shard_hours(hours, 10)), 5)
+
+    def test_keys_and_urls(self):
+        timestamp = datetime(2020, 3, 2, 6)
+        self.assertEqual(hour2key(timestamp), '2020-03-02-6')
+        self.assertEqual(key2hour('2020-03-02-6'), timestamp)
+        self.assertEqual(url2hour(hour2url(timestamp)), timestamp)
@@ -0,0 +1,147 @@
+import os
+import sys
+import gzip
+import time
+import pickle
+import unittest
+from pathlib import Path
+from threading import Thread, Barrier
+from tempfile import TemporaryDirectory
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import ArchiveCache, Crawler, Downloader
+from crawler.downloader import HTTPStatusError
+
+
+class FlakyHandler(BaseHTTPRequestHandler):
+    """
+    A stand-in for GH Archive that serves one archive and fails on cue.
+
+    Faults (one per request): 'reset' drops the connection halfway through the body, 'slow' stalls before the body, 'ignore-range' answers a Range request with the whole file, and an int is sent as the status.
+    """
+    def do_GET(self):
+        self.server.ranges.append(self.headers.get('Range'))
+        fault = self.server.faults.pop(0) if self.server.faults else None
+        if isinstance(fault, int):
+            self.send_error(fault)
+            return
+
+        body, start = self.server.payload, 0
+        if self.headers.get('Range') and fault != 'ignore-range':
+            start = int(self.headers['Range'][len('bytes='):].split('-')[0])
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes {}-{}/{}'.format(
+                start, len(body) - 1, len(body)))
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', str(len(body) - start))
+        self.end_headers()
+
+        try:
+            if fault == 'slow':
+                time.sleep(0.5)
+            if fault == 'reset':
+                self.wfile.write(body[start:start + (len(body) - start) // 2])
+                self.close_connection = True
+                return
+            self.wfile.write(body[start:])
+        except OSError:  # The client gave up.
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloader(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FlakyHandler)
+        self.server.payload = gzip.compress(b''.join(
+            b'{"id":"%d","type":"ForkEvent","repo":{"id":1,"name":"a/b"}}\n' % i
+            for i in range(5000)))
+        self.server.faults = []
+        self.server.ranges = []
+        Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = 'http://127.0.0.1:{}/2020-03-12-16.json.gz'.format(
+            self.server.server_address[1])
+        self.downloader = Downloader(retries=3, backoff=0, read_timeout=0.2,
+                                     chunk_size=1024)
+        self.destination = self.tmp_path.joinpath('2020-03-12-16.json.gz')
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def test_resumes_after_reset(self):
+        self.server.faults = ['reset', 'reset']
+        self.downloader.download(self.url, self.destination)
+        self.assertEqual(self.destination.read_bytes(), self.server.payload)
+        self.assertIsNone(self.server.ranges[0])
+        offsets = [int(r[len('bytes='):-1]) for r in self.server.ranges[1:]]
+        self.assertEqual(len(offsets), 2)
+        self.assertTrue(0 < offsets[0] < offsets[1] < len(self.server.payload))
+
+    def test_retries_slow_and_unavailable(self):
+        self.server.faults = ['slow', 503, 'reset', 'ignore-range']
+        self.downloader.download(self.url, self.destination)
+        self.assertEqual(self.destination.read_bytes(), self.server.payload)
+        # The server ignored the last range, so the file was fetched again.
+        self.assertEqual(len(self.server.ranges), 4)
+        self.assertIsNotNone(self.server.ranges[-1])
+
+    def test_missing_hour_fails_fast(self):
+        self.server.faults = [404]
+        with self.assertRaises(HTTPStatusError):
+            self.downloader.download(self.url, self.destination)
+        self.assertEqual(len(self.server.ranges), 1)
+
+    def test_damaged_archive(self):
+        self.server.payload = self.server.payload[:-8] + b'\x00' * 8
+        with self.assertRaises(OSError):
+            self.downloader.download(self.url, self.destination)
+        self.assertEqual(len(self.server.ranges), 4)
+        self.assertEqual(list(self.tmp_path.iterdir()), [])
+
+    def test_crawler_downloads_into_cache(self):
+        cache = ArchiveCache(cache_path=self.tmp_path.joinpath('cache'))
+        crawler = Crawler(cache=cache, backoff=0)
+        self.server.faults = ['reset']
+        archive, is_temporary = crawler._fetch_archive(self.url)
+        self.assertFalse(is_temporary)
+        self.assertEqual(archive, cache.get('2020-03-12-16'))
+        self.assertEqual(sum(1 for _ in crawler._iter_archive(self.url)), 5000)
+
+    def test_crawler_shares_one_pool(self):
+        crawler = Crawler(max_workers=8)
+        barrier, pools = Barrier(8), []
+
+        def _get_pool():
+            barrier.wait()
+            pools.append(crawler.downloader.pool)
+
+        threads = [Thread(target=_get_pool) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(pools), 8)
+        self.assertTrue(all(pool is crawler.https for pool in pools))
+        self.assertIs(crawler.downloader, crawler.downloader)
+
+        # Unpickled crawlers build their own pool.
+        restored = pickle.loads(pickle.dumps(crawler))
+        self.assertIsNotNone(restored.downloader)
+        self.assertIsNot(restored.https, crawler.https)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import sys
+import gzip
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import (ArchiveCache, CrawlManifest, CSVStore, Crawler, EventBus,
+                     HourlyCountConsumer)
+from metrics import MetricsGetter, MetricsConsumer, CreateCountConsumer
+
+
+class TestEventBus(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        tmp_path = Path(self.tmp_dir.name)
+        self.cache = ArchiveCache(cache_path=tmp_path.joinpath('cache'),
+                                  offline=True)
+        self.manifest = CrawlManifest(tmp_path.joinpath('manifest.sqlite'))
+        self.store = CSVStore(tmp_path.joinpath('hourly'))
+        self.store.path.mkdir()
+        lines = [
+            b'{"id":"1","type":"PushEvent","repo":{"id":1,"name":"a/b"},'
+            b'"payload":{"distinct_size":3}}',
+            b'{"id":"2","type":"ForkEvent","repo":{"id":1,"name":"a/b"}}',
+            b'{"id":"3","type":"RepositoryEvent","repo":{"id":2,"name":"c/d"},'
+            b'"payload":{"action":"created"}}',
+        ]
+        self.cache.path('2020-03-12-16').write_bytes(gzip.compress(b'\n'.join(lines)))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_one_pass_feeds_every_consumer(self):
+        crawler = Crawler(hour=(15, 16), date=12, month=3, year=2020,
+                          cache=self.cache)
+        metrics_getter = MetricsGetter()
+        bus = EventBus(crawler)
+        bus.subscribe(HourlyCountConsumer(crawler.event_set, self.store,
+                                          self.manifest))
+        bus.subscribe(MetricsConsumer(metrics_getter))
+        bus.subscribe(CreateCountConsumer(metrics_getter))
+        bus.run()
+
+        data_df = self.store.read('2020-03-12-16')
+        self.assertEqual(data_df.loc['a/b', 'ForkEvent'], 1)
+        self.assertEqual(data_df.loc['a/b', 'CommitEvent'], 3)
+        self.assertEqual(metrics_getter.data['a/b']['03-12-2020']['CommitRate'], 3)
+        self.assertEqual(metrics_getter.create_count['03-12-2020'], 1)
+        # The missing hour failed instead of being saved empty.
+        self.assertEqual(self.manifest.summary(), {'done': 1, 'failed': 1})
+        self.assertEqual(list(self.store.keys()), ['2020-03-12-16'])
+
+    def test_failed_hour_is_discarded_by_every_consumer(self):
+        # The archive of 15:00 is cut off, so the hour fails after some of its events were read.
+        line = (b'{"id":"4","type":"PushEvent","repo":{"id":3,"name":"e/f"},'
+                b'"payload":{"distinct_size":1}}\n'
+                b'{"id":"5","type":"RepositoryEvent","repo":{"id":3,"name":"e/f"},'
+                b'"payload":{"action":"created"}}\n')
+        archive = gzip.compress(line * 10000)
+        self.cache.path('2020-03-12-15').write_bytes(archive[:len(archive) // 2])
+        crawler = Crawler(hour=(15, 16), date=12, month=3, year=2020,
+                          cache=self.cache)
+        handled = []
+        for batch in (False, True):
+            metrics_getter = MetricsGetter(batch=batch)
+            metrics_consumer = MetricsConsumer(metrics_getter)
+            bus = EventBus(crawler)
+            bus.subscribe(HourlyCountConsumer(crawler.event_set, self.store,
+                                              self.manifest))
+            bus.subscribe(metrics_consumer)
+            bus.subscribe(CreateCountConsumer(metrics_getter))
+            handle = metrics_consumer.handle
+
+            def _handle(data, timestamp):
+                handled.append(data['repo']['name'])
+                handle(data, timestamp)
+
+            metrics_consumer.handle = _handle
+            bus.run()
+
+            self.assertIn('e/f', handled)
+            self.assertNotIn('e/f', metrics_getter.data)
+            self.assertEqual(metrics_getter.data['a/b']['03-12-2020']['CommitRate'], 3)
+            self.assertEqual(dict(metrics_getter.create_count), {'03-12-2020': 1})
+            self.assertEqual(self.manifest.get('2020-03-12-15')['status'], 'failed')
+            self.assertEqual(list(self.store.keys()), ['2020-03-12-16'])
+
+    def test_prefilter_is_union(self):
+        crawler = Crawler(cache=self.cache)
+        bus = EventBus(crawler)
+        bus.subscribe(HourlyCountConsumer({'ForkEvent'}, self.store))
+        bus.subscribe(CreateCountConsumer(MetricsGetter()))
+        prefilter = bus._prefilter()
+        self.assertTrue(prefilter(b'{"type":"ForkEvent"}'))
+        self.assertTrue(prefilter(b'{"type":"RepositoryEvent"}'))
+        self.assertFalse(prefilter(b'{"type":"WatchEvent"}'))
+
+
+if __name__ == '__main__':
+    unittest.main()
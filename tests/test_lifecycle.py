@@ -0,0 +1,144 @@
+import os
+import sys
+import gzip
+import json
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import ArchiveCache, Crawler
+from metrics import LifecycleStore, MetricsGetter
+
+
+def issue_event(number, action, created_at, closed_at=None, repo='a/b'):
+    issue = {'number': number, 'created_at': created_at, 'closed_at': closed_at,
+             'user': {'login': 'author'}, 'labels': []}
+    return {'type': 'IssuesEvent', 'repo': {'name': repo},
+            'payload': {'action': action, 'issue': issue}}
+
+
+def comment_event(number, login, created_at, repo='a/b', closed_at=None):
+    issue = {'number': number, 'created_at': '2020-03-01T00:00:00Z',
+             'state': 'closed' if closed_at else 'open', 'closed_at': closed_at,
+             'user': {'login': 'author'}}
+    return {'type': 'IssueCommentEvent', 'repo': {'name': repo},
+            'payload': {'action': 'created', 'issue': issue,
+                        'comment': {'user': {'login': login}, 'created_at': created_at}}}
+
+
+def pull_request_event(number, action, created_at, closed_at=None, merged=False):
+    pull_request = {'number': number, 'created_at': created_at, 'closed_at': closed_at,
+                    'merged': merged, 'user': {'login': 'author'}}
+    return {'type': 'PullRequestEvent', 'repo': {'name': 'a/b'},
+            'payload': {'action': action, 'pull_request': pull_request}}
+
+
+def review_event(number, login, submitted_at):
+    return {'type': 'PullRequestReviewEvent', 'repo': {'name': 'a/b'},
+            'payload': {'action': 'created',
+                        'pull_request': {'number': number, 'user': {'login': 'author'}},
+                        'review': {'user': {'login': login}, 'submitted_at': submitted_at}}}
+
+
+class TestLifecycleStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        # A tiny batch, so updates of one item span several writes.
+        self.lifecycle = LifecycleStore(Path(self.tmp_dir.name).joinpath('lifecycle.sqlite'),
+                                        batch_size=2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_backlog_across_hours(self):
+        for event in [
+                issue_event(1, 'opened', '2020-03-01T00:00:00Z'),
+                issue_event(2, 'opened', '2020-03-01T06:00:00Z'),
+                issue_event(3, 'opened', '2020-03-01T00:00:00Z', repo='c/d'),
+                issue_event(1, 'closed', '2020-03-01T00:00:00Z', '2020-03-02T00:00:00Z'),
+                issue_event(2, 'closed', '2020-03-01T06:00:00Z', '2020-03-02T00:00:00Z'),
+                issue_event(2, 'reopened', '2020-03-01T06:00:00Z')]:
+            self.lifecycle.handle(event)
+
+        self.assertEqual(self.lifecycle.backlog('2020-03-01 12:00').to_dict(),
+                         {'a/b': 2, 'c/d': 1})
+        self.assertEqual(self.lifecycle.backlog('2020-03-03 00:00').to_dict(),
+                         {'a/b': 1, 'c/d': 1})
+        closed = self.lifecycle.latency('issue', '2020-03-01', '2020-03-02', until='closed')
+        self.assertEqual(closed.to_dict(), {'a/b': 24.0})
+
+    def test_first_response_ignores_the_author(self):
+        for event in [
+                comment_event(1, 'author', '2020-03-01T01:00:00Z'),
+                comment_event(1, 'other', '2020-03-01T05:00:00Z'),
+                comment_event(1, 'another', '2020-03-01T03:00:00Z'),
+                pull_request_event(7, 'opened', '2020-03-01T00:00:00Z'),
+                review_event(7, 'reviewer', '2020-03-01T10:00:00Z'),
+                pull_request_event(7, 'closed', '2020-03-01T00:00:00Z',
+                                   '2020-03-01T12:00:00Z', merged=True)]:
+            self.lifecycle.handle(event)
+
+        self.assertEqual(self.lifecycle.latency('issue', '2020-03-01', '2020-03-02').to_dict(),
+                         {'a/b': 3.0})
+        self.assertEqual(
+            self.lifecycle.latency('pull_request', '2020-03-01', '2020-03-02').to_dict(),
+            {'a/b': 10.0})
+        self.assertEqual(self.lifecycle.backlog('2020-03-01 11:00', 'pull_request').to_dict(),
+                         {'a/b': 1})
+        self.assertEqual(self.lifecycle.backlog('2020-03-01 13:00', 'pull_request').to_dict(), {})
+
+    def test_comment_on_a_closed_issue(self):
+        # The issue was opened and closed before the crawl started.
+        self.lifecycle.handle(comment_event(4, 'other', '2020-03-05T00:00:00Z',
+                                            closed_at='2020-03-02T00:00:00Z'))
+        self.lifecycle.handle(comment_event(5, 'other', '2020-03-05T00:00:00Z'))
+
+        self.assertEqual(self.lifecycle.backlog('2020-03-01 12:00').to_dict(), {'a/b': 2})
+        self.assertEqual(self.lifecycle.backlog('2020-03-03 00:00').to_dict(), {'a/b': 1})
+        closed = self.lifecycle.latency('issue', '2020-03-01', '2020-03-02', until='closed')
+        self.assertEqual(closed.to_dict(), {'a/b': 24.0})
+
+    def test_rollback_undoes_an_hour(self):
+        self.lifecycle.handle(issue_event(1, 'opened', '2020-03-01T00:00:00Z'))
+        self.lifecycle.begin()
+        for event in [issue_event(1, 'closed', '2020-03-01T00:00:00Z', '2020-03-01T02:00:00Z'),
+                      issue_event(2, 'opened', '2020-03-01T01:00:00Z'),
+                      issue_event(3, 'opened', '2020-03-01T01:00:00Z')]:
+            self.lifecycle.handle(event)
+        self.lifecycle.rollback()
+        self.assertEqual(self.lifecycle.backlog('2020-03-01 03:00').to_dict(), {'a/b': 1})
+
+        self.lifecycle.begin()
+        self.lifecycle.handle(issue_event(2, 'opened', '2020-03-01T01:00:00Z'))
+        self.lifecycle.commit()
+        self.assertEqual(self.lifecycle.backlog('2020-03-01 03:00').to_dict(), {'a/b': 2})
+
+    def test_metrics_getter_feeds_the_store(self):
+        cache = ArchiveCache(cache_path=Path(self.tmp_dir.name).joinpath('cache'), offline=True)
+        hours = {'2020-03-01-0': [issue_event(1, 'opened', '2020-03-01T00:00:00Z'),
+                                  issue_event(2, 'opened', '2020-03-01T00:00:00Z')],
+                 '2020-03-01-1': [comment_event(1, 'other', '2020-03-01T01:30:00Z')],
+                 '2020-03-01-2': [issue_event(1, 'closed', '2020-03-01T00:00:00Z',
+                                              '2020-03-01T02:00:00Z')]}
+        for key, events in hours.items():
+            lines = b'\n'.join(json.dumps(event).encode() for event in events)
+            cache.path(key).write_bytes(gzip.compress(lines))
+
+        metrics_getter = MetricsGetter(batch=True, lifecycle=self.lifecycle)
+        metrics_getter._process_hours(Crawler(start='2020-03-01 00:00', end='2020-03-01 02:00',
+                                              cache=cache))
+        self.assertEqual(metrics_getter.data['a/b']['03-01-2020']['IssueOpenRate'], 2)
+        self.assertEqual(self.lifecycle.backlog('2020-03-01 03:00').to_dict(), {'a/b': 1})
+        self.assertEqual(self.lifecycle.latency('issue', '2020-03-01', '2020-03-02').to_dict(),
+                         {'a/b': 1.5})
+
+
+if __name__ == '__main__':
+    unittest.main()
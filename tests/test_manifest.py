@@ -0,0 +1,77 @@
+import os
+import sys
+import gzip
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import ArchiveCache, CrawlManifest, CSVStore, Crawler
+
+
+class TestCrawlManifest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        tmp_path = Path(self.tmp_dir.name)
+        self.cache = ArchiveCache(cache_path=tmp_path.joinpath('cache'),
+                                  offline=True)
+        self.manifest = CrawlManifest(tmp_path.joinpath('manifest.sqlite'))
+        self.store = CSVStore(tmp_path.joinpath('hourly'))
+        self.store.path.mkdir()
+        self.archive = gzip.compress(
+            b'{"id":"1","type":"ForkEvent","repo":{"id":1,"name":"a/b"}}\n' * 7)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_records(self):
+        self.manifest.mark_started('2020-03-12-16')
+        self.manifest.mark_failed('2020-03-12-16', 'reset')
+        self.manifest.mark_started('2020-03-12-16')
+        self.manifest.mark_done('2020-03-12-16', 100, 7, 'abc')
+        record = self.manifest.get('2020-03-12-16')
+        self.assertEqual((record['status'], record['attempts'], record['events']),
+                         ('done', 2, 7))
+        self.assertIsNone(record['error'])
+        self.assertIsNone(self.manifest.get('2020-03-12-17'))
+        self.assertEqual(self.manifest.pending(['2020-03-12-16', '2020-03-12-17']),
+                         ['2020-03-12-17'])
+
+    def test_resume(self):
+        crawler = Crawler(hour=(16, 17), date=12, month=3, year=2020,
+                          cache=self.cache, manifest=self.manifest)
+        self.cache.path('2020-03-12-16').write_bytes(self.archive)
+        crawler.save_events(self.store)
+
+        # The missing hour failed instead of looking empty.
+        self.assertEqual(self.manifest.summary(), {'done': 1, 'failed': 1})
+        record = self.manifest.get('2020-03-12-16')
+        self.assertEqual((record['bytes'], record['events']),
+                         (len(self.archive), 7))
+        self.assertIsNotNone(record['checksum'])
+
+        # Only the failed hour is crawled again.
+        self.cache.path('2020-03-12-17').write_bytes(self.archive)
+        crawler.save_events(self.store)
+        self.assertEqual(self.manifest.summary(), {'done': 2})
+        self.assertEqual(self.manifest.get('2020-03-12-16')['attempts'], 1)
+        self.assertEqual(self.manifest.get('2020-03-12-17')['attempts'], 2)
+        self.assertEqual(sorted(self.store.keys()),
+                         ['2020-03-12-16', '2020-03-12-17'])
+
+    def test_recorded_size_catches_damaged_cache(self):
+        crawler = Crawler(hour=16, date=12, month=3, year=2020,
+                          cache=self.cache, manifest=self.manifest)
+        self.cache.path('2020-03-12-16').write_bytes(self.archive)
+        crawler.save_events(self.store)
+        # Truncated since it was crawled: the gzip header alone looks fine.
+        self.cache.path('2020-03-12-16').write_bytes(self.archive[:-4])
+        with self.assertRaises(FileNotFoundError):
+            crawler._fetch_archive(next(crawler._daterange2url()))
+        self.assertFalse(self.cache.path('2020-03-12-16').exists())
@@ -0,0 +1,179 @@
+import os
+import sys
+import json
+import gzip
+import random
+import unittest
+import pandas as pd
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import ArchiveCache, Crawler
+from metrics import MetricsGetter, EventTable, MetricsSink
+from utils import json2repos
+
+
+def random_event(rng):
+    repo = {'name': rng.choice(['a/b', 'c/d', 'e/f'])}
+    event_type = rng.choice(['PushEvent', 'IssuesEvent', 'PullRequestEvent'])
+    if event_type == 'PushEvent':
+        payload = {'distinct_size': rng.randint(0, 3)}
+    elif event_type == 'PullRequestEvent':
+        payload = {'action': rng.choice(['opened', 'closed', 'reopened']),
+                   'pull_request': {'merged': rng.random() < 0.5}}
+    else:
+        closed_at = rng.choice([None, '2020-03-{:02d}T{:02d}:00:00Z'.format(
+            rng.randint(10, 20), rng.randint(0, 23))])
+        labels = rng.sample(['bug', 'critical', 'enhancement', 'question'], rng.randint(0, 3))
+        payload = {'action': rng.choice(['opened', 'reopened', 'closed', 'labeled', 'assigned']),
+                   'issue': {'labels': [{'name': label} for label in labels],
+                             'created_at': '2020-03-10T12:00:00Z',
+                             'closed_at': closed_at}}
+    return {'type': event_type, 'repo': repo, 'payload': payload}
+
+
+class TestBatchMetrics(unittest.TestCase):
+    def test_batch_matches_per_event(self):
+        rng = random.Random(0)
+        hours = [[random_event(rng) for _ in range(300)] for _ in range(3)]
+
+        per_event = MetricsGetter()
+        batch = MetricsGetter(batch=True)
+        for hour, events in enumerate(hours):
+            date = '03-1{}-2020'.format(hour // 2)
+            table = EventTable()
+            for event in events:
+                per_event._process_event(event, date)
+                table.append(event)
+            batch._process_batch(table, date)
+
+        expected = json.loads(json.dumps(per_event.data))
+        actual = json.loads(json.dumps(batch.data))
+        self.assertEqual(expected.keys(), actual.keys())
+        for repo, dates in expected.items():
+            self.assertEqual(dates.keys(), actual[repo].keys())
+            for date, metrics in dates.items():
+                self.assertEqual(metrics.keys(), actual[repo][date].keys())
+                for metric, value in metrics.items():
+                    self.assertAlmostEqual(actual[repo][date][metric], value)
+
+    def test_empty_batch(self):
+        batch = MetricsGetter(batch=True)
+        batch._process_batch(EventTable(), '03-10-2020')
+        self.assertEqual(batch.data, {})
+
+
+class TestMergeableState(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(1)
+        self.hours = [[random_event(rng) for _ in range(200)] for _ in range(4)]
+
+    def process(self, hours):
+        metrics_getter = MetricsGetter()
+        for events in hours:
+            for event in events:
+                metrics_getter._process_event(event, '03-10-2020')
+        return metrics_getter
+
+    def test_merge_matches_one_pass(self):
+        whole = self.process(self.hours)
+        merged = MetricsGetter()
+        for hour in reversed(range(4)):
+            merged.merge(self.process(self.hours[hour:hour + 1]).state())
+        self.assertEqual(merged.state(), json.loads(json.dumps(whole.state())))
+        for repo, dates in whole.metrics().items():
+            day_metrics = dates['03-10-2020']
+            if 'IssueResolutionRate' in day_metrics:
+                self.assertAlmostEqual(merged.metrics()[repo]['03-10-2020']['AvgIssueCloseTime'],
+                                       day_metrics['AvgIssueCloseTime'])
+                self.assertNotIn('IssueCloseDays', day_metrics)
+
+    def test_save_and_load_state(self):
+        with TemporaryDirectory() as tmp_dir:
+            state_path = Path(tmp_dir).joinpath('state.json')
+            self.process(self.hours[:2]).save_state(state_path)
+            resumed = self.process(self.hours[2:]).load_state(state_path)
+        self.assertEqual(resumed.state(), self.process(self.hours).state())
+
+    def test_populate_in_parallel(self):
+        with TemporaryDirectory() as tmp_dir:
+            tmp_path = Path(tmp_dir)
+            cache = ArchiveCache(cache_path=tmp_path.joinpath('cache'), offline=True)
+            for hour, events in zip((14, 15, 16, 17), self.hours):
+                lines = b'\n'.join(json.dumps(event).encode() for event in events)
+                cache.path('2020-03-10-{}'.format(hour)).write_bytes(gzip.compress(lines))
+            crawler = Crawler(hour=(14, 17), date=10, month=3, year=2020, cache=cache)
+
+            serial = MetricsGetter()
+            serial._process_hours(crawler)
+            parallel = MetricsGetter()
+            parallel._process_shards(crawler, 2, state_path=tmp_path.joinpath('states'))
+            self.assertEqual(parallel.state(), serial.state())
+            self.assertEqual(len(list(tmp_path.joinpath('states').glob('*.json'))), 2)
+
+            # Saved shards are loaded rather than processed again.
+            resumed = MetricsGetter()
+            resumed._process_shards(crawler, 2, state_path=tmp_path.joinpath('states'))
+            self.assertEqual(resumed.state(), serial.state())
+
+
+    def test_truncated_hour_counts_for_nothing(self):
+        with TemporaryDirectory() as tmp_dir:
+            cache = ArchiveCache(cache_path=Path(tmp_dir), offline=True)
+            lines = b'\n'.join(json.dumps(event).encode() for event in self.hours[0])
+            cache.path('2020-03-10-14').write_bytes(gzip.compress(lines))
+            # Hour 15 fails after a good part of it was read.
+            lines = b'\n'.join(json.dumps(event).encode() for event in self.hours[1] * 50)
+            archive = gzip.compress(lines)
+            cache.path('2020-03-10-15').write_bytes(archive[:len(archive) // 2])
+
+            for batch in (False, True):
+                metrics_getter = MetricsGetter(batch=batch)
+                metrics_getter._process_hours(
+                    Crawler(hour=(14, 15), date=10, month=3, year=2020, cache=cache))
+                self.assertEqual(metrics_getter.state(), self.process(self.hours[:1]).state())
+
+class TestMetricsSink(unittest.TestCase):
+    def test_days_are_streamed_and_pivoted(self):
+        rng = random.Random(2)
+        with TemporaryDirectory() as tmp_dir:
+            tmp_path = Path(tmp_dir)
+            cache = ArchiveCache(cache_path=tmp_path.joinpath('cache'), offline=True)
+            for key in ('2020-03-10-23', '2020-03-11-0', '2020-03-11-1'):
+                lines = b'\n'.join(json.dumps(random_event(rng)).encode() for _ in range(100))
+                cache.path(key).write_bytes(gzip.compress(lines))
+            crawler = Crawler(start='2020-03-10 23:00', end='2020-03-11 01:00', cache=cache)
+
+            legacy = MetricsGetter()
+            legacy._process_hours(crawler)
+            for save_dir in ('json', 'jsonl', 'json_repos', 'jsonl_repos'):
+                tmp_path.joinpath(save_dir).mkdir()
+            with open(tmp_path.joinpath('json', 'metrics.json'), 'w') as metrics_file:
+                json.dump(legacy.metrics(), metrics_file)
+
+            streamed = MetricsGetter()
+            with MetricsSink(tmp_path.joinpath('jsonl', 'metrics.jsonl.gz')) as sink:
+                streamed._process_hours(crawler, sink=sink)
+                # The first day was written and freed as soon as the second one started.
+                self.assertEqual({date for dates in streamed.data.values() for date in dates},
+                                 {'03-11-2020'})
+                streamed.flush_days(sink)
+            self.assertEqual(streamed.data, {})
+
+            json2repos(tmp_path.joinpath('json'), tmp_path.joinpath('json_repos'))
+            json2repos(tmp_path.joinpath('jsonl'), tmp_path.joinpath('jsonl_repos'))
+            for repo_csv in tmp_path.joinpath('json_repos').glob('*.csv'):
+                pd.testing.assert_frame_equal(
+                    pd.read_csv(tmp_path.joinpath('jsonl_repos', repo_csv.name)),
+                    pd.read_csv(repo_csv))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import gzip
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import ArchiveCache, Crawler, HourlyPipeline
+
+
+class TestHourlyPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.cache = ArchiveCache(cache_path=Path(self.tmp_dir.name).joinpath('cache'),
+                                  offline=True)
+        self.archive = gzip.compress(
+            b'{"id":"1","type":"ForkEvent","repo":{"id":1,"name":"a/b"}}\n' * 7)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_pipeline_matches_threads(self):
+        self.cache.path('2020-03-12-16').write_bytes(self.archive)
+        frames = []
+        for num_processes in (0, 2):
+            crawler = Crawler(hour=(15, 16), date=12, month=3, year=2020,
+                              cache=self.cache, num_processes=num_processes)
+            frames.append({key: data_df for key, data_df, _
+                           in crawler._iter_hourly_dataframes()})
+        self.assertEqual(set(frames[0]), set(frames[1]))
+        self.assertIsNone(frames[1]['2020-03-12-15'])
+        self.assertTrue(frames[0]['2020-03-12-16'].equals(
+            frames[1]['2020-03-12-16']))
+
+    def test_pipeline_failures_and_early_stop(self):
+        for hour in (15, 16, 17):
+            self.cache.path('2020-03-12-{}'.format(hour)).write_bytes(self.archive)
+        crawler = Crawler(hour=(15, 17), date=12, month=3, year=2020, cache=self.cache)
+        fetch_archive = crawler._fetch_archive
+
+        def _fetch_archive(mined_url, spool_path=None):
+            if '2020-03-12-16' in mined_url:
+                raise ValueError("truncated")
+            return fetch_archive(mined_url, spool_path)
+
+        crawler._fetch_archive = _fetch_archive
+        mined_urls = ['https://data.gharchive.org/2020-03-12-{}.json.gz'.format(hour)
+                      for hour in (15, 16, 17)]
+        pipeline = HourlyPipeline(crawler, num_downloaders=2, num_workers=1, queue_size=1)
+        stats = {key: hour_stats for key, _, hour_stats in pipeline.run(mined_urls)}
+        self.assertEqual(stats['2020-03-12-16'], {'error': 'ValueError: truncated'})
+        self.assertEqual(stats['2020-03-12-17']['events'], 7)
+
+        # Abandoning the generator stops the stages instead of leaving them blocked.
+        results = pipeline.run(mined_urls * 4)
+        next(results)
+        results.close()
+        self.assertTrue(pipeline._stop.is_set())
@@ -0,0 +1,100 @@
+import os
+import sys
+import random
+import unittest
+import pandas as pd
+from pathlib import Path
+from collections import Counter
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import Agglomerate, CSVStore, ExactRanking, SpaceSavingRanking
+
+
+class TestRanking(unittest.TestCase):
+    def setUp(self):
+        # Zipf-like scores over many small aggregates.
+        rng = random.Random(0)
+        self.frames = []
+        self.totals = Counter()
+        for _ in range(20):
+            repos = ['repo/{}'.format(int(rng.paretovariate(1.0))) for _ in range(500)]
+            scores = pd.Series(Counter(repos))
+            self.frames.append(scores)
+            self.totals.update(scores.to_dict())
+
+    def test_exact_ranking(self):
+        ranking = ExactRanking('PushEvent')
+        for scores in self.frames:
+            ranking.update(scores)
+        top_df = ranking.top(10)
+        self.assertEqual(list(top_df.columns), ['PushEvent'])
+        self.assertEqual(top_df['PushEvent'].tolist(),
+                         [count for _, count in self.totals.most_common(10)])
+
+    def test_space_saving_bounds(self):
+        ranking = SpaceSavingRanking(capacity=50)
+        for scores in self.frames:
+            ranking.update(scores)
+        self.assertLessEqual(len(ranking.counts), 50)
+        self.assertLessEqual(len(ranking._heap), 4 * 50)
+
+        top_df = ranking.top(10)
+        for repo, (count, max_error) in top_df.iterrows():
+            self.assertLessEqual(count - max_error, self.totals[repo])
+            self.assertGreaterEqual(count, self.totals[repo])
+        # The heavy hitters are all there.
+        self.assertEqual(top_df.index[:3].tolist(),
+                         [repo for repo, _ in self.totals.most_common(3)])
+
+    def test_space_saving_is_exact_below_capacity(self):
+        ranking = SpaceSavingRanking(capacity=len(self.totals))
+        for scores in self.frames:
+            ranking.update(scores)
+        top_df = ranking.top(10)
+        self.assertEqual(top_df['MaxError'].sum(), 0)
+        self.assertEqual(top_df['TotalEvents'].tolist(),
+                         [count for _, count in self.totals.most_common(10)])
+
+
+class TestTopRepos(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.data_path = Path(self.tmp_dir.name)
+        store = CSVStore(self.data_path.joinpath('hourly'))
+        store.path.mkdir()
+        for key, counts in (('2020-03-12-16', {'a/b': [1, 2], 'c/d': [0, 3]}),
+                            ('2020-04-01-0', {'a/b': [1, 0], 'e/f': [9, 0]})):
+            store.write(key, pd.DataFrame.from_dict(counts, orient='index',
+                                                    columns=['PushEvent', 'ForkEvent']))
+        self.agg = Agglomerate(self.data_path, store=store)
+        self.agg.refresh('monthly')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_top_repos_writes_active_repos(self):
+        top_df = self.agg.top_repos(K=2)
+        self.assertEqual(top_df.index.tolist(), ['e/f', 'a/b'])
+
+        # Most active last, as MetricsGetter.set_top_K_repos takes the last K.
+        active_df = pd.read_csv(self.data_path.joinpath('active_repos.csv'), index_col=0)
+        self.assertEqual(active_df.index.name, 'Repository')
+        self.assertEqual(active_df.index.tolist()[-1:], ['e/f'])
+
+    def test_top_repos_by_column_and_period(self):
+        top_df = self.agg.top_repos(K=5, column='ForkEvent', end='2020-03',
+                                    capacity=10, also_save=False)
+        self.assertEqual(top_df.index.tolist(), ['c/d', 'a/b'])
+        self.assertEqual(top_df['ForkEvent'].tolist(), [3, 2])
+        self.assertFalse(self.data_path.joinpath('active_repos.csv').exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import sys
+import unittest
+import pandas as pd
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import Agglomerate, CSVStore
+
+
+class TestIncrementalRollups(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.data_path = Path(self.tmp_dir.name)
+        self.store = CSVStore(self.data_path.joinpath('hourly'))
+        self.store.path.mkdir()
+        self.agg = Agglomerate(self.data_path, store=self.store)
+        self.write('2020-03-12-16', {'a/b': [1, 2], 'c/d': [0, 3]})
+        self.write('2020-03-12-17', {'a/b': [4, 0]})
+
+        self.reads = []
+        read = self.store.read
+        self.store.read = lambda key, *args: self.reads.append(key) or read(key, *args)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, key, counts):
+        data_df = pd.DataFrame.from_dict(counts, orient='index',
+                                         columns=['PushEvent', 'ForkEvent'])
+        self.store.write(key, data_df)
+
+    def assert_matches_batch(self, granularity='daily'):
+        batch = getattr(self.agg, 'hourly2' + granularity)(also_save=False)
+        for period, batch_df in batch.items():
+            saved_df = pd.read_csv(self.agg._rollup_path(granularity, period), index_col=0)
+            pd.testing.assert_frame_equal(saved_df, batch_df, check_names=False)
+
+    def test_refresh_only_reads_new_hours(self):
+        self.assertEqual(list(self.agg.refresh('daily')), ['2020-03-12'])
+        self.write('2020-03-12-18', {'e/f': [0, 1]})
+        self.reads.clear()
+        self.assertEqual(list(self.agg.refresh('daily')), ['2020-03-12'])
+        self.assertEqual(self.reads, ['2020-03-12-18'])
+        self.assertEqual(self.agg.ledger.watermark('daily', '2020-03-12'), '2020-03-12-18')
+        self.assert_matches_batch('daily')
+
+        # Nothing changed, so nothing is read.
+        self.reads.clear()
+        self.assertEqual(self.agg.refresh('daily'), {})
+        self.assertEqual(self.reads, [])
+
+    def test_changed_hour_recomputes_its_period(self):
+        self.agg.refresh('monthly')
+        self.write('2020-03-12-17', {'a/b': [5, 5]})
+        self.write('2020-04-01-0', {'a/b': [1, 0]})
+        self.reads.clear()
+        self.assertEqual(sorted(self.agg.refresh('monthly')), ['2020-03', '2020-04'])
+        self.assertEqual(sorted(self.reads),
+                         ['2020-03-12-16', '2020-03-12-17', '2020-04-01-0'])
+        self.assert_matches_batch('monthly')
+
+    def test_correct_hour_adds_the_difference(self):
+        for granularity in ('daily', 'weekly', 'monthly'):
+            self.agg.refresh(granularity)
+        self.agg.correct_hour('2020-03-12-16', pd.DataFrame(
+            {'PushEvent': [7]}, index=['a/b']))
+        for granularity in ('daily', 'weekly', 'monthly'):
+            self.assert_matches_batch(granularity)
+            self.assertEqual(self.agg.refresh(granularity), {})
+
+    def test_rollup_reads_every_hour_once(self):
+        self.write('2020-03-29-0', {'a/b': [1, 0]})
+        self.write('2020-03-30-1', {'e/f': [0, 2]})
+        self.write('2020-04-01-0', {'a/b': [3, 0]})
+        self.reads.clear()
+        rollups = self.agg.rollup()
+        self.assertEqual(sorted(self.reads), sorted(self.store.keys()))
+        self.assertEqual(sorted(rollups['weekly']), ['2020-W11', '2020-W13', '2020-W14'])
+        self.assertEqual(sorted(rollups['monthly']), ['2020-03', '2020-04'])
+        self.assertEqual(len(rollups['daily']), 4)
+        self.assertEqual(rollups['weekly']['2020-W14'].loc['a/b', 'PushEvent'], 3)
+        self.assertEqual(rollups['monthly']['2020-03'].loc['a/b', 'TotalEvents'], 7 + 1)
+        self.assertEqual(list(rollups['monthly']['2020-03'].columns),
+                         ['ForkEvent', 'PushEvent', 'TotalEvents', 'NumEvents'])
+
+        # Everything rolled up was recorded, so there is nothing to refresh.
+        for granularity in ('daily', 'weekly', 'monthly'):
+            self.assertEqual(self.agg.refresh(granularity), {})
+
+    def test_parallel_rollup_matches_serial(self):
+        self.write('2020-03-30-1', {'e/f': [0, 2]})
+        self.write('2020-04-01-0', {'a/b': [3, 0]})
+        serial = self.agg.rollup(also_save=False)
+        del self.store.read  # Workers get a pickled copy of the store.
+        timings = self.agg.parallel_rollup(num_workers=2)
+        for granularity, periods in serial.items():
+            self.assertEqual(sorted(timings[granularity]), sorted(periods))
+            for period, serial_df in periods.items():
+                saved_df = pd.read_csv(self.agg._rollup_path(granularity, period),
+                                       index_col=0)
+                pd.testing.assert_frame_equal(saved_df, serial_df, check_names=False)
+        for granularity in ('daily', 'weekly', 'monthly'):
+            self.assertEqual(self.agg.refresh(granularity), {})
+
+    def test_ledger_inputs_of_some_periods(self):
+        self.write('2020-03-13-0', {'e/f': [0, 2]})
+        self.agg.refresh('daily')
+        self.assertEqual(sorted(self.agg.ledger.inputs('daily')), ['2020-03-12', '2020-03-13'])
+        inputs = self.agg.ledger.inputs('daily', periods=['2020-03-13', '2020-03-14'])
+        self.assertEqual(list(inputs), ['2020-03-13'])
+        self.assertEqual(list(inputs['2020-03-13']), ['2020-03-13-0'])
+
+    def test_weekly_with_match_string(self):
+        self.agg.set_match_string('2020-03')
+        self.assertEqual(list(self.agg.hourly2weekly(also_save=False)), ['2020-W11'])
+
+    def test_alltime_sums_months(self):
+        self.write('2020-04-01-0', {'a/b': [1, 0]})
+        self.agg.refresh('monthly')
+        ranking = self.agg.alltime()
+        self.assertEqual(ranking.loc['a/b', 'TotalEvents'], 7 + 1)
+        self.assertEqual(ranking.loc['c/d', 'NumEvents'], 1)
+        # Two event types over both months, not one per month summed.
+        self.assertEqual(ranking.loc['a/b', 'NumEvents'], 2)
+        self.assertNotIn('PushEvent', ranking.columns)
+
+
+if __name__ == '__main__':
+    unittest.main()
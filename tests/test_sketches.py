@@ -0,0 +1,79 @@
+import os
+import sys
+import gzip
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import ArchiveCache, CSVStore, Crawler, HyperLogLog, SketchStore
+
+
+class TestHyperLogLog(unittest.TestCase):
+    def test_estimates_within_error(self):
+        for num_names in (10, 1000, 50000):
+            sketch = HyperLogLog().update('repo/{}'.format(i) for i in range(num_names))
+            self.assertAlmostEqual(sketch.count() / num_names, 1, delta=0.05)
+
+    def test_merge_is_union(self):
+        first = HyperLogLog().update('repo/{}'.format(i) for i in range(3000))
+        second = HyperLogLog().update('repo/{}'.format(i) for i in range(2000, 6000))
+        union = HyperLogLog().update('repo/{}'.format(i) for i in range(6000))
+        merged = HyperLogLog.from_bytes(first.to_bytes()).merge(second)
+        self.assertEqual(merged.count(), union.count())
+
+
+class TestSketchStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.sketches = SketchStore(self.tmp_path.joinpath('sketches.sqlite'))
+        # Hour h of March 2020 has repositories h to h + 9.
+        for day in (1, 2):
+            for hour in range(24):
+                first = (day - 1) * 24 + hour
+                self.sketches.add('2020-03-0{}-{}'.format(day, hour),
+                                  ['repo/{}'.format(i) for i in range(first, first + 10)],
+                                  ['actor/{}'.format(day)])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_periods(self):
+        self.assertEqual(self.sketches.count_period('daily', '2020-03-01'), 24 + 9)
+        self.assertEqual(self.sketches.count_period('monthly', '2020-03'), 48 + 9)
+        self.assertEqual(self.sketches.count_period('weekly', '2020-W09', 'actors'), 1)
+        self.assertEqual(self.sketches.count_period('monthly', '2020-04'), 0)
+
+        # A changed hour drops the merged sketches of its periods.
+        self.sketches.add('2020-03-01-0', ['repo/{}'.format(i) for i in range(10)] + ['repo/new'])
+        self.assertEqual(self.sketches.count_period('daily', '2020-03-01'), 24 + 9 + 1)
+
+    def test_time_range(self):
+        self.assertEqual(self.sketches.count('2020-03-01 22:00', '2020-03-02 01:00'), 4 + 9)
+        self.assertEqual(self.sketches.count('2020-03-01 00:00', '2020-03-02 23:00', 'actors'), 2)
+        self.assertEqual(self.sketches.count('2020-03-01 05:00', '2020-03-01 05:00'), 10)
+
+    def test_crawler_saves_sketches(self):
+        cache = ArchiveCache(cache_path=self.tmp_path.joinpath('cache'), offline=True)
+        lines = [
+            b'{"id":"1","type":"ForkEvent","repo":{"id":1,"name":"a/b"},"actor":{"login":"x"}}',
+            b'{"id":"2","type":"ForkEvent","repo":{"id":2,"name":"c/d"},"actor":{"login":"x"}}',
+        ]
+        cache.path('2020-03-12-16').write_bytes(gzip.compress(b'\n'.join(lines)))
+        store = CSVStore(self.tmp_path.joinpath('hourly'))
+        store.path.mkdir()
+        Crawler(hour=16, date=12, month=3, year=2020, cache=cache,
+                sketches=self.sketches).save_events(store)
+        self.assertEqual(self.sketches.count_period('daily', '2020-03-12', 'repos'), 2)
+        self.assertEqual(self.sketches.count_period('daily', '2020-03-12', 'actors'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import unittest
+import pandas as pd
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import CSVStore, ParquetStore, Agglomerate
+from crawler.storage import migrate_flat_store
+
+
+def _hourly_counts(hour):
+    return pd.DataFrame({'CommitEvent': {'a/b': 2.0 + hour, 'c/d': 1.0},
+                         'ForkEvent': {'a/b': None, 'c/d': 1.0 * hour}})
+
+
+class TestStorage(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.csv_store = CSVStore(Path(self.tmp_dir.name).joinpath('hourly'))
+        self.csv_store.path.mkdir()
+        self.parquet_store = ParquetStore(
+            Path(self.tmp_dir.name).joinpath('parquet'))
+        for day in (12, 13):
+            for hour in range(3):
+                key = '2020-03-{}-{}'.format(day, hour)
+                self.csv_store.write(key, _hourly_counts(hour).fillna(0))
+                self.parquet_store.write(key, _hourly_counts(hour))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_keys(self):
+        self.assertEqual(sorted(self.csv_store.keys('2020-03-12')),
+                         sorted(self.parquet_store.keys('2020-03-12')))
+        self.assertEqual(len(list(self.parquet_store.keys())), 6)
+        self.assertEqual(len(list(self.parquet_store.keys('2020-04'))), 0)
+
+    def test_keys_come_from_the_index(self):
+        self.assertTrue(self.csv_store.location('2020-03-12-2').match(
+            'hourly/year=2020/month=03/day=12/2020-03-12-2.csv'))
+        self.assertEqual(self.csv_store.index.keys('2020-03-13'),
+                         ['2020-03-13-0', '2020-03-13-1', '2020-03-13-2'])
+        # Files added behind the store's back only show up once it is reindexed.
+        self.csv_store.location('2020-03-12-2').rename(
+            self.csv_store.location('2020-03-12-2').with_name('2020-03-14-0.csv'))
+        self.assertIn('2020-03-12-2', self.csv_store.keys('2020-03-12'))
+        self.csv_store.reindex()
+        self.assertEqual(len(list(self.csv_store.keys('2020-03-12'))), 2)
+
+    def test_migrate_flat_store(self):
+        flat_store = CSVStore(Path(self.tmp_dir.name).joinpath('flat'), partitioned=False)
+        for hour in range(3):
+            flat_store.write('2020-03-12-{}'.format(hour), _hourly_counts(hour).fillna(0))
+        # Flat hours are read as they are until they are migrated.
+        self.assertFalse(CSVStore(flat_store.path).partitioned)
+        with self.assertRaises(ValueError):
+            list(CSVStore(flat_store.path, partitioned=True).keys())
+        self.assertEqual(migrate_flat_store(flat_store.path,
+                                            CSVStore(flat_store.path, partitioned=True)), 3)
+        store = CSVStore(flat_store.path)
+        self.assertEqual(list(store.keys('2020-03')),
+                         ['2020-03-12-0', '2020-03-12-1', '2020-03-12-2'])
+        self.assertTrue(store.read('2020-03-12-1').equals(
+            self.csv_store.read('2020-03-12-1')))
+        self.assertEqual(list(flat_store.path.glob('*.csv')), [])
+        self.assertTrue(CSVStore(flat_store.path).partitioned)
+
+    def test_read_is_integer_and_projected(self):
+        data_df = self.parquet_store.read('2020-03-12-2', columns=['ForkEvent'])
+        self.assertEqual(list(data_df.columns), ['ForkEvent'])
+        self.assertEqual(data_df['ForkEvent'].dtype, 'int64')
+        self.assertEqual(data_df.loc['c/d', 'ForkEvent'], 2)
+
+    def test_scan_pushes_down_predicates(self):
+        data_df = self.parquet_store.scan(
+            columns=['ForkEvent'],
+            filters=[('day', '=', 13), ('ForkEvent', '>', 0)])
+        self.assertEqual(len(data_df), 2)
+        self.assertTrue((data_df['day'] == 13).all())
+
+    def test_agglomerate_stores_agree(self):
+        daily = []
+        for store in (self.csv_store, self.parquet_store):
+            agg = Agglomerate(data_path=Path(self.tmp_dir.name), store=store)
+            agg.set_match_string('2020-03-12')
+            daily.append(agg.hourly2daily(also_save=False)['2020-03-12'])
+        self.assertTrue(daily[0].astype('int64').sort_index().equals(
+            daily[1].astype('int64').sort_index()))
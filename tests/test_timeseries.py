@@ -0,0 +1,79 @@
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+# Add project source to path
+root = Path(os.path.abspath(os.path.join(
+    os.getcwd().split("frisky-frog")[0], 'frisky-frog')))
+
+if root.joinpath('src') not in sys.path:
+    sys.path.append(str(root.joinpath('src')))
+
+from crawler import PrefixSumIndex
+from crawler.timeseries import main
+
+
+class TestPrefixSumIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = TemporaryDirectory()
+        self.data_path = Path(self.tmp_dir.name)
+        self.data_path.joinpath('daily').mkdir()
+        # Day d of March 2020 has d commits for a/b and, on even days, 1 for c/d. March 3rd is missing.
+        for day in (1, 2, 4, 5, 6):
+            counts = {'a/b': [day, 1]}
+            if day % 2 == 0:
+                counts['c/d'] = [1, 0]
+            daily_df = pd.DataFrame.from_dict(counts, orient='index',
+                                              columns=['CommitEvent', 'ForkEvent'])
+            daily_df.to_csv(self.data_path.joinpath('daily', '2020-03-0{}.csv'.format(day)),
+                            index_label='Repositories')
+        self.index_path = PrefixSumIndex.build(self.data_path,
+                                               self.data_path.joinpath('prefix_index'))
+        self.index = PrefixSumIndex(self.index_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_window_sum(self):
+        self.assertEqual(self.index.num_days, 6)
+        self.assertEqual(self.index.window_sum('a/b', '2020-03-02', '2020-03-04', 'CommitEvent'), 6)
+        self.assertEqual(self.index.window_sum('a/b', '2020-02-01', '2020-04-01', 'ForkEvent'), 5)
+        np.testing.assert_array_equal(
+            self.index.window_sum(['a/b', 'c/d'], '2020-03-04', '2020-03-06', 'CommitEvent'),
+            [15, 2])
+        with self.assertRaises(KeyError):
+            self.index.window_sum('e/f', '2020-03-01', '2020-03-02', 'CommitEvent')
+        with self.assertRaises(AssertionError):
+            self.index.window_sum('a/b', '2020-03-04', '2020-03-02', 'CommitEvent')
+
+    def test_some_repos(self):
+        path = self.data_path.joinpath('top_index')
+        index = PrefixSumIndex(PrefixSumIndex.build(self.data_path, path, repos=1))
+        self.assertEqual(index.repos, ['a/b'])
+        self.assertEqual(index.window_sum('a/b', '2020-03-02', '2020-03-04', 'CommitEvent'), 6)
+        index = PrefixSumIndex(PrefixSumIndex.build(self.data_path, path, repos=['c/d', 'e/f']))
+        np.testing.assert_array_equal(
+            index.window_sum(['c/d', 'e/f'], '2020-03-01', '2020-03-06', 'CommitEvent'), [3, 0])
+        # 7 rows x 2 repositories x 2 columns of 8 bytes.
+        with self.assertRaises(AssertionError):
+            PrefixSumIndex.build(self.data_path, path, max_bytes=7 * 2 * 2 * 8 - 1)
+
+    def test_rolling(self):
+        rolling = self.index.rolling('a/b', 2, 'CommitEvent')
+        self.assertEqual(rolling.index[0], '2020-03-01')
+        self.assertEqual(rolling.tolist(), [1, 3, 2, 4, 9, 11])
+        rolling = self.index.rolling('c/d', 3, 'CommitEvent', start='2020-03-05')
+        self.assertEqual(rolling.tolist(), [1, 2])
+
+    def test_cli(self):
+        main(['--index-path', str(self.index_path), 'build', '--data-path', str(self.data_path),
+              '--columns', 'ForkEvent'])
+        self.assertEqual(PrefixSumIndex(self.index_path).columns, ['ForkEvent'])
+
+
+if __name__ == '__main__':
+    unittest.main()